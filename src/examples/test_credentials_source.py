@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from utilities import CredentialsSource
+
+
+class CredentialsCache(unittest.TestCase):
+
+    secrets = {
+        "api": {
+            "tokenUrl": "https://identity.example.com/oauth2/token",
+            "username": "user",
+            "password": "password",
+            "clientId": "client",
+            "clientSecret": "secret",
+            "apiUrl": "https://example.lusid.com/api",
+            "applicationName": "examples",
+        },
+        "proxy": {"address": "http://proxy.example.com:8080"},
+    }
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.secrets_path = Path(directory.name, "secrets.json")
+        self.write_secrets(self.secrets)
+
+        # Only the secrets file of the test configures the credentials
+        environment = {name: value for name, value in os.environ.items() if not name.startswith("FBN_")}
+        for patch in (mock.patch.dict(os.environ, environment, clear=True),
+                      mock.patch.object(CredentialsSource, "secrets_path", return_value=self.secrets_path),
+                      mock.patch.object(CredentialsSource, "_cache", None)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        patch = mock.patch.object(CredentialsSource, "_load", wraps=CredentialsSource._load)
+        self.load = patch.start()
+        self.addCleanup(patch.stop)
+
+    def write_secrets(self, secrets, mtime_ns=None):
+        self.secrets_path.write_text(json.dumps(secrets))
+        if mtime_ns is not None:
+            os.utime(self.secrets_path, ns=(mtime_ns, mtime_ns))
+
+    def test_credentials_are_resolved_once(self):
+        for _ in range(3):
+            self.assertEqual(CredentialsSource.fetch_credentials()["app_name"], "examples")
+        self.assertEqual(self.load.call_count, 1)
+
+        configuration = CredentialsSource.api_configuration()
+        self.assertEqual(configuration.api_url, "https://example.lusid.com/api")
+        self.assertEqual(configuration.proxy_config.address, "http://proxy.example.com:8080")
+        self.assertEqual(self.load.call_count, 1)
+
+    def test_cache_is_invalidated_when_the_file_changes(self):
+        CredentialsSource.fetch_credentials()
+
+        secrets = json.loads(json.dumps(self.secrets))
+        secrets["api"]["applicationName"] = "changed"
+        stat = os.stat(self.secrets_path)
+        self.write_secrets(secrets, mtime_ns=stat.st_mtime_ns + 1_000_000_000)
+
+        self.assertEqual(CredentialsSource.fetch_credentials()["app_name"], "changed")
+        self.assertEqual(self.load.call_count, 2)
+
+    def test_environment_changes_are_seen_without_parsing_again(self):
+        CredentialsSource.fetch_credentials()
+
+        with mock.patch.dict(os.environ, {"FBN_APP_NAME": "from-environment"}):
+            self.assertEqual(CredentialsSource.fetch_credentials()["app_name"], "from-environment")
+        self.assertEqual(CredentialsSource.fetch_credentials()["app_name"], "examples")
+        self.assertEqual(self.load.call_count, 1)
+
+    def test_api_configuration_prefers_the_secrets_file(self):
+        with mock.patch.dict(os.environ, {"FBN_APP_NAME": "from-environment", "FBN_CLIENT_ID": "other"}):
+            self.assertEqual(CredentialsSource.fetch_credentials()["app_name"], "from-environment")
+
+            # As the loader of the SDK does
+            configuration = CredentialsSource.api_configuration()
+            self.assertEqual((configuration.app_name, configuration.client_id), ("examples", "client"))
+
+    def test_personal_access_token_keeps_the_optional_settings(self):
+        secrets = {"api": {"apiUrl": "https://example.lusid.com/api", "applicationName": "examples"},
+                   "proxy": {"address": "http://proxy.example.com:8080"}}
+        self.write_secrets(secrets)
+
+        with mock.patch.dict(os.environ, {"FBN_ACCESS_TOKEN": "token"}):
+            configuration = CredentialsSource.api_configuration()
+
+        self.assertEqual(configuration.access_token, "token")
+        self.assertEqual(configuration.app_name, "examples")
+        self.assertEqual(configuration.proxy_config.address, "http://proxy.example.com:8080")
+
+if __name__ == "__main__":
+    unittest.main()
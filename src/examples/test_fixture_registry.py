@@ -0,0 +1,58 @@
+import unittest
+from types import SimpleNamespace
+
+import lusid
+from utilities import FixtureRegistry, IdGenerator
+
+
+class FakeTransactionPortfoliosApi:
+    """
+    Stands in for the transaction portfolios api, recording the portfolios created and the transactions upserted
+    """
+
+    def __init__(self):
+        self.api_client = lusid.ApiClient()
+        self.portfolios = {}
+
+    def create_portfolio(self, scope, create_transaction_portfolio_request):
+        self.portfolios[(scope, create_transaction_portfolio_request.code)] = []
+        return SimpleNamespace(id=SimpleNamespace(scope=scope, code=create_transaction_portfolio_request.code))
+
+    def upsert_transactions(self, scope, code, transaction_request):
+        self.portfolios[(scope, code)].append(transaction_request)
+
+
+class FixtureRegistryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = FixtureRegistry(lusid.ApiClient())
+        self.transaction_portfolios_api = FakeTransactionPortfoliosApi()
+        self.registry.transaction_portfolios_api = self.transaction_portfolios_api
+        self.registry.test_data_utilities.transaction_portfolio_api = self.transaction_portfolios_api
+        self.registry.get("instruments", lambda: ["LUID_A", "LUID_B", "LUID_C"])
+
+    def test_clones_copy_the_transactions_of_the_shared_portfolio(self):
+        id_generator = IdGenerator(scope="clones")
+
+        seeded = self.registry.seeded_portfolio()
+        clone = self.registry.clone_portfolio(id_generator)
+        other = self.registry.clone_portfolio()
+
+        self.assertEqual(len({seeded.code, clone.code, other.code}), 3)
+        self.assertEqual(len(self.transaction_portfolios_api.portfolios), 3)
+        for portfolio in (clone, other):
+            self.assertEqual(self.transaction_portfolios_api.portfolios[(portfolio.scope, portfolio.code)],
+                             [seeded.body])
+            self.assertEqual([transaction.transaction_id for transaction in portfolio.transactions],
+                             [transaction.transaction_id for transaction in seeded.transactions])
+            self.assertIsNot(portfolio.transactions, seeded.transactions)
+
+        # Each clone is recorded for deletion, by the generator given or the registry's own
+        self.assertEqual([code for _, _, code in id_generator.pop_scope_and_codes()], [clone.code])
+        self.assertEqual(sorted(code for _, _, code in self.registry.id_generator.pop_scope_and_codes()),
+                         sorted([seeded.code, other.code]))
+        self.assertIs(self.registry.seeded_portfolio(), seeded)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import utilities
+
+# Imports the package and one of its names in a fresh interpreter, printing the time taken in milliseconds
+# and the heavy modules that ended up being loaded
+_benchmark = """
+import sys, time
+start = time.perf_counter()
+import utilities
+getattr(utilities, {name!r})
+elapsed = (time.perf_counter() - start) * 1000
+print(elapsed, ",".join(module for module in ("lusid", "numpy", "pyarrow") if module in sys.modules))
+"""
+
+
+class ImportTime(unittest.TestCase):
+
+    @staticmethod
+    def time_import(name, repeat=5):
+        """
+        Times importing the utilities package and accessing a name in it, taking the best of several runs
+
+        :param str name: The name to access
+        :param int repeat: The number of fresh interpreters to time
+
+        :return: (float, list[str]): The best time in milliseconds and the heavy modules loaded
+        """
+        src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [src, os.environ.get("PYTHONPATH")])))
+
+        timings = []
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, "-c", _benchmark.format(name=name)], env=env, check=True,
+                                    capture_output=True, text=True).stdout.split()
+            timings.append(float(output[0]))
+
+        return min(timings), output[1].split(",") if len(output) > 1 else []
+
+    lightweight_helpers = ["IdGenerator", "TempFileManager", "BatchRunner", "RateLimiter"]
+
+    def test_lightweight_helpers_do_not_load_the_sdk(self):
+        for name in self.lightweight_helpers:
+            with self.subTest(name=name):
+                _, loaded = self.time_import(name, repeat=1)
+                self.assertEqual(loaded, [])
+
+    def test_sdk_is_loaded_on_first_use(self):
+        _, loaded = self.time_import("TestDataUtilities", repeat=1)
+        self.assertIn("lusid", loaded)
+
+    @unittest.skipUnless(os.getenv("FBN_RUN_BENCHMARKS"), "benchmarks only run when FBN_RUN_BENCHMARKS is set")
+    def test_benchmark_import_times(self):
+        # The timings are only reported, they vary too much between machines to assert on
+        for name in self.lightweight_helpers + ["TestDataUtilities"]:
+            elapsed, _ = self.time_import(name)
+            print(f"import utilities.{name}: {elapsed:.1f}ms")
+
+    def test_names_resolve_to_their_submodules(self):
+        for name in utilities.__all__:
+            with self.subTest(name=name):
+                self.assertEqual(getattr(utilities, name).__name__, name)
+
+        with self.assertRaises(AttributeError):
+            utilities.NotAUtility
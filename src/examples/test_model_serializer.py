@@ -0,0 +1,103 @@
+import json
+import os
+import time
+import unittest
+from datetime import datetime
+
+import pytz
+
+import lusid
+import lusid.models as models
+from examples import test_request_bodies
+from utilities import ModelSerializer, TestDataUtilities
+
+
+class ModelSerialization(unittest.TestCase):
+
+    @staticmethod
+    def transactions(count):
+        test_data_utilities = TestDataUtilities(None)
+        transactions = [
+            test_data_utilities.build_transaction_request(f"LUID_{row:08d}", 100.0 + row, 12.5, "GBP",
+                                                          "2021-03-01T00:00:00+00:00", "Buy")
+            for row in range(count)
+        ]
+        for transaction in transactions[::2]:
+            transaction.properties = {
+                "Transaction/Examples/Strategy": models.PerpetualProperty(
+                    key="Transaction/Examples/Strategy", value=models.PropertyValue(label_value="Growth"))
+            }
+        return transactions
+
+    @staticmethod
+    def orders(count):
+        configuration = lusid.Configuration()
+        portfolio = models.ResourceId(scope="Examples", code="Portfolio", local_vars_configuration=configuration)
+        return models.OrderSetRequest(order_requests=[
+            models.OrderRequest(
+                properties={
+                    "Order/Examples/TIF": models.PerpetualProperty(
+                        key="Order/Examples/TIF", value=models.PropertyValue(label_value="GTC"),
+                        local_vars_configuration=configuration)
+                },
+                instrument_identifiers={TestDataUtilities.lusid_figi_identifier: f"BBG{row:09d}"},
+                quantity=100 + row,
+                side="Buy",
+                portfolio_id=portfolio,
+                id=models.ResourceId(scope="Examples", code=f"Order-{row}", local_vars_configuration=configuration),
+                date=datetime(2021, 3, 1, 9, 30, tzinfo=pytz.utc),
+                local_vars_configuration=configuration)
+            for row in range(count)
+        ], local_vars_configuration=configuration)
+
+    @staticmethod
+    def best_time(function, body, repeat=3):
+        timings = []
+        for _ in range(repeat):
+            start = time.process_time()
+            function(body)
+            timings.append(time.process_time() - start)
+        return min(timings)
+
+    @classmethod
+    def bodies(cls, count):
+        return {
+            "transactions": cls.transactions(count),
+            "quotes": test_request_bodies.RequestBodies.quotes(count),
+            "orders": cls.orders(count),
+        }
+
+    def test_compiled_plans_match_the_api_client(self):
+        api_client = lusid.ApiClient()
+
+        for name, body in self.bodies(200).items():
+            with self.subTest(name=name):
+                expected = json.dumps(api_client.sanitize_for_serialization(body)).encode("utf-8")
+                self.assertEqual(json.dumps(ModelSerializer.sanitize(body)).encode("utf-8"), expected)
+
+    @unittest.skipUnless(os.getenv("FBN_RUN_BENCHMARKS"), "benchmarks only run when FBN_RUN_BENCHMARKS is set")
+    def test_benchmark_against_the_api_client(self):
+        api_client = lusid.ApiClient()
+
+        # The timings are only reported, they vary too much between machines to assert on
+        for name, body in self.bodies(5000).items():
+            default = self.best_time(api_client.sanitize_for_serialization, body)
+            compiled = self.best_time(ModelSerializer.sanitize, body)
+            print(f"5000 {name}: {default * 1000:.1f}ms by the api client, {compiled * 1000:.1f}ms compiled, "
+                  f"{default / compiled:.1f}x faster")
+
+    def test_installed_serializer_is_used_by_the_api_client(self):
+        api_client = lusid.ApiClient()
+        ModelSerializer.install(api_client)
+        body = (self.orders(2), [None, 1.5, True], {"nested": {"date": datetime(2021, 3, 1).date()}})
+
+        self.assertEqual(api_client.sanitize_for_serialization(body),
+                         lusid.ApiClient().sanitize_for_serialization(body))
+
+    def test_unknown_objects_are_rejected(self):
+        with self.assertRaises(TypeError):
+            ModelSerializer.sanitize([object()])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from utilities import ParallelTestRunner
+
+
+class ParallelTestRunnerTests(unittest.TestCase):
+
+    durations = {"tests.A": 40.0, "tests.B": 30.0, "tests.C": 20.0, "tests.D": 10.0, "tests.E": 10.0}
+
+    @staticmethod
+    def worker_report(worker, classes):
+        return {"worker": worker, "elapsed": 1.0, "log": f"worker-{worker}.log", "classes": classes}
+
+    @staticmethod
+    def class_result(tests, failures=(), errors=(), skipped=()):
+        return {"duration": 1.0, "tests": tests, "failures": list(failures), "errors": list(errors),
+                "skipped": list(skipped)}
+
+    def test_shards_are_balanced_by_duration(self):
+        runner = ParallelTestRunner("tutorials", workers=2)
+
+        shards = runner.shard(sorted(self.durations), self.durations)
+
+        self.assertEqual(shards, [["tests.A", "tests.D", "tests.E"], ["tests.B", "tests.C"]])
+        self.assertEqual([sum(self.durations[class_id] for class_id in shard) for shard in shards], [60.0, 50.0])
+
+    def test_classes_without_durations_are_given_the_median(self):
+        runner = ParallelTestRunner("tutorials", workers=2)
+
+        # The new class is expected to take the median of 20 seconds, so it joins the shard of the shortest classes
+        shards = runner.shard(["tests.A", "tests.B", "tests.D", "tests.New"],
+                              {"tests.A": 50.0, "tests.B": 20.0, "tests.D": 10.0})
+
+        self.assertEqual(shards, [["tests.A"], ["tests.B", "tests.New", "tests.D"]])
+
+    def test_empty_shards_are_dropped(self):
+        runner = ParallelTestRunner("tutorials", workers=8)
+
+        shards = runner.shard(["tests.A", "tests.B"], {})
+
+        self.assertEqual(shards, [["tests.A"], ["tests.B"]])
+
+    def test_reports_of_the_workers_are_merged(self):
+        reports = [
+            self.worker_report(0, {"tests.A": self.class_result(3, failures=[["tests.A.test_one", "trace"]]),
+                                   "tests.D": self.class_result(1, skipped=[["tests.D.test_one", "reason"]])}),
+            self.worker_report(1, {"tests.B": self.class_result(2, errors=[["tests.B.test_two", "trace"]])}),
+        ]
+
+        merged = ParallelTestRunner.merge(reports, elapsed=2.5)
+
+        self.assertEqual(merged["elapsed"], 2.5)
+        self.assertEqual(merged["tests"], 6)
+        self.assertEqual(merged["failures"], [["tests.A.test_one", "trace"]])
+        self.assertEqual(merged["errors"], [["tests.B.test_two", "trace"]])
+        self.assertEqual(merged["skipped"], 1)
+        self.assertEqual([worker["classes"] for worker in merged["workers"]], [["tests.A", "tests.D"], ["tests.B"]])
+        self.assertEqual(sorted(merged["classes"]), ["tests.A", "tests.B", "tests.D"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+
+import pyarrow as pa
+import pytz
+
+import lusid
+from utilities import QuotePublisher
+
+
+class FakeQuotesApi:
+    """
+    Stands in for the quotes api, saving every quote it is sent
+    """
+
+    def __init__(self):
+        self.api_client = lusid.ApiClient()
+        self.requests = []
+
+    def upsert_quotes(self, scope, request_body):
+        self.requests.append(request_body)
+        return SimpleNamespace(failed={})
+
+
+class QuotePublisherTests(unittest.TestCase):
+
+    effective_at = datetime(2019, 4, 15, 16, 30, tzinfo=pytz.utc)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.quotes_api = FakeQuotesApi()
+        self.publisher = QuotePublisher(self.quotes_api, os.path.join(directory.name, "published.db"), max_workers=1)
+        self.addCleanup(self.publisher.close)
+
+    def prices(self, instrument_ids, values):
+        return pa.table({
+            "instrument_id": instrument_ids,
+            "effective_at": [self.effective_at] * len(instrument_ids),
+            "value": values,
+            "unit": ["USD"] * len(instrument_ids),
+        })
+
+    def sent_values(self):
+        return [quote["metricValue"]["value"] for quote in self.quotes_api.requests[-1].values()]
+
+    def test_only_changed_quotes_are_sent(self):
+        self.assertEqual(self.publisher.publish("prices", self.prices(["A", "B"], [1.0, 2.0])).sent, 2)
+
+        second = self.publisher.publish("prices", self.prices(["A", "B"], [1.0, 2.5]))
+
+        self.assertEqual((second.sent, second.unchanged), (1, 1))
+        self.assertEqual(self.sent_values(), [2.5])
+
+    def test_only_the_last_of_duplicate_quotes_is_published(self):
+        first = self.publisher.publish("prices", self.prices(["A", "B", "A"], [1.0, 5.0, 2.0]))
+
+        self.assertEqual((first.sent, first.unchanged), (2, 1))
+        self.assertEqual(sorted(self.sent_values()), [2.0, 5.0])
+
+        # The copy held in memory agrees with the database, so the last value is not sent again
+        published = self.publisher.published("prices")
+        self.assertEqual(published.num_rows, 2)
+        self.assertEqual(self.publisher.publish("prices", self.prices(["A"], [2.0])).sent, 0)
+        self.assertEqual(len(self.quotes_api.requests), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import threading
+import unittest
+from types import SimpleNamespace
+
+import lusid
+import lusid.models as models
+from lusid import ApiException
+from utilities import RecipeManager
+
+
+class FakeRecipesApi:
+    """
+    Stands in for the configuration recipe api, storing the recipes upserted with the defaults LUSID fills in
+    """
+
+    def __init__(self, barrier=None):
+        self.api_client = lusid.ApiClient()
+        self.recipes = {}
+        self.gets = 0
+        self.upserts = 0
+        self.barrier = barrier
+        self._lock = threading.Lock()
+
+    def store(self, recipe):
+        options = models.MarketOptions(default_supplier="Lusid", default_instrument_code_type="LusidInstrumentId",
+                                       default_scope="default")
+        stored = models.ConfigurationRecipe(scope=recipe.scope, code=recipe.code, description=recipe.description,
+                                            market=models.MarketContext(options=options))
+        self.recipes[(recipe.scope, recipe.code)] = stored
+
+    def get_configuration_recipe(self, scope, code):
+        with self._lock:
+            self.gets += 1
+        if (scope, code) not in self.recipes:
+            raise ApiException(status=404)
+        return SimpleNamespace(value=self.recipes[(scope, code)])
+
+    def upsert_configuration_recipe(self, upsert_recipe_request):
+        if self.barrier is not None:
+            # Upserts of different recipes must be able to run at the same time
+            self.barrier.wait()
+        with self._lock:
+            self.upserts += 1
+            self.store(upsert_recipe_request.configuration_recipe)
+
+
+class RecipeManagerTests(unittest.TestCase):
+
+    @staticmethod
+    def recipe(code, description="Simple quotes"):
+        return models.ConfigurationRecipe(scope="recipes", code=code, description=description)
+
+    def test_recipe_already_in_lusid_with_defaults_is_not_upserted(self):
+        recipes_api = FakeRecipesApi()
+        recipes_api.store(self.recipe("Simple"))
+        recipe_manager = RecipeManager(recipes_api)
+
+        self.assertFalse(recipe_manager.upsert(self.recipe("Simple")))
+        self.assertFalse(recipe_manager.upsert(self.recipe("Simple")))
+        self.assertEqual((recipes_api.gets, recipes_api.upserts), (1, 0))
+
+    def test_changed_recipe_is_upserted(self):
+        recipes_api = FakeRecipesApi()
+        recipes_api.store(self.recipe("Simple"))
+        recipe_manager = RecipeManager(recipes_api)
+
+        self.assertTrue(recipe_manager.upsert(self.recipe("Simple", description="Changed")))
+        self.assertTrue(recipe_manager.upsert(self.recipe("Other")))
+        self.assertEqual(recipes_api.upserts, 2)
+
+    def test_different_recipes_are_upserted_concurrently(self):
+        recipes_api = FakeRecipesApi(barrier=threading.Barrier(2, timeout=5))
+        recipe_manager = RecipeManager(recipes_api, check_lusid=False)
+
+        errors = []
+
+        def upsert(code):
+            try:
+                recipe_manager.upsert(self.recipe(code))
+            except Exception as ex:
+                errors.append(ex)
+
+        threads = [threading.Thread(target=upsert, args=(code,)) for code in ("First", "Second")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(recipes_api.upserts, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
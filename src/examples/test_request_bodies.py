@@ -0,0 +1,140 @@
+import gzip
+import json
+import os
+import time
+import unittest
+
+import urllib3
+
+import lusid
+import lusid.models as models
+from utilities import OtcInstrumentFactory, RequestBodyEncoder, RetryPolicy
+
+
+class StandInPoolManager:
+    """
+    Stands in for the connection pool of an api client, answering each request with the next of a list of responses
+    and recording the requests sent
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def request(self, method, url, body=None, headers=None, **kwargs):
+        self.requests.append((method, url, body, headers))
+        status, data = self.responses.pop(0)
+        return urllib3.HTTPResponse(body=json.dumps(data).encode("utf-8"), status=status,
+                                    headers={"Content-Type": "application/json"}, preload_content=True)
+
+
+class RequestBodies(unittest.TestCase):
+
+    @staticmethod
+    def quotes(count):
+        configuration = lusid.Configuration()
+        return {
+            str(row): models.UpsertQuoteRequest(
+                quote_id=models.QuoteId(
+                    quote_series_id=models.QuoteSeriesId(provider="Lusid", instrument_id=f"BBG{row:09d}",
+                                                         instrument_id_type="Figi", quote_type="Price", field="mid",
+                                                         local_vars_configuration=configuration),
+                    effective_at="2021-03-01T00:00:00+00:00",
+                    local_vars_configuration=configuration),
+                metric_value=models.MetricValue(value=100 + row / 1000, unit="GBP",
+                                                local_vars_configuration=configuration),
+                local_vars_configuration=configuration)
+            for row in range(count)
+        }
+
+    def test_prepared_bodies_save_bytes_and_serialisation(self):
+        api_client = lusid.ApiClient()
+        body = self.quotes(2000)
+        data = json.dumps(api_client.sanitize_for_serialization(body)).encode("utf-8")
+
+        # A prepared body is serialised and compressed once, whatever the number of attempts
+        encoder = RequestBodyEncoder(api_client, compress=True)
+        prepared = encoder.prepare(body)
+
+        self.assertEqual(gzip.decompress(prepared), data)
+        self.assertEqual(prepared.size, len(data))
+        self.assertLess(len(prepared), len(data) / 4)
+        self.assertEqual((encoder.bodies, encoder.raw_bytes, encoder.encoded_bytes), (1, len(data), len(prepared)))
+
+    @unittest.skipUnless(os.getenv("FBN_RUN_BENCHMARKS"), "benchmarks only run when FBN_RUN_BENCHMARKS is set")
+    def test_benchmark_prepared_bodies(self):
+        api_client = lusid.ApiClient()
+        body = self.quotes(2000)
+        attempts = 3
+
+        # The client serialises the models again on every attempt of a request
+        start = time.process_time()
+        for _ in range(attempts):
+            data = json.dumps(api_client.sanitize_for_serialization(body)).encode("utf-8")
+        resent = time.process_time() - start
+
+        encoder = RequestBodyEncoder(api_client, compress=True)
+        start = time.process_time()
+        prepared = encoder.prepare(body)
+        once = time.process_time() - start
+
+        # The timings are only reported, they vary too much between machines to assert on
+        print(f"{attempts} attempts of 2000 quotes: {len(data) * attempts} bytes in {resent * 1000:.1f}ms "
+              f"re-serialised, {len(prepared) * attempts} bytes in {once * 1000:.1f}ms prepared once")
+        print(encoder)
+
+    def test_small_bodies_are_not_compressed(self):
+        encoder = RequestBodyEncoder(lusid.ApiClient(), compress=True, min_size=1024)
+        prepared = encoder.prepare(self.quotes(1))
+
+        self.assertIsNone(prepared.encoding)
+        self.assertEqual(json.loads(prepared), lusid.ApiClient().sanitize_for_serialization(self.quotes(1)))
+
+    def test_retries_send_the_same_buffer(self):
+        api_client = lusid.ApiClient()
+        pool_manager = StandInPoolManager((503, {}), (200, {"values": {}, "failed": {}}))
+        api_client.rest_client.pool_manager = pool_manager
+        recorded = []
+        encoder = RequestBodyEncoder.install(api_client, compress=True,
+                                             recorder=lambda *request: recorded.append(request))
+
+        prepared = encoder.prepare(self.quotes(100))
+        response = RetryPolicy(max_attempts=2, sleep=lambda delay: None).call(
+            lusid.QuotesApi(api_client).upsert_quotes, scope="prices", request_body=prepared)
+
+        self.assertEqual(response.failed, {})
+        self.assertEqual(len(pool_manager.requests), 2)
+        self.assertIs(RequestBodyEncoder.of(api_client), encoder)
+        for (method, url, body, headers), (_, recorded_url, recorded_body) in zip(pool_manager.requests, recorded):
+            self.assertEqual(method, "POST")
+            self.assertEqual(url, recorded_url)
+            self.assertEqual(body, prepared)
+            self.assertIs(recorded_body, prepared)
+            self.assertEqual(headers["Content-Encoding"], "gzip")
+            self.assertEqual(headers["Content-Type"], "application/json")
+
+    def test_instrument_chunks_are_prepared_once(self):
+        api_client = lusid.ApiClient()
+        pool_manager = StandInPoolManager((503, {}), (201, {"values": {}, "failed": {}}),
+                                          (200, {"values": {}, "failed": {}}))
+        api_client.rest_client.pool_manager = pool_manager
+        encoder = RequestBodyEncoder.install(api_client)
+
+        factory = OtcInstrumentFactory(lusid.InstrumentsApi(api_client),
+                                       retry_policy=RetryPolicy(max_attempts=2, sleep=lambda delay: None))
+        definitions = {
+            f"otc-{row}": models.InstrumentDefinition(
+                name=f"Instrument {row}", identifiers={"ClientInternal": models.InstrumentIdValue(value=f"otc-{row}")})
+            for row in range(10)
+        }
+        result, _ = factory.upsert(definitions)
+
+        self.assertEqual(result.failed_chunks, [])
+        (_, upsert_url, first, _), (_, retry_url, second, _) = pool_manager.requests[:2]
+        self.assertEqual(upsert_url, retry_url)
+        self.assertEqual(first, second)
+        self.assertEqual(encoder.bodies, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+from lusid import ApiException
+from utilities import BatchRunner, RetryPolicy
+
+
+class FailingCall:
+    """
+    Stands in for a call to LUSID, failing with each of a list of errors in turn before succeeding
+    """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.attempts = 0
+
+    def __call__(self, value):
+        self.attempts += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return value
+
+
+class RetryPolicyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.delays = []
+        self.retry_policy = RetryPolicy(max_attempts=3, base_delay=0.5, sleep=self.delays.append)
+
+    def test_transient_errors_are_retried(self):
+        call = FailingCall(ApiException(status=503), ConnectionError())
+
+        self.assertEqual(self.retry_policy.call(call, "saved"), "saved")
+        self.assertEqual(call.attempts, 3)
+        self.assertEqual(len(self.delays), 2)
+        # Full jitter up to an exponentially growing bound
+        self.assertTrue(0 <= self.delays[0] <= 0.5 and 0 <= self.delays[1] <= 1.0)
+
+    def test_client_errors_are_raised_at_once(self):
+        call = FailingCall(ApiException(status=400))
+
+        with self.assertRaises(ApiException) as raised:
+            self.retry_policy.call(call, "saved")
+        self.assertEqual(raised.exception.status, 400)
+        self.assertEqual(call.attempts, 1)
+        self.assertEqual(self.delays, [])
+
+    def test_retry_after_is_honoured(self):
+        throttled = ApiException(status=429)
+        throttled.headers = {"Retry-After": "7"}
+        call = FailingCall(throttled)
+
+        self.assertEqual(self.retry_policy.call(call, "saved"), "saved")
+        self.assertEqual(self.delays, [7.0])
+
+    def test_max_attempts_are_respected(self):
+        call = FailingCall(*(ApiException(status=503) for _ in range(5)))
+
+        with self.assertRaises(ApiException):
+            self.retry_policy.call(call, "saved")
+        self.assertEqual(call.attempts, 3)
+        self.assertEqual(len(self.delays), 2)
+
+    def test_only_failed_chunks_are_sent_again(self):
+        calls = {chunk: FailingCall(*errors) for chunk, errors in
+                 ((0, [ApiException(status=503)]), (1, []), (2, [TimeoutError()]))}
+
+        def process_chunk(chunk):
+            calls[chunk[0]](chunk)
+            return []
+
+        result = BatchRunner(max_workers=2, retry_policy=self.retry_policy).run(process_chunk, [[0], [1], [2]])
+
+        self.assertEqual(result.succeeded, 3)
+        self.assertEqual(result.failed_chunks, [])
+        self.assertEqual([call.attempts for call in calls.values()], [2, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
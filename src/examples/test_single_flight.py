@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import urllib3
+
+import lusid
+from utilities import SingleFlight
+
+
+class SlowPoolManager:
+    """
+    Stands in for the connection pool of an api client, answering every request after a delay with the same body
+    and counting the requests sent
+    """
+
+    def __init__(self, data, delay=0.2, status=200):
+        self.data = json.dumps(data).encode("utf-8")
+        self.delay = delay
+        self.status = status
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def request(self, method, url, body=None, **kwargs):
+        with self._lock:
+            self.requests.append((method, url, body))
+        time.sleep(self.delay)
+        return urllib3.HTTPResponse(body=self.data, status=self.status, headers={"Content-Type": "application/json"},
+                                    preload_content=True)
+
+
+class SingleFlightRequests(unittest.TestCase):
+
+    @staticmethod
+    def api_client(data, status=200):
+        api_client = lusid.ApiClient()
+        api_client.rest_client.pool_manager = SlowPoolManager(data, status=status)
+        SingleFlight.install(api_client)
+        return api_client
+
+    def test_identical_reads_are_sent_once(self):
+        api_client = self.api_client({"values": []})
+        instruments_api = lusid.InstrumentsApi(api_client)
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            responses = list(executor.map(lambda _: instruments_api.get_instrument_identifier_types(), range(10)))
+
+        single_flight = SingleFlight.of(api_client)
+        self.assertEqual(len(api_client.rest_client.pool_manager.requests), 1)
+        self.assertEqual((single_flight.calls, single_flight.merged), (10, 9))
+        # Each caller is given its own models
+        self.assertEqual(len({id(response) for response in responses}), 10)
+
+    def test_queries_with_different_bodies_are_sent_separately(self):
+        api_client = self.api_client({"values": {}, "failed": {}})
+        instruments_api = lusid.InstrumentsApi(api_client)
+        bodies = [["BBG000B9XRY4"], ["BBG000B9XRY4"], ["BBG000BPH459"]]
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(lambda body: instruments_api.get_instruments(identifier_type="Figi",
+                                                                           request_body=body), bodies))
+
+        self.assertEqual(len(api_client.rest_client.pool_manager.requests), 2)
+        self.assertEqual(SingleFlight.of(api_client).merged, 1)
+
+    def test_each_caller_raises_its_own_error(self):
+        api_client = self.api_client({"code": 500}, status=500)
+        instruments_api = lusid.InstrumentsApi(api_client)
+
+        def read(_):
+            try:
+                instruments_api.get_instrument_identifier_types()
+            except lusid.ApiException as ex:
+                return ex
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            errors = list(executor.map(read, range(3)))
+
+        self.assertEqual(len(api_client.rest_client.pool_manager.requests), 1)
+        self.assertEqual([error.status for error in errors], [500, 500, 500])
+        self.assertEqual(len({id(error) for error in errors}), 3)
+
+    def test_writes_are_never_merged(self):
+        api_client = self.api_client({"values": {}, "failed": {}})
+        quotes_api = lusid.QuotesApi(api_client)
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(lambda _: quotes_api.upsert_quotes(scope="prices", request_body={}), range(3)))
+
+        self.assertEqual(len(api_client.rest_client.pool_manager.requests), 3)
+        self.assertEqual(SingleFlight.of(api_client).calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
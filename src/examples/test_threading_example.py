@@ -1,6 +1,6 @@
 import lusid
 import time
-from utilities import TestDataUtilities
+from utilities import SingleFlight, TestDataUtilities
 import unittest
 import logging
 
@@ -133,6 +133,11 @@ class AsyncExamples(unittest.TestCase):
         while not all((result.ready() for result in results)):
             pass
         logger.info("all responses in")
+        # when FBN_SINGLE_FLIGHT is set, identical requests in flight at the same time are only sent once by
+        # the shared api client and the others share its response
+        single_flight = SingleFlight.of(TestDataUtilities.api_client())
+        if single_flight is not None:
+            logger.info(single_flight)
         # now iterate through response for result in results:
         return (result.get() for result in results)
 
@@ -0,0 +1,108 @@
+import os
+import stat
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from lusid.utilities import ApiConfiguration
+from utilities import TokenCache
+from utilities.token_cache import SharedRefreshingToken
+
+
+class FakeIdentityProvider:
+    """
+    Stands in for the identity provider, issuing numbered tokens which last for a given number of seconds
+    """
+
+    def __init__(self, expires_in):
+        self.expires_in = expires_in
+        self.calls = 0
+
+    def get_access_token(self, token):
+        self.calls += 1
+        token.update_token_data({
+            "access_token": f"token{self.calls}",
+            "refresh_token": None,
+            "expires_in": self.expires_in,
+        })
+        return token.token_data["access_token"]
+
+
+class TokenCacheTests(unittest.TestCase):
+
+    api_configuration = ApiConfiguration(token_url="https://identity.example.com/oauth2/token", username="user",
+                                         password="password", client_id="client", client_secret="secret")
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name, "tokens.json")
+
+        self.now = time.time()
+        patch = mock.patch("utilities.token_cache.time", SimpleNamespace(time=lambda: self.now, sleep=time.sleep))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def install(self, identity_provider):
+        patch = mock.patch.object(SharedRefreshingToken, "get_access_token", autospec=True,
+                                  side_effect=identity_provider.get_access_token)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def token(self):
+        # A cache of its own, as each process would have
+        return TokenCache(self.path).token(self.api_configuration)
+
+    def test_tokens_are_requested_once_for_every_process(self):
+        identity_provider = FakeIdentityProvider(expires_in=3600)
+        self.install(identity_provider)
+
+        first, second = self.token(), self.token()
+
+        self.assertEqual(first.data, "token1")
+        self.assertEqual(second.data, "token1")
+        self.assertEqual(first.data, "token1")
+        self.assertEqual(identity_provider.calls, 1)
+
+    def test_short_lived_tokens_are_used_before_being_refreshed(self):
+        # Lasting less than the default refresh window of 60 + 300 seconds
+        identity_provider = FakeIdentityProvider(expires_in=300)
+        self.install(identity_provider)
+        token = self.token()
+
+        self.assertEqual(token.data, "token1")
+        self.now += 60
+        self.assertEqual(token.data, "token1")
+        self.assertEqual(identity_provider.calls, 1)
+
+        # Refreshed once half of the token's lifetime is left
+        self.now += 90
+        self.assertEqual(token.data, "token2")
+        self.assertEqual(identity_provider.calls, 2)
+
+    def test_tokens_are_refreshed_after_expiry(self):
+        identity_provider = FakeIdentityProvider(expires_in=3600)
+        self.install(identity_provider)
+        first, second = self.token(), self.token()
+
+        self.assertEqual(first.data, "token1")
+        self.now += 3600
+        self.assertEqual(second.data, "token2")
+        self.assertEqual(first.data, "token2")
+        self.assertEqual(identity_provider.calls, 2)
+
+    @unittest.skipIf(os.name == "nt", "file modes are not enforced on Windows")
+    def test_cache_file_is_readable_by_its_owner_only(self):
+        self.install(FakeIdentityProvider(expires_in=3600))
+
+        self.token().data
+
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+        self.assertEqual(stat.S_IMODE(os.stat(f"{self.path}.lock").st_mode), 0o600)
+
+
+if __name__ == "__main__":
+    unittest.main()
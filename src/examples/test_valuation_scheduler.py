@@ -0,0 +1,82 @@
+import threading
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytz
+
+import lusid.models as models
+from utilities import ValuationScheduler
+
+
+class FakeAggregationApi:
+    """
+    Stands in for the aggregation api, returning one row per portfolio and instrument holding only the requested
+    metrics, as LUSID does
+    """
+
+    instruments = ("Equity A", "Equity B")
+
+    def __init__(self):
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def get_valuation(self, valuation_request):
+        with self._lock:
+            self.requests.append(valuation_request)
+
+        data = []
+        for portfolio in valuation_request.portfolio_entity_ids:
+            for position, instrument in enumerate(self.instruments):
+                values = {
+                    "Portfolio/default/Code": portfolio.code,
+                    "Instrument/default/Name": instrument,
+                    # The value depends on the scope too, so rows matched to the wrong portfolio are caught
+                    "Valuation/PV": 100.0 * (position + 1) + (1000.0 if portfolio.scope == "second" else 0.0),
+                }
+                data.append({metric.key if metric.op == "Value" else f"{metric.op}({metric.key})": values[metric.key]
+                             for metric in valuation_request.metrics})
+        return SimpleNamespace(data=data)
+
+
+class ValuationSchedulerTests(unittest.TestCase):
+
+    portfolios = [("first", "Growth"), ("first", "Income"), ("second", "Growth")]
+    dates = [datetime(2021, 3, 1, tzinfo=pytz.utc), datetime(2021, 3, 2, tzinfo=pytz.utc)]
+    metrics = [models.AggregateSpec("Instrument/default/Name", "Value"), models.AggregateSpec("Valuation/PV", "Sum")]
+    group_by = ["Instrument/default/Name"]
+
+    def run_scheduler(self, portfolios_per_request):
+        aggregation_api = FakeAggregationApi()
+        scheduler = ValuationScheduler(aggregation_api, requests_per_second=1000,
+                                       portfolios_per_request=portfolios_per_request)
+        cube = scheduler.run(self.portfolios, self.dates, models.ResourceId(scope="recipes", code="Simple"),
+                             self.metrics, self.group_by)
+        return aggregation_api, cube
+
+    def test_packed_requests_split_rows_by_portfolio(self):
+        aggregation_api, cube = self.run_scheduler(portfolios_per_request=2)
+
+        # Two dates of one request for the 'first' scope and one for the 'second'
+        self.assertEqual(len(aggregation_api.requests), 4)
+        for request in aggregation_api.requests:
+            self.assertIn("Portfolio/default/Code", request.group_by)
+            self.assertIn("Portfolio/default/Code", [metric.key for metric in request.metrics])
+
+        self.assertEqual(len(cube), 12)
+        self.assertNotIn("Portfolio/default/Code", cube.metrics)
+        for scope, code in self.portfolios:
+            valuation = cube.select(date=self.dates[0], portfolio=f"{scope}/{code}")
+            offset = 1000.0 if scope == "second" else 0.0
+            self.assertEqual(sorted(valuation.metrics["Sum(Valuation/PV)"]), [100.0 + offset, 200.0 + offset])
+
+    def test_packed_requests_match_one_request_per_portfolio(self):
+        _, packed = self.run_scheduler(portfolios_per_request=3)
+        _, single = self.run_scheduler(portfolios_per_request=1)
+
+        self.assertEqual(sorted(zip(packed.portfolios, packed.group_keys, packed.metrics["Sum(Valuation/PV)"])),
+                         sorted(zip(single.portfolios, single.group_keys, single.metrics["Sum(Valuation/PV)"])))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 from datetime import datetime
 from time import sleep
@@ -6,7 +8,7 @@ import pytz
 from lusidfeature import lusid_feature
 
 import lusid
-from utilities import InstrumentLoader, IdGenerator
+from utilities import FixtureRegistry, IdGenerator, TransactionSync
 from utilities import TestDataUtilities
 from utilities.id_generator_utilities import delete_entities
 
@@ -21,9 +23,7 @@ class Bitemporal(unittest.TestCase):
         cls.transaction_portfolios_api = lusid.TransactionPortfoliosApi(api_client)
         cls.portfolios_api = lusid.PortfoliosApi(api_client)
 
-        instruments_api = lusid.InstrumentsApi(api_client)
-        instrument_loader = InstrumentLoader(instruments_api)
-        cls.instrument_ids = instrument_loader.load_instruments()
+        cls.instrument_ids = FixtureRegistry.session().instrument_ids()
 
         cls.test_data_utilities = TestDataUtilities(cls.transaction_portfolios_api)
         cls.id_generator = IdGenerator(scope=TestDataUtilities.tutorials_scope)
@@ -116,3 +116,48 @@ class Bitemporal(unittest.TestCase):
                                                                         code=portfolio_code)
 
         self.assertEqual(len(transactions.values), 5)
+
+    def test_incremental_transaction_sync(self):
+        portfolio_code = self.test_data_utilities.create_transaction_portfolio(TestDataUtilities.tutorials_scope)
+        self.id_generator.add_scope_and_code("portfolio", TestDataUtilities.tutorials_scope, portfolio_code)
+
+        def stock_in(instrument_index, day):
+            return self.test_data_utilities.build_transaction_request(
+                instrument_id=self.instrument_ids[instrument_index],
+                units=100,
+                price=100 + instrument_index,
+                currency="GBP",
+                trade_date=datetime(2018, 1, day, tzinfo=pytz.utc).isoformat(),
+                transaction_type="StockIn")
+
+        initial_transactions = [stock_in(0, 1), stock_in(1, 2), stock_in(2, 3)]
+        self.transaction_portfolios_api.upsert_transactions(scope=TestDataUtilities.tutorials_scope,
+                                                            code=portfolio_code,
+                                                            transaction_request=initial_transactions)
+
+        sync = TransactionSync(self.transaction_portfolios_api, os.path.join(tempfile.mkdtemp(), "replica.db"))
+        self.addCleanup(sync.close)
+
+        # the first sync loads the full history and records the watermark
+        self.assertEqual(sync.sync_portfolio(TestDataUtilities.tutorials_scope, portfolio_code), 3)
+        watermark = sync.watermark(TestDataUtilities.tutorials_scope, portfolio_code)
+        self.assertIsNotNone(watermark)
+        sleep(0.5)
+
+        # add a back dated trade and cancel one of the initial trades
+        self.transaction_portfolios_api.upsert_transactions(scope=TestDataUtilities.tutorials_scope,
+                                                            code=portfolio_code,
+                                                            transaction_request=[stock_in(3, 2)])
+        self.transaction_portfolios_api.cancel_transactions(scope=TestDataUtilities.tutorials_scope,
+                                                            code=portfolio_code,
+                                                            transaction_ids=[initial_transactions[0].transaction_id])
+
+        # the next sync only fetches the two changes
+        self.assertEqual(sync.sync_portfolio(TestDataUtilities.tutorials_scope, portfolio_code), 2)
+        self.assertGreater(sync.watermark(TestDataUtilities.tutorials_scope, portfolio_code), watermark)
+
+        replica = sync.transactions(TestDataUtilities.tutorials_scope, portfolio_code)
+        latest = self.transaction_portfolios_api.get_transactions(scope=TestDataUtilities.tutorials_scope,
+                                                                  code=portfolio_code)
+        self.assertEqual(sorted(row["transaction_id"] for row in replica),
+                         sorted(transaction.transaction_id for transaction in latest.values))
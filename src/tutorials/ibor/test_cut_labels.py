@@ -1,13 +1,14 @@
 import unittest
 import uuid
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 
+import numpy as np
 from lusidfeature import lusid_feature
 
 import lusid
 import lusid.models as models
 from lusid import ApiException
-from utilities import InstrumentLoader, IdGenerator
+from utilities import FixtureRegistry, IdGenerator, CutLabelService
 from utilities import TestDataUtilities
 from utilities.id_generator_utilities import delete_entities
 
@@ -24,8 +25,7 @@ class CutLabels(unittest.TestCase):
         cls.cut_labels = lusid.CutLabelDefinitionsApi(api_client)
         cls.portfolios_api = lusid.PortfoliosApi(api_client)
 
-        instrument_loader = InstrumentLoader(cls.instruments_api)
-        cls.instrument_ids = instrument_loader.load_instruments()
+        cls.instrument_ids = FixtureRegistry.session().instrument_ids()
 
         cls.test_data_utilities = TestDataUtilities(cls.transaction_portfolios_api)
 
@@ -236,3 +236,34 @@ class CutLabels(unittest.TestCase):
                                                       instrument_id=instrument3,
                                                       units=200.0,
                                                       cost_amount=19900.0)
+
+    def test_cut_labels_to_utc(self):
+        cut_label_service = CutLabelService(self.cut_labels)
+
+        suffix = str(uuid.uuid4())[:4]
+        definitions = [
+            models.CutLabelDefinition(code=f"LondonOpen-{suffix}", display_name="LondonOpen", description="",
+                                      cut_local_time=models.CutLocalTime(hours=9, minutes=0), time_zone="GB"),
+            models.CutLabelDefinition(code=f"NYClose-{suffix}", display_name="NYClose", description="",
+                                      cut_local_time=models.CutLocalTime(hours=17, minutes=0),
+                                      time_zone="America/New_York"),
+        ]
+        for definition in definitions:
+            self.id_generator.add_scope_and_code("cut_label", TestDataUtilities.tutorials_scope, definition.code)
+
+        # create both labels, a second call finds them in the cache and creates nothing
+        self.assertEqual(len(cut_label_service.create(definitions)), 2)
+        self.assertEqual(cut_label_service.create(definitions), [])
+
+        # dates either side of the UK and US daylight saving changes in March 2020
+        dates = np.array(["2020-03-06", "2020-03-09", "2020-03-27", "2020-03-30"], dtype="datetime64[D]")
+        london_open, ny_close = definitions[0].code, definitions[1].code
+
+        self.assertEqual(cut_label_service.to_utc(dates, london_open).tolist(), [
+            datetime(2020, 3, 6, 9), datetime(2020, 3, 9, 9), datetime(2020, 3, 27, 9), datetime(2020, 3, 30, 8)
+        ])
+        self.assertEqual(cut_label_service.to_utc(dates, ny_close).tolist(), [
+            datetime(2020, 3, 6, 22), datetime(2020, 3, 9, 21), datetime(2020, 3, 27, 21), datetime(2020, 3, 30, 21)
+        ])
+
+        self.assertEqual(cut_label_service.labels(dates[:1], london_open).tolist(), [f"2020-03-06N{london_open}"])
@@ -1,4 +1,6 @@
+import tempfile
 import unittest
+import uuid
 from datetime import datetime
 
 import pytz
@@ -6,7 +8,7 @@ from lusidfeature import lusid_feature
 
 import lusid
 import lusid.models as models
-from utilities import InstrumentLoader, IdGenerator
+from utilities import FixtureRegistry, IdGenerator, HoldingsExporter
 from utilities import TestDataUtilities
 from utilities.id_generator_utilities import delete_entities
 
@@ -26,8 +28,7 @@ class Holdings(unittest.TestCase):
         cls.test_data_utilities = TestDataUtilities(cls.transaction_portfolios_api)
         cls.id_generator = IdGenerator(scope=TestDataUtilities.tutorials_scope)
 
-        cls.instrument_loader = InstrumentLoader(cls.instruments_api)
-        cls.instrument_ids = cls.instrument_loader.load_instruments()
+        cls.instrument_ids = FixtureRegistry.session().instrument_ids()
 
     @classmethod
     def tearDownClass(cls):
@@ -221,5 +222,36 @@ class Holdings(unittest.TestCase):
         self.assertEqual(holdings.values[3].units, 100.0)
         self.assertEqual(holdings.values[3].cost.amount, 10300.0)
 
+    def test_export_holdings_snapshot(self):
+        currency = "GBP"
+        day_t1 = datetime(2018, 1, 1, tzinfo=pytz.utc).isoformat()
+
+        # Use a scope of our own so that the snapshot only holds the portfolios created here
+        scope = IdGenerator.namespaced(f"holdings-export-{uuid.uuid4().hex[:8]}")
+
+        for i in range(3):
+            portfolio_id = self.test_data_utilities.create_transaction_portfolio(scope)
+            self.id_generator.add_scope_and_code("portfolio", scope, portfolio_id)
+
+            transactions = [
+                self.test_data_utilities.build_cash_fundsin_transaction_request(100000, currency, day_t1),
+                self.test_data_utilities.build_transaction_request(self.instrument_ids[i], 100.0, 101.0, currency,
+                                                                   day_t1, "Buy"),
+            ]
+            self.transaction_portfolios_api.upsert_transactions(scope, code=portfolio_id,
+                                                                transaction_request=transactions)
+
+        exporter = HoldingsExporter(self.portfolios_api, self.transaction_portfolios_api, max_workers=3)
+
+        with tempfile.TemporaryDirectory() as path:
+            export = exporter.export(scope, path, effective_at=datetime(2018, 1, 10, tzinfo=pytz.utc))
+
+            self.assertEqual(export.result.succeeded, 3)
+            self.assertEqual(export.rows, 6)
 
+            # exporting again to the same directory finds the snapshot complete
+            self.assertEqual(exporter.export(scope, path).skipped, 3)
 
+            table = exporter.read(path)
+            self.assertEqual(table.num_rows, 6)
+            self.assertEqual(sorted(set(table.column("holding_type").to_pylist())), ["B", "P"])
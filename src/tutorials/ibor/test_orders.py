@@ -11,13 +11,14 @@ from lusid import OrderSetRequest
 from lusid import PerpetualProperty
 from lusid import PropertyValue
 from lusid import ResourceId
-from utilities import InstrumentLoader, IdGenerator
+from utilities import FixtureRegistry, IdGenerator, OrderLoader
 from utilities import TestDataUtilities
 from utilities.id_generator_utilities import delete_entities
 
 
 class Orders(unittest.TestCase):
-    tests_scope = {'simple-upsert': 'Orders-SimpleUpsert-TestScope'}
+    tests_scope = {'simple-upsert': IdGenerator.namespaced('Orders-SimpleUpsert-TestScope'),
+                   'bulk-upsert': IdGenerator.namespaced('Orders-BulkUpsert-TestScope')}
     test_codes = ['TIF', 'OrderBook', 'PortfolioManager', 'Account', 'Strategy']
 
     @staticmethod
@@ -51,9 +52,7 @@ class Orders(unittest.TestCase):
         cls.instruments_api = lusid.InstrumentsApi(api_client)
         cls.properties_api = lusid.PropertyDefinitionsApi(api_client)
 
-        instrument_loader = InstrumentLoader(cls.instruments_api)
-
-        cls.instrument_ids = instrument_loader.load_instruments()
+        cls.instrument_ids = FixtureRegistry.session().instrument_ids()
         cls.load_properties(
             properties_api=cls.properties_api,
             id_generator=cls.id_generator,
@@ -108,3 +107,40 @@ class Orders(unittest.TestCase):
         self.assertEqual(response['lusid_instrument_id'], self.instrument_ids[0])
         self.assertEqual(response['quantity'], 100)
         self.assertEqual(response['properties'][f"Order/{orders_scope}/TIF"]['key'], f"Order/{orders_scope}/TIF")
+
+    def test_upsert_orders_in_bulk(self):
+        """Loads a stream of orders in concurrent chunks."""
+
+        orders_scope = self.tests_scope['bulk-upsert']
+        order_loader = OrderLoader(self.orders_api, chunk_size=10, max_workers=4)
+
+        def order_stream(count):
+            for i in range(count):
+                _, _, order_id = self.id_generator.generate_scope_and_code("order", scope=orders_scope)
+                yield {
+                    "scope": orders_scope,
+                    "code": order_id,
+                    "instrument_identifiers": {
+                        TestDataUtilities.lusid_luid_identifier: self.instrument_ids[i % len(self.instrument_ids)]
+                    },
+                    "quantity": 100 + i,
+                    "side": "Buy",
+                    "portfolio_scope": orders_scope,
+                    "portfolio_code": "OrdersTestPortfolio",
+                    "state": "New",
+                    "type": "Limit",
+                    "date": "2022-07-05T10:15:30+00:00",
+                    # The same few property values repeat across the stream and are only built once
+                    "properties": {
+                        f"Order/{orders_scope}/TIF": "GTC",
+                        f"Order/{orders_scope}/OrderBook": "UK Test Orders",
+                        f"Order/{orders_scope}/Strategy": ["RiskArb", "Momentum"][i % 2]
+                    }
+                }
+
+        result = order_loader.upsert_orders(order_stream(50))
+
+        self.assertEqual(result.succeeded, 50)
+        self.assertEqual(result.rejected, [])
+        self.assertEqual(result.failed_chunks, [])
+        self.assertGreater(result.rate, 0)
@@ -9,8 +9,8 @@ import lusid.models as models
 from lusid.utilities.api_client_builder import ApiClientBuilder
 from utilities import IdGenerator
 from utilities.credentials_source import CredentialsSource
+from utilities.fixture_registry import FixtureRegistry
 from utilities.id_generator_utilities import delete_entities
-from utilities.instrument_loader import InstrumentLoader
 from utilities.test_data_utilities import TestDataUtilities
 
 
@@ -19,15 +19,14 @@ class Properties(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         # create a configured API client
-        api_client = ApiClientBuilder().build(CredentialsSource.secrets_path())
+        api_client = ApiClientBuilder().build(api_configuration=CredentialsSource.api_configuration())
 
         cls.property_definitions_api = lusid.PropertyDefinitionsApi(api_client)
         cls.transaction_portfolios_api = lusid.TransactionPortfoliosApi(api_client)
         cls.instruments_api = lusid.InstrumentsApi(api_client)
         cls.portfolios_api = lusid.PortfoliosApi(api_client)
 
-        instrument_loader = InstrumentLoader(cls.instruments_api)
-        cls.instrument_ids = instrument_loader.load_instruments()
+        cls.instrument_ids = FixtureRegistry.session().instrument_ids()
 
         cls.test_data_utilities = TestDataUtilities(cls.transaction_portfolios_api)
         cls.id_generator = IdGenerator(scope=TestDataUtilities.tutorials_scope)
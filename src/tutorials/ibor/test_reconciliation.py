@@ -6,7 +6,7 @@ from lusidfeature import lusid_feature
 
 import lusid
 import lusid.models as models
-from utilities import InstrumentLoader, IdGenerator
+from utilities import FixtureRegistry, IdGenerator
 from utilities import TestDataUtilities
 from utilities.id_generator_utilities import delete_entities
 
@@ -22,9 +22,7 @@ class Reconciliation(unittest.TestCase):
         cls.reconciliations_api = lusid.ReconciliationsApi(api_client)
         cls.portfolios_api = lusid.PortfoliosApi(api_client)
 
-        instruments_api = lusid.InstrumentsApi(api_client)
-        instrument_loader = InstrumentLoader(instruments_api)
-        cls.instrument_ids = instrument_loader.load_instruments()
+        cls.instrument_ids = FixtureRegistry.session().instrument_ids()
 
         cls.test_data_utilities = TestDataUtilities(cls.transaction_portfolios_api)
         cls.id_generator = IdGenerator(scope=TestDataUtilities.tutorials_scope)
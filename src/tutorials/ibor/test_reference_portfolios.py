@@ -7,8 +7,10 @@ from lusidfeature import lusid_feature
 import lusid
 import lusid.models as models
 from utilities import IdGenerator
-from utilities import InstrumentLoader
+from utilities import FixtureRegistry
 from utilities import TestDataUtilities
+from utilities import ReferencePortfolioSync
+from utilities import TrackingAnalytics
 from utilities.id_generator_utilities import delete_entities
 
 
@@ -24,10 +26,10 @@ class ReferencePortfolio(unittest.TestCase):
         cls.reference_portfolio_api = lusid.ReferencePortfolioApi(api_client)
         cls.portfolios_api = lusid.PortfoliosApi(api_client)
         cls.instruments_api = lusid.InstrumentsApi(api_client)
+        cls.transaction_portfolios_api = lusid.TransactionPortfoliosApi(api_client)
 
         # Load instruments
-        cls.instrument_loader = InstrumentLoader(cls.instruments_api)
-        cls.instrument_ids = cls.instrument_loader.load_instruments()
+        cls.instrument_ids = FixtureRegistry.session().instrument_ids()
 
         cls.id_generator = IdGenerator(scope=TestDataUtilities.tutorials_scope)
 
@@ -129,3 +131,84 @@ class ReferencePortfolio(unittest.TestCase):
                 constituent_holdings.constituents, constituent_weights
         ):
             self.assertEqual(constituent.weight, weight)
+
+    def test_sync_reference_portfolio_constituents(self):
+
+        effective_date = datetime(year=2021, month=3, day=29, tzinfo=pytz.UTC).isoformat()
+
+        _, _, portfolio_code = self.id_generator.generate_scope_and_code("portfolio")
+        self.reference_portfolio_api.create_reference_portfolio(
+            scope=TestDataUtilities.tutorials_scope,
+            create_reference_portfolio_request=models.CreateReferencePortfolioRequest(
+                display_name="Synced Reference Portfolio",
+                code=portfolio_code,
+                created=effective_date,
+            ),
+        )
+
+        reference_portfolio_sync = ReferencePortfolioSync(self.reference_portfolio_api)
+        target = dict(zip(self.instrument_ids, [10, 20, 30, 15, 25]))
+
+        # The first sync uploads every constituent
+        diff = reference_portfolio_sync.sync_portfolio(
+            TestDataUtilities.tutorials_scope, portfolio_code, target, effective_date
+        )
+        self.assertTrue(diff.uploaded)
+        self.assertEqual(len(diff.added), 5)
+
+        # The same weights as fractions of one are unchanged once normalised, so nothing is uploaded
+        result, diffs = reference_portfolio_sync.sync(
+            {(TestDataUtilities.tutorials_scope, portfolio_code): {
+                instrument_id: weight / 100 for instrument_id, weight in target.items()
+            }},
+            effective_date,
+        )
+        self.assertEqual(result.succeeded, 1)
+        self.assertFalse(diffs[(TestDataUtilities.tutorials_scope, portfolio_code)].uploaded)
+
+        # Moving weight between two constituents uploads the new weights
+        target[self.instrument_ids[0]], target[self.instrument_ids[1]] = 20, 10
+        diff = reference_portfolio_sync.sync_portfolio(
+            TestDataUtilities.tutorials_scope, portfolio_code, target, effective_date
+        )
+        self.assertTrue(diff.uploaded)
+        self.assertCountEqual(diff.changed, self.instrument_ids[:2])
+
+    def test_tracking_drift(self):
+
+        effective_date = datetime(year=2021, month=3, day=29, tzinfo=pytz.UTC).isoformat()
+
+        _, _, reference_code = self.id_generator.generate_scope_and_code("portfolio")
+        self.reference_portfolio_api.create_reference_portfolio(
+            scope=TestDataUtilities.tutorials_scope,
+            create_reference_portfolio_request=models.CreateReferencePortfolioRequest(
+                display_name="Tracked Reference Portfolio",
+                code=reference_code,
+                created=effective_date,
+            ),
+        )
+        ReferencePortfolioSync(self.reference_portfolio_api).sync_portfolio(
+            TestDataUtilities.tutorials_scope,
+            reference_code,
+            dict(zip(self.instrument_ids, [10, 20, 30, 15, 25])),
+            effective_date,
+        )
+
+        # The shared seeded portfolio, which holds the first three instruments, tracks the reference portfolio
+        seeded_portfolio = FixtureRegistry.session().seeded_portfolio()
+        tracking_analytics = TrackingAnalytics(self.reference_portfolio_api, self.transaction_portfolios_api)
+        result, frame = tracking_analytics.load(
+            {"seeded": ((TestDataUtilities.tutorials_scope, reference_code),
+                        (seeded_portfolio.scope, seeded_portfolio.code))},
+            effective_at=effective_date,
+        )
+        self.assertEqual(result.succeeded, 1)
+
+        # Every instrument of either side is aligned in one row, the weights of each side sum to one
+        self.assertEqual(len(frame), 5)
+        self.assertAlmostEqual(TrackingAnalytics.normalised(frame, "benchmark").sum(), 1)
+        self.assertAlmostEqual(TrackingAnalytics.normalised(frame, "portfolio").sum(), 1)
+
+        # The portfolio is overweight the three instruments it holds by the 40% weight of the two it does not
+        drift = TrackingAnalytics.drift(frame).to_rows()
+        self.assertAlmostEqual(drift[0]["active_share"], 0.4)
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 import uuid
 from datetime import datetime
@@ -7,8 +9,8 @@ from lusidfeature import lusid_feature
 
 import lusid
 import lusid.models as models
-from utilities import InstrumentLoader, IdGenerator
-from utilities import TestDataUtilities
+from utilities import FixtureRegistry, IdGenerator, TransactionCanceller, BatchRunner, RetryPolicy
+from utilities import RequestBodyEncoder, TestDataUtilities
 from utilities.id_generator_utilities import delete_entities
 
 
@@ -23,8 +25,7 @@ class Transactions(unittest.TestCase):
         cls.instruments_api = lusid.InstrumentsApi(api_client)
         cls.portfolios_api = lusid.PortfoliosApi(api_client)
 
-        instrument_loader = InstrumentLoader(cls.instruments_api)
-        cls.instrument_ids = instrument_loader.load_instruments()
+        cls.instrument_ids = FixtureRegistry.session().instrument_ids()
 
         cls.test_data_utilities = TestDataUtilities(cls.transaction_portfolios_api)
         cls.id_generator = IdGenerator(scope=TestDataUtilities.tutorials_scope)
@@ -113,38 +114,8 @@ class Transactions(unittest.TestCase):
 
     @lusid_feature("F13-6")
     def test_cancel_transactions(self):
-        # set effective date
-        effective_date = datetime(2018, 1, 1, tzinfo=pytz.utc).isoformat()
-
-        # create portfolio code
-        portfolio_code = self.test_data_utilities.create_transaction_portfolio(TestDataUtilities.tutorials_scope)
-        self.id_generator.add_scope_and_code("portfolio", TestDataUtilities.tutorials_scope, portfolio_code)
-
-        # Upsert transactions
-        transactions = [
-            self.test_data_utilities.build_transaction_request(instrument_id=self.instrument_ids[0],
-                                                               units=100,
-                                                               price=101,
-                                                               currency="GBP",
-                                                               trade_date=effective_date,
-                                                               transaction_type="StockIn"),
-            self.test_data_utilities.build_transaction_request(instrument_id=self.instrument_ids[1],
-                                                               units=100,
-                                                               price=102,
-                                                               currency="GBP",
-                                                               trade_date=effective_date,
-                                                               transaction_type="StockIn"),
-            self.test_data_utilities.build_transaction_request(instrument_id=self.instrument_ids[2],
-                                                               units=100,
-                                                               price=103,
-                                                               currency="GBP",
-                                                               trade_date=effective_date,
-                                                               transaction_type="StockIn")
-        ]
-
-        self.transaction_portfolios_api.upsert_transactions(scope=TestDataUtilities.tutorials_scope,
-                                                            code=portfolio_code,
-                                                            transaction_request=transactions)
+        # A copy of the shared seeded portfolio, which this test may modify
+        portfolio_code = FixtureRegistry.session().clone_portfolio(self.id_generator).code
 
         # get transactions
         transaction_ids = []
@@ -164,3 +135,101 @@ class Transactions(unittest.TestCase):
         new_transactions = self.transaction_portfolios_api.get_transactions(scope=TestDataUtilities.tutorials_scope,
                                                                             code=portfolio_code)
         self.assertEqual(len(new_transactions.values), 0)
+
+    def test_cancel_transactions_in_bulk(self):
+        effective_date = datetime(2018, 1, 1, tzinfo=pytz.utc).isoformat()
+
+        portfolio_code = self.test_data_utilities.create_transaction_portfolio(TestDataUtilities.tutorials_scope)
+        self.id_generator.add_scope_and_code("portfolio", TestDataUtilities.tutorials_scope, portfolio_code)
+
+        transactions = [
+            self.test_data_utilities.build_transaction_request(instrument_id=self.instrument_ids[i % 3],
+                                                               units=100,
+                                                               price=100 + i,
+                                                               currency="GBP",
+                                                               trade_date=effective_date,
+                                                               transaction_type="StockIn" if i % 2 else "Buy")
+            for i in range(25)
+        ]
+
+        self.transaction_portfolios_api.upsert_transactions(scope=TestDataUtilities.tutorials_scope,
+                                                            code=portfolio_code,
+                                                            transaction_request=transactions)
+
+        # cancel only the StockIn transactions, listed in pages and cancelled in concurrent chunks
+        canceller = TransactionCanceller(self.transaction_portfolios_api, chunk_size=5, page_size=10)
+        checkpoint_path = os.path.join(tempfile.mkdtemp(), "cancel.checkpoint")
+
+        result = canceller.cancel(scope=TestDataUtilities.tutorials_scope,
+                                  code=portfolio_code,
+                                  filter="type eq 'StockIn'",
+                                  checkpoint_path=checkpoint_path)
+
+        self.assertEqual(result.succeeded, 12)
+        self.assertEqual(result.failed_chunks, [])
+        self.assertFalse(os.path.exists(checkpoint_path))
+
+        # verify only the Buy transactions remain
+        remaining = self.transaction_portfolios_api.get_transactions(scope=TestDataUtilities.tutorials_scope,
+                                                                     code=portfolio_code)
+        self.assertEqual(len(remaining.values), 13)
+        self.assertTrue(all(transaction.type == "Buy" for transaction in remaining.values))
+
+    def test_load_transactions_idempotently(self):
+        effective_date = datetime(2018, 1, 1, tzinfo=pytz.utc).isoformat()
+
+        portfolio_code = self.test_data_utilities.create_transaction_portfolio(TestDataUtilities.tutorials_scope)
+        self.id_generator.add_scope_and_code("portfolio", TestDataUtilities.tutorials_scope, portfolio_code)
+
+        # the transaction ids are derived from the business key of each trade, here its reference in the source
+        deterministic_utilities = TestDataUtilities(self.transaction_portfolios_api, deterministic_ids=True)
+        transactions = [
+            deterministic_utilities.build_transaction_request(instrument_id=self.instrument_ids[i % 3],
+                                                              units=100,
+                                                              price=100,
+                                                              currency="GBP",
+                                                              trade_date=effective_date,
+                                                              transaction_type="Buy",
+                                                              business_key=f"trade-{i}")
+            for i in range(25)
+        ]
+
+        # requests failing with a transient error are sent again after a jittered wait, each chunk is serialised
+        # once and the same body is sent on every attempt
+        retry_policy = RetryPolicy(max_attempts=3)
+
+        def upsert_chunk(chunk):
+            retry_policy.call(self.transaction_portfolios_api.upsert_transactions,
+                              scope=TestDataUtilities.tutorials_scope,
+                              code=portfolio_code,
+                              transaction_request=RequestBodyEncoder.prepared(self.transaction_portfolios_api, chunk))
+            return []
+
+        runner = BatchRunner(max_workers=4)
+        result = runner.run(upsert_chunk, BatchRunner.chunk(transactions, 5))
+        self.assertEqual(result.succeeded, 25)
+
+        # loading the same trades again, here with a corrected price, updates them rather than duplicating them
+        rebuilt = [
+            deterministic_utilities.build_transaction_request(instrument_id=self.instrument_ids[i % 3],
+                                                              units=100,
+                                                              price=101,
+                                                              currency="GBP",
+                                                              trade_date=effective_date,
+                                                              transaction_type="Buy",
+                                                              business_key=f"trade-{i}")
+            for i in range(25)
+        ]
+        runner.run(upsert_chunk, BatchRunner.chunk(rebuilt, 5))
+
+        loaded = self.transaction_portfolios_api.get_transactions(scope=TestDataUtilities.tutorials_scope,
+                                                                  code=portfolio_code)
+        self.assertCountEqual([transaction.transaction_id for transaction in loaded.values],
+                              [transaction.transaction_id for transaction in transactions])
+        self.assertTrue(all(transaction.transaction_price.price == 101 for transaction in loaded.values))
+
+        # a trade without a business key cannot be given a deterministic id
+        with self.assertRaises(ValueError):
+            deterministic_utilities.build_transaction_request(instrument_id=self.instrument_ids[0], units=100,
+                                                              price=100, currency="GBP", trade_date=effective_date,
+                                                              transaction_type="Buy")
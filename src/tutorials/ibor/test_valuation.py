@@ -7,8 +7,9 @@ import lusid
 import lusid.models as models
 from lusidfeature import lusid_feature
 
-from utilities import InstrumentLoader, IdGenerator
+from utilities import FixtureRegistry, IdGenerator
 from utilities import TestDataUtilities
+from utilities import RecipeManager
 from utilities.id_generator_utilities import delete_entities
 
 
@@ -22,12 +23,12 @@ class Valuation(unittest.TestCase):
         cls.transaction_portfolios_api = lusid.TransactionPortfoliosApi(api_client)
         cls.instruments_api = lusid.InstrumentsApi(api_client)
         cls.recipes_api = lusid.ConfigurationRecipeApi(api_client)
+        cls.recipe_manager = RecipeManager(cls.recipes_api)
         cls.aggregation_api = lusid.AggregationApi(api_client)
         cls.quotes_api = lusid.QuotesApi(api_client)
         cls.portfolios_api = lusid.PortfoliosApi(api_client)
 
-        instrument_loader = InstrumentLoader(cls.instruments_api)
-        cls.instrument_ids = instrument_loader.load_instruments()
+        cls.instrument_ids = FixtureRegistry.session().instrument_ids()
 
         cls.test_data_utilities = TestDataUtilities(cls.transaction_portfolios_api)
         cls.id_generator = IdGenerator(scope=TestDataUtilities.tutorials_scope)
@@ -41,33 +42,8 @@ class Valuation(unittest.TestCase):
 
         effective_date = datetime(2019, 4, 15, tzinfo=pytz.utc).isoformat()
 
-        portfolio_code = self.test_data_utilities.create_transaction_portfolio(TestDataUtilities.tutorials_scope)
-        self.id_generator.add_scope_and_code("portfolio", TestDataUtilities.tutorials_scope, portfolio_code)
-
-        transactions = [
-            self.test_data_utilities.build_transaction_request(instrument_id=self.instrument_ids[0],
-                                                               units=100,
-                                                               price=101,
-                                                               currency="GBP",
-                                                               trade_date=effective_date,
-                                                               transaction_type="StockIn"),
-            self.test_data_utilities.build_transaction_request(instrument_id=self.instrument_ids[1],
-                                                               units=100,
-                                                               price=102,
-                                                               currency="GBP",
-                                                               trade_date=effective_date,
-                                                               transaction_type="StockIn"),
-            self.test_data_utilities.build_transaction_request(instrument_id=self.instrument_ids[2],
-                                                               units=100,
-                                                               price=103,
-                                                               currency="GBP",
-                                                               trade_date=effective_date,
-                                                               transaction_type="StockIn")
-        ]
-
-        self.transaction_portfolios_api.upsert_transactions(scope=TestDataUtilities.tutorials_scope,
-                                                            code=portfolio_code,
-                                                            transaction_request=transactions)
+        # The portfolio is only valued, so the seeded portfolio shared by the session is used
+        portfolio_code = FixtureRegistry.session().seeded_portfolio().code
 
         prices = [
             (self.instrument_ids[0], 100),
@@ -99,7 +75,7 @@ class Valuation(unittest.TestCase):
                                       request_body={"quote" + str(request_number): requests[request_number]
                                                     for request_number in range(len(requests))})
 
-        recipe_scope = 'cs-tutorials'
+        recipe_scope = IdGenerator.namespaced('cs-tutorials')
         recipe_code = 'quotes_recipe'
 
         self.id_generator.add_scope_and_code("recipe", recipe_scope, recipe_code)
@@ -118,11 +94,11 @@ class Valuation(unittest.TestCase):
                     default_scope=TestDataUtilities.tutorials_scope)
             )
         )
-        upsert_recipe_request = models.UpsertRecipeRequest(demo_recipe)
-        self.recipes_api.upsert_configuration_recipe(upsert_recipe_request)
+        # Only upserted when it differs from the recipe already in LUSID
+        recipe_id = self.recipe_manager.recipe_id(demo_recipe)
 
         valuation_request = models.ValuationRequest(
-            recipe_id=models.ResourceId(scope=recipe_scope,code=recipe_code),
+            recipe_id=recipe_id,
             metrics=[
                 models.AggregateSpec("Instrument/default/Name", "Value"),
                 models.AggregateSpec("Valuation/PV", "Proportion"),
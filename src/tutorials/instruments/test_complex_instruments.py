@@ -1,9 +1,12 @@
 import unittest
+import numpy as np
 import pytz
 import lusid
 import lusid.models as models
 from datetime import datetime
 from utilities import TestDataUtilities
+from utilities import CashflowScheduleGenerator
+from utilities import OtcInstrumentFactory
 
 
 class ComplexInstrumentTests(unittest.TestCase):
@@ -185,3 +188,98 @@ class ComplexInstrumentTests(unittest.TestCase):
         # Remove the test instrument
         self.instruments_api.delete_instrument("ClientInternal", zero_coupon_bond_identifier)
 
+    def test_term_deposit_cashflows(self):
+
+        term_deposit = models.TermDeposit(
+            start_date=datetime(2020, 2, 5, 00, tzinfo=pytz.utc),
+            maturity_date=datetime(2020, 2, 8, 00, tzinfo=pytz.utc),
+            contract_size=1000000,
+            flow_convention=models.FlowConventions(
+                currency="GBP",
+                payment_frequency="6M",
+                roll_convention="MF",
+                day_count_convention="Act365",
+                payment_calendars=[],
+                reset_calendars=[],
+                settle_days=1,
+                reset_days=0
+                ),
+            rate=0.03,
+            instrument_type="TermDeposit"
+        )
+
+        schedule = CashflowScheduleGenerator().generate([term_deposit])
+        dates, amounts = schedule.for_instrument(0)
+
+        # Maturity falls on a Saturday so interest and principal are paid on the following Monday
+        self.assertEqual([str(date) for date in dates], ["2020-02-10", "2020-02-10"])
+        self.assertAlmostEqual(amounts[0], 1000000 * 0.03 * 5 / 365)
+        self.assertEqual(amounts[1], 1000000)
+
+    def test_bond_cashflows(self):
+
+        def semi_annual_bond(coupon_rate):
+            return models.Bond(
+                start_date=datetime(2020, 1, 31, 00, tzinfo=pytz.utc),
+                maturity_date=datetime(2025, 1, 31, 00, tzinfo=pytz.utc),
+                dom_ccy="GBP",
+                principal=100,
+                coupon_rate=coupon_rate,
+                flow_conventions=models.FlowConventions(
+                    currency="GBP",
+                    payment_frequency="6M",
+                    roll_convention="MF",
+                    day_count_convention="Act365",
+                    payment_calendars=[],
+                    reset_calendars=[],
+                    settle_days=2,
+                    reset_days=2
+                    ),
+                identifiers={},
+                instrument_type="Bond"
+            )
+
+        # Bonds with the same dates and conventions share one memoised date grid
+        generator = CashflowScheduleGenerator()
+        bonds = [semi_annual_bond(coupon_rate / 100) for coupon_rate in range(1, 1001)]
+        schedule = generator.generate(bonds)
+
+        self.assertEqual(generator.schedule_dates.cache_info().misses, 1)
+
+        # Ten coupons and the principal for each bond
+        self.assertEqual(len(schedule), 11 * len(bonds))
+
+        dates, amounts = schedule.for_instrument(99)
+        self.assertEqual(str(dates[0]), "2020-07-31")
+        self.assertEqual(str(dates[-1]), "2025-01-31")
+        self.assertAlmostEqual(amounts[0], 100 * 1.0 * 182 / 365)
+        self.assertEqual(amounts[-1], 100)
+
+    # Create FX-Forwards in bulk from columns of economics
+    def test_create_fx_forwards_in_bulk(self):
+        factory = OtcInstrumentFactory(self.instruments_api, chunk_size=10, max_workers=4, id_prefix="id-fxfwd-")
+
+        # 40 trades of which only 20 are distinct, identical trades share one instrument
+        notionals = np.tile(np.arange(1, 21) * 1000.0, 2)
+        ids, definitions = factory.fx_forwards(
+            dom_ccy="USD",
+            fgn_ccy="JPY",
+            dom_amount=-notionals,
+            fgn_amount=notionals * 109,
+            start_date=datetime(2020, 2, 7, 00, tzinfo=pytz.utc),
+            maturity_date=datetime(2020, 9, 18, 00, tzinfo=pytz.utc),
+        )
+
+        self.assertEqual(len(ids), 40)
+        self.assertEqual(len(definitions), 20)
+        self.assertEqual(list(ids[:20]), list(ids[20:]))
+
+        # The upsert responses confirm the instruments so they are not read back
+        result, lusid_instrument_ids = factory.upsert(definitions)
+
+        self.assertEqual(result.succeeded, 20, result.rejected)
+        self.assertEqual(set(lusid_instrument_ids), set(definitions))
+
+        # Remove the test instruments
+        for client_internal_id in definitions:
+            self.instruments_api.delete_instrument("ClientInternal", client_internal_id)
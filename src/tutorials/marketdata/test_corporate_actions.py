@@ -8,9 +8,7 @@ from lusidfeature import lusid_feature
 
 import lusid
 import lusid.models as models
-from lusid.utilities.api_client_builder import ApiClientBuilder
-from utilities import IdGenerator
-from utilities.credentials_source import CredentialsSource
+from utilities import IdGenerator, CorporateActionEngine, CorporateActionLoader
 from utilities.id_generator_utilities import delete_entities
 from utilities.test_data_utilities import TestDataUtilities
 
@@ -19,7 +17,7 @@ class CorporateActions(unittest.TestCase):
     @classmethod
     def setUp(cls):
         # create a configured API client
-        api_client = ApiClientBuilder().build(CredentialsSource.secrets_path())
+        api_client = TestDataUtilities.api_client()
 
         cls.instruments_api = lusid.InstrumentsApi(api_client)
         cls.portfolios_api = lusid.PortfoliosApi(api_client)
@@ -198,6 +196,16 @@ class CorporateActions(unittest.TestCase):
             transitions=[transition],
         )
 
+        # Project the effect of the corporate action on the holdings locally before it is upserted.
+        engine = CorporateActionEngine(identifier_key=TestDataUtilities.lusid_figi_identifier)
+        engine.add([corporate_action_request])
+        holdings_before = self.transaction_portfolios_api.get_holdings(
+            scope=TestDataUtilities.tutorials_scope,
+            code=portfolio_code,
+            property_keys=[TestDataUtilities.lusid_figi_identifier],
+        )
+        projected = engine.project(engine.frame({portfolio_code: holdings_before.values}))
+
         # Make the request through the CorporateActionSourcesApi.
         self.corporate_actions_sources_api.batch_upsert_corporate_actions(
             scope=TestDataUtilities.tutorials_scope,
@@ -220,6 +228,64 @@ class CorporateActions(unittest.TestCase):
             instrument_updated_figi,
         )
 
+        # The projection matches the holdings in LUSID.
+        self.assertEqual(engine.compare(projected, engine.frame({portfolio_code: holdings.values})), [])
+
+    def test_load_corporate_action_calendar(self):
+        """Load a calendar of corporate actions, with one row per output of each transition, into a source."""
+        original_figi, updated_figi = "FR0123456789", "FR5555555555"
+        self.instruments_api.upsert_instruments(
+            request_body={
+                figi: models.InstrumentDefinition(
+                    name="instrument-name", identifiers={"Figi": models.InstrumentIdValue(value=figi)}
+                )
+                for figi in (original_figi, updated_figi)
+            }
+        )
+
+        _, scope, source_code = self.id_generator.generate_scope_and_code(
+            "ca_source",
+            TestDataUtilities.tutorials_scope,
+            code_prefix="calendar-source-"
+        )
+        self.corporate_actions_sources_api.create_corporate_action_source(
+            models.CreateCorporateActionSourceRequest(scope=scope, code=source_code, display_name=source_code)
+        )
+
+        # A rename of the original instrument followed by a 2 for 1 split of the updated instrument.
+        calendar = []
+        for corporate_action_code, ex_date, input_figi, outputs in [
+            ("rename", datetime(2021, 1, 4, tzinfo=pytz.utc), original_figi,
+             [(updated_figi, 1, 1), (original_figi, 0, 0)]),
+            ("split", datetime(2021, 2, 1, tzinfo=pytz.utc), updated_figi, [(updated_figi, 2, 1)]),
+        ]:
+            for output_figi, units_factor, cost_factor in outputs:
+                calendar.append({
+                    "source_scope": scope,
+                    "source_code": source_code,
+                    "corporate_action_code": corporate_action_code,
+                    "announcement_date": ex_date.isoformat(),
+                    "ex_date": ex_date.isoformat(),
+                    "record_date": ex_date.isoformat(),
+                    "payment_date": ex_date.isoformat(),
+                    "input_identifier": input_figi,
+                    "output_identifier": output_figi,
+                    "output_units_factor": units_factor,
+                    "output_cost_factor": cost_factor,
+                })
+
+        loader = CorporateActionLoader(self.corporate_actions_sources_api, self.instruments_api)
+        result = loader.upsert(calendar)
+
+        self.assertEqual(result.rejected, [])
+        self.assertEqual(result.succeeded, 2)
+
+        corporate_actions = self.corporate_actions_sources_api.get_corporate_actions(scope=scope, code=source_code)
+        self.assertCountEqual(
+            [corporate_action.corporate_action_code for corporate_action in corporate_actions.values],
+            ["rename", "split"]
+        )
+
     @lusid_feature("F12-6")
     def test_list_corporate_action_sources(self):
 
@@ -1,12 +1,16 @@
+import os
+import tempfile
 import unittest
 from datetime import datetime, timedelta
 
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytz as pytz
 
 import lusid
 import lusid.models as models
 from lusidfeature import lusid_feature
-from utilities import TestDataUtilities
+from utilities import TestDataUtilities, QuoteUploader, QuotePublisher
 
 
 class Quotes(unittest.TestCase):
@@ -93,3 +97,55 @@ class Quotes(unittest.TestCase):
 
         # flatmap the quotes in the response
         self.assertEqual(30, len([result for response in quote_responses for result in response.values.values()]))
+
+    def test_upload_quotes_from_file(self):
+
+        # an end of day price file, with one quote per row
+        instrument_ids = ["BBG000B9XRY4", "BBG000BPH459", "BBG000BVPV84", "BBG000BCQZS4"]
+        quotes = pa.table({
+            "instrument_id": instrument_ids * 250,
+            "effective_at": [datetime(2019, 4, 15, tzinfo=pytz.utc) + timedelta(days=day)
+                             for day in range(250) for _ in instrument_ids],
+            "value": [100.0 + row for row in range(1000)],
+            "unit": ["USD"] * 1000,
+        })
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "quotes.parquet")
+            pq.write_table(quotes, path)
+
+            # upload the quotes in concurrent requests of at most 100 quotes
+            uploader = QuoteUploader(self.quotes_api, chunk_size=100, max_workers=4)
+            result = uploader.upload(TestDataUtilities.tutorials_scope, path)
+
+        # every quote was saved, any failures would be listed against the row of the file they came from
+        self.assertEqual(0, QuoteUploader.failures(quotes, result).num_rows)
+        self.assertEqual(1000, result.succeeded)
+
+    def test_publish_only_changed_quotes(self):
+
+        instrument_ids = ["BBG000B9XRY4", "BBG000BPH459", "BBG000BVPV84", "BBG000BCQZS4"]
+
+        def prices(values):
+            return pa.table({
+                "instrument_id": instrument_ids,
+                "effective_at": [datetime(2019, 4, 15, 16, 30, tzinfo=pytz.utc)] * len(instrument_ids),
+                "value": values,
+                "unit": ["USD"] * len(instrument_ids),
+            })
+
+        with tempfile.TemporaryDirectory() as directory:
+            # the last published value of each quote is kept in a local database
+            publisher = QuotePublisher(self.quotes_api, os.path.join(directory, "published.db"))
+
+            # the first cycle publishes every quote
+            first = publisher.publish(TestDataUtilities.tutorials_scope, prices([199.23, 123.45, 67.89, 45.67]))
+            self.assertEqual(4, first.sent)
+
+            # the next cycle only sends the one quote whose price has changed
+            second = publisher.publish(TestDataUtilities.tutorials_scope, prices([199.23, 124.00, 67.89, 45.67]))
+            publisher.close()
+
+        self.assertEqual(1, second.sent)
+        self.assertEqual(3, second.unchanged)
+        self.assertEqual(1, second.result.succeeded)
@@ -4,7 +4,7 @@ import unittest
 
 import lusid
 import lusid.models as models
-from utilities import InstrumentLoader, IdGenerator
+from utilities import FixtureRegistry, IdGenerator
 from utilities import TestDataUtilities
 from utilities.id_generator_utilities import delete_entities
 
@@ -21,9 +21,8 @@ class DerivedPropertyTests(unittest.TestCase):
         cls.property_definitions_api = lusid.PropertyDefinitionsApi(api_client)
         cls.instruments_api = lusid.InstrumentsApi(api_client)
 
-        # load instruments from InstrumentLoader
-        instrument_loader = InstrumentLoader(cls.instruments_api)
-        cls.instrument_ids = instrument_loader.load_instruments()
+        # load the instruments shared by the session
+        cls.instrument_ids = FixtureRegistry.session().instrument_ids()
         cls.id_generator = IdGenerator(scope=TestDataUtilities.tutorials_scope)
 
     @classmethod
@@ -34,7 +33,7 @@ class DerivedPropertyTests(unittest.TestCase):
 
         ratings = [*ratings]
         global scope
-        scope = "Derived"
+        scope = IdGenerator.namespaced("Derived")
 
         for rating in ratings:
             property_definition = models.CreatePropertyDefinitionRequest(
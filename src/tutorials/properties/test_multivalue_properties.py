@@ -32,7 +32,7 @@ class MultiLabelPropertyTests(unittest.TestCase):
     def test_create_portfolio_with_mv_property(self):
         # Details of property to be created
         effective_date = datetime(year=2018, month=1, day=1, tzinfo=pytz.utc)
-        scope = "MultiValueProperties"
+        scope = IdGenerator.namespaced("MultiValueProperties")
         code = "MorningstarQuarterlyRating"
         portfolio_code = "Portfolio-MVP"
 
@@ -106,7 +106,7 @@ class MultiLabelPropertyTests(unittest.TestCase):
             scope=scope, code=portfolio_code
         ).properties
         label_value_set = portfolio_properties[
-            f"Portfolio/MultiValueProperties/{code}"
+            f"Portfolio/{scope}/{code}"
         ].value.label_value_set.values
         self.assertCountEqual(label_value_set, schedule)
 
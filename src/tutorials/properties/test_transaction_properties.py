@@ -9,7 +9,7 @@ import logging
 import lusid
 import lusid.models as models
 from lusid import ApiException
-from utilities import InstrumentLoader, IdGenerator
+from utilities import FixtureRegistry, IdGenerator
 from utilities import TestDataUtilities
 from utilities.id_generator_utilities import delete_entities
 
@@ -28,12 +28,11 @@ class TransactionProperty(unittest.TestCase):
         cls.transaction_portfolios_api = lusid.TransactionPortfoliosApi(api_client)
         cls.portfolios_api = lusid.PortfoliosApi(api_client)
 
-        # load instruments from InstrumentLoader
-        instrument_loader = InstrumentLoader(cls.instruments_api)
-        cls.instrument_ids = instrument_loader.load_instruments()
+        # load the instruments shared by the session
+        cls.instrument_ids = FixtureRegistry.session().instrument_ids()
 
         # set test scope and code
-        cls.scope = "TransactionProperty"
+        cls.scope = IdGenerator.namespaced("TransactionProperty")
         cls.code = "TransactionTaxDetail"
         cls.id_generator = IdGenerator(scope=TestDataUtilities.tutorials_scope)
 
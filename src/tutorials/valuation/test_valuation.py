@@ -1,13 +1,14 @@
 import unittest
-from datetime import datetime
 from parameterized import parameterized
 
-import pytz
 
 import lusid
 import lusid.models as models
-from utilities import InstrumentLoader
+from utilities import FixtureRegistry
 from utilities import TestDataUtilities
+from utilities import ValuationScheduler
+from utilities import RecipeManager
+from utilities import AggregationFrame
 
 
 class Valuation(unittest.TestCase):
@@ -23,101 +24,16 @@ class Valuation(unittest.TestCase):
         cls.aggregation_api = lusid.AggregationApi(api_client)
         cls.quotes_api = lusid.QuotesApi(api_client)
         cls.recipes_api = lusid.ConfigurationRecipeApi(api_client)
-        instrument_loader = InstrumentLoader(cls.instruments_api)
-        cls.instrument_ids = instrument_loader.load_instruments()
+        cls.recipe_manager = RecipeManager(cls.recipes_api)
 
-        # Setup test data from utilities
-        cls.test_data_utilities = TestDataUtilities(cls.transaction_portfolios_api)
+        # The portfolio and quotes are only read, so the datasets shared by the session are used
+        registry = FixtureRegistry.session()
+        cls.instrument_ids = registry.instrument_ids()
+        registry.quote_set()
 
-        # Set test parameters
-        cls.effective_date = datetime(2019, 4, 15, tzinfo=pytz.utc)
-        cls.portfolio_code = cls.test_data_utilities.create_transaction_portfolio(
-            TestDataUtilities.tutorials_scope
-        )
-
-        # Setup test portfolio
-        cls.setup_portfolio(cls.effective_date, cls.portfolio_code)
-
-    @classmethod
-    def tearDownClass(cls):
-        # Delete portfolio once tests are concluded
-        cls.portfolios_api.delete_portfolio(
-            TestDataUtilities.tutorials_scope,
-            cls.portfolio_code
-        )
-
-    @classmethod
-    def setup_portfolio(cls, effective_date, portfolio_code) -> None:
-        """
-        Sets up instrument, quotes and portfolio data from TestDataUtilities
-        :param datetime effective_date: The portfolio creation date
-        :param str portfolio_code: The code of the test portfolio
-        :return: None
-        """
-
-        transactions = [
-            cls.test_data_utilities.build_transaction_request(
-                instrument_id=cls.instrument_ids[0],
-                units=100,
-                price=101,
-                currency="GBP",
-                trade_date=effective_date,
-                transaction_type="StockIn",
-            ),
-            cls.test_data_utilities.build_transaction_request(
-                instrument_id=cls.instrument_ids[1],
-                units=100,
-                price=102,
-                currency="GBP",
-                trade_date=effective_date,
-                transaction_type="StockIn",
-            ),
-            cls.test_data_utilities.build_transaction_request(
-                instrument_id=cls.instrument_ids[2],
-                units=100,
-                price=103,
-                currency="GBP",
-                trade_date=effective_date,
-                transaction_type="StockIn",
-            ),
-        ]
-
-        cls.transaction_portfolios_api.upsert_transactions(
-            scope=TestDataUtilities.tutorials_scope,
-            code=portfolio_code,
-            transaction_request=transactions,
-        )
-
-        prices = [
-            (cls.instrument_ids[0], 100),
-            (cls.instrument_ids[1], 200),
-            (cls.instrument_ids[2], 300),
-        ]
-
-        requests = [
-            models.UpsertQuoteRequest(
-                quote_id=models.QuoteId(
-                    models.QuoteSeriesId(
-                        provider="Lusid",
-                        instrument_id=price[0],
-                        instrument_id_type="LusidInstrumentId",
-                        quote_type="Price",
-                        field="mid",
-                    ),
-                    effective_at=effective_date,
-                ),
-                metric_value=models.MetricValue(value=price[1], unit="GBP"),
-            )
-            for price in prices
-        ]
-
-        cls.quotes_api.upsert_quotes(
-            TestDataUtilities.tutorials_scope,
-            request_body={
-                "quote" + str(request_number): requests[request_number]
-                for request_number in range(len(requests))
-            },
-        )
+        portfolio = registry.seeded_portfolio()
+        cls.effective_date = portfolio.effective_date
+        cls.portfolio_code = portfolio.code
 
     def create_configuration_recipe(
         self, recipe_scope, recipe_code
@@ -145,13 +61,12 @@ class Valuation(unittest.TestCase):
 
     def upsert_recipe_request(self, configuration_recipe) -> None:
         """
-        Structures a recipe request and upserts it into LUSID
+        Upserts a recipe into LUSID, skipping the call when the same recipe has already been upserted
         :param ConfigurationRecipe configuration_recipe: Recipe configuration
         :return: None
         """
 
-        upsert_recipe_request = models.UpsertRecipeRequest(configuration_recipe)
-        self.recipes_api.upsert_configuration_recipe(upsert_recipe_request)
+        self.recipe_manager.upsert(configuration_recipe)
 
     @parameterized.expand(
         [
@@ -202,3 +117,66 @@ class Valuation(unittest.TestCase):
         self.assertEqual(aggregation.data[0][valuation_key], 10000)
         self.assertEqual(aggregation.data[1][valuation_key], 20000)
         self.assertEqual(aggregation.data[2][valuation_key], 30000)
+
+    def test_valuation_schedule(self) -> None:
+        """
+        Values a grid of portfolios and dates and reads the results from one cube
+        """
+        recipe_scope, recipe_code = TestDataUtilities.tutorials_scope, "SimpleQuotes"
+        self.upsert_recipe_request(self.create_configuration_recipe(recipe_scope, recipe_code))
+
+        scheduler = ValuationScheduler(self.aggregation_api, requests_per_second=5, max_workers=4)
+
+        cube = scheduler.run(
+            portfolios=[(TestDataUtilities.tutorials_scope, self.portfolio_code)],
+            dates=[self.effective_date],
+            recipe_id=models.ResourceId(scope=recipe_scope, code=recipe_code),
+            metrics=[
+                models.AggregateSpec("Instrument/default/Name", "Value"),
+                models.AggregateSpec("Valuation/PV", "Sum"),
+            ],
+            group_by=["Instrument/default/Name"],
+        )
+
+        valuation = cube.select(date=self.effective_date,
+                                portfolio=f"{TestDataUtilities.tutorials_scope}/{self.portfolio_code}")
+
+        self.assertEqual(len(valuation), 3)
+        self.assertEqual(sorted(valuation.metrics["Sum(Valuation/PV)"]), [10000, 20000, 30000])
+
+    def test_aggregation_frame(self) -> None:
+        """
+        Re-aggregates a valuation locally from its columnar form
+        """
+        recipe_scope, recipe_code = TestDataUtilities.tutorials_scope, "SimpleQuotes"
+        self.upsert_recipe_request(self.create_configuration_recipe(recipe_scope, recipe_code))
+
+        group_by = ["Instrument/default/Name", "Instrument/default/LusidInstrumentId"]
+        valuation_request = models.ValuationRequest(
+            recipe_id=models.ResourceId(scope=recipe_scope, code=recipe_code),
+            metrics=[
+                models.AggregateSpec("Instrument/default/Name", "Value"),
+                models.AggregateSpec("Instrument/default/LusidInstrumentId", "Value"),
+                models.AggregateSpec("Valuation/PV", "Sum"),
+            ],
+            group_by=group_by,
+            valuation_schedule=models.ValuationSchedule(effective_at=self.effective_date.isoformat()),
+            portfolio_entity_ids=[
+                models.PortfolioEntityId(scope=TestDataUtilities.tutorials_scope, code=self.portfolio_code)
+            ]
+        )
+
+        frame = AggregationFrame.from_response(
+            self.aggregation_api.get_valuation(valuation_request=valuation_request), group_by
+        )
+
+        # Total and proportions are computed locally rather than requested from LUSID
+        self.assertEqual(frame.sum("Sum(Valuation/PV)"), 60000)
+        self.assertEqual(
+            sorted(frame.proportion("Sum(Valuation/PV)").round(4)), [0.1667, 0.3333, 0.5]
+        )
+
+        # Re-grouping to a single key gives one row per instrument name
+        by_name = frame.regroup(["Instrument/default/Name"])
+        self.assertEqual(len(by_name), 3)
+        self.assertEqual(sorted(by_name.metrics["Sum(Valuation/PV)"]), [10000, 20000, 30000])
@@ -1,6 +1,62 @@
-from utilities.credentials_source import CredentialsSource
-from utilities.instrument_loader import InstrumentLoader
-from utilities.test_data_utilities import TestDataUtilities
-from utilities.token_utilities import TokenUtilities
-from utilities.temp_file_manager import TempFileManager
-from utilities.id_generator import IdGenerator
+import importlib
+
+# The submodule each name is loaded from on first access. Importing the package itself does not import the
+# submodules, so helpers which do not need the lusid SDK, numpy or pyarrow start up without loading them.
+_exports = {
+    "CredentialsSource": "utilities.credentials_source",
+    "InstrumentLoader": "utilities.instrument_loader",
+    "TestDataUtilities": "utilities.test_data_utilities",
+    "TokenUtilities": "utilities.token_utilities",
+    "TempFileManager": "utilities.temp_file_manager",
+    "IdGenerator": "utilities.id_generator",
+    "BatchRunner": "utilities.batch_runner",
+    "BatchResult": "utilities.batch_runner",
+    "OrderLoader": "utilities.order_loader",
+    "RateLimiter": "utilities.rate_limiter",
+    "AggregationFrame": "utilities.aggregation_frame",
+    "ValuationScheduler": "utilities.valuation_scheduler",
+    "ValuationCube": "utilities.valuation_scheduler",
+    "RecipeManager": "utilities.recipe_manager",
+    "CashflowScheduleGenerator": "utilities.cashflow_schedule",
+    "CashflowSchedule": "utilities.cashflow_schedule",
+    "OtcInstrumentFactory": "utilities.otc_instrument_factory",
+    "TransactionCanceller": "utilities.transaction_canceller",
+    "CutLabelService": "utilities.cut_label_service",
+    "HoldingsExporter": "utilities.holdings_exporter",
+    "HoldingsExport": "utilities.holdings_exporter",
+    "TransactionSync": "utilities.transaction_sync",
+    "TokenCache": "utilities.token_cache",
+    "ParallelTestRunner": "utilities.parallel_test_runner",
+    "FixtureRegistry": "utilities.fixture_registry",
+    "SeededPortfolio": "utilities.fixture_registry",
+    "QuoteUploader": "utilities.quote_uploader",
+    "QuotePublisher": "utilities.quote_publisher",
+    "QuotePublish": "utilities.quote_publisher",
+    "CorporateActionEngine": "utilities.corporate_action_engine",
+    "CorporateActionLoader": "utilities.corporate_action_loader",
+    "ReferencePortfolioSync": "utilities.reference_portfolio_sync",
+    "ConstituentDiff": "utilities.reference_portfolio_sync",
+    "TrackingAnalytics": "utilities.tracking_analytics",
+    "RetryPolicy": "utilities.retry_policy",
+    "RequestBodyEncoder": "utilities.request_body_encoder",
+    "PreparedBody": "utilities.request_body_encoder",
+    "ModelSerializer": "utilities.model_serializer",
+    "SingleFlight": "utilities.single_flight",
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+    module_name = _exports.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name), name)
+    # Cache on the package so later lookups do not come back here
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
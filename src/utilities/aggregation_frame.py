@@ -0,0 +1,217 @@
+import copy
+import numbers
+
+import numpy as np
+
+
+class AggregationFrame:
+    """
+    This class holds the rows of an aggregation in columns. Each group by key is dictionary encoded as integer
+    codes into an array of its distinct values and each numeric metric is a float64 array.
+    """
+
+    def __init__(self, keys, metrics):
+        """
+
+        Parameters
+        ----------
+        keys : dict[str, (numpy.ndarray, numpy.ndarray)]
+            The (codes, categories) of each group by key, the value of row ``i`` is ``categories[codes[i]]``
+        metrics : dict[str, numpy.ndarray]
+            The values of each metric, float64 for numeric metrics and object otherwise
+        """
+        self.keys = keys
+        self.metrics = metrics
+
+    def __len__(self):
+        for values in self.metrics.values():
+            return len(values)
+        for codes, _ in self.keys.values():
+            return len(codes)
+        return 0
+
+    @staticmethod
+    def encode(values):
+        """
+        Dictionary encodes a sequence of values
+
+        :param values: The values, which must be hashable
+
+        :return: (numpy.ndarray, numpy.ndarray): The int32 codes and the distinct values
+        """
+        if isinstance(values, np.ndarray) and values.dtype.kind in "iufMm":
+            categories, codes = np.unique(values, return_inverse=True)
+            return codes.astype(np.int32).reshape(-1), categories
+
+        index = {}
+        codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int32)
+        categories = np.empty(len(index), dtype=object)
+        categories[:] = list(index)
+        return codes, categories
+
+    @classmethod
+    def from_rows(cls, rows, group_by, ignore=()):
+        """
+        Builds a frame from rows of an aggregation
+
+        :param list[dict] rows: The rows, as in the ``data`` of a ListAggregationResponse
+        :param list[str] group_by: The keys the aggregation was grouped by
+        :param ignore: Keys in the rows which are neither group by keys nor metrics
+
+        :return: AggregationFrame: The frame
+        """
+        metric_keys = list(dict.fromkeys(
+            key for row in rows for key in row if key not in group_by and key not in ignore
+        ))
+
+        keys = {key: cls.encode([row.get(key) for row in rows]) for key in group_by}
+
+        metrics = {}
+        for key in metric_keys:
+            values = [row.get(key) for row in rows]
+            if all(value is None or isinstance(value, numbers.Real) for value in values):
+                metrics[key] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+            else:
+                metrics[key] = np.empty(len(values), dtype=object)
+                metrics[key][:] = values
+
+        return cls(keys, metrics)
+
+    @classmethod
+    def from_response(cls, response, group_by):
+        """
+        Builds a frame from the response of ``AggregationApi.get_valuation``
+
+        :param ListAggregationResponse response: The response
+        :param list[str] group_by: The keys the valuation was grouped by
+
+        :return: AggregationFrame: The frame
+        """
+        return cls.from_rows(response.data, group_by)
+
+    def key(self, name):
+        """
+        Decodes the values of a group by key
+
+        :param str name: The key
+
+        :return: numpy.ndarray: The value of the key for each row
+        """
+        codes, categories = self.keys[name]
+        return categories[codes]
+
+    def mask(self, **values):
+        """
+        Finds the rows where each given key has the given value, comparing integer codes rather than values
+
+        :param values: The value of each key, keyed by the key name
+
+        :return: numpy.ndarray: Boolean mask of the matching rows
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in values.items():
+            codes, categories = self.keys[name]
+            if categories.dtype == object:
+                matches = [code for code, category in enumerate(categories) if category == value]
+            else:
+                matches = np.flatnonzero(categories == value)
+            mask &= np.isin(codes, matches)
+        return mask
+
+    def filter(self, mask):
+        """
+        Selects rows of the frame
+
+        :param numpy.ndarray mask: Boolean mask or indices of the rows to select
+
+        :return: AggregationFrame: A frame holding the selected rows, sharing the categories of this frame
+        """
+        frame = copy.copy(self)
+        frame.keys = {name: (codes[mask], categories) for name, (codes, categories) in self.keys.items()}
+        frame.metrics = {name: values[mask] for name, values in self.metrics.items()}
+        return frame
+
+    def _group(self, by):
+        """
+        Returns the group of each row over the keys in ``by``, and the (codes, categories) of each key per group
+        """
+        if not by:
+            return np.zeros(len(self), dtype=np.int64), {}
+
+        # Combine the codes of the keys into a single integer per row
+        combined = np.zeros(len(self), dtype=np.int64)
+        for name in by:
+            codes, categories = self.keys[name]
+            combined = combined * len(categories) + codes
+
+        groups, inverse = np.unique(combined, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        # Split the combined integer of each group back into the codes of each key
+        keys = {}
+        for name in reversed(by):
+            _, categories = self.keys[name]
+            keys[name] = ((groups % len(categories)).astype(np.int32), categories)
+            groups = groups // len(categories)
+
+        return inverse, {name: keys[name] for name in by}
+
+    def regroup(self, by, metrics=None):
+        """
+        Re-aggregates the frame to the keys in ``by`` by summing the metrics
+
+        :param list[str] by: The keys to group by, a subset of the keys of this frame
+        :param list[str] metrics: The numeric metrics to sum, defaults to all numeric metrics
+
+        :return: AggregationFrame: The frame with one row per distinct combination of ``by``
+        """
+        metrics = metrics if metrics is not None else [
+            name for name, values in self.metrics.items() if values.dtype == np.float64
+        ]
+
+        inverse, keys = self._group(by)
+        size = int(inverse.max()) + 1 if len(inverse) else 0
+
+        return AggregationFrame(keys, {
+            name: np.bincount(inverse, weights=np.nan_to_num(self.metrics[name]), minlength=size)
+            for name in metrics
+        })
+
+    def sum(self, metric, by=()):
+        """
+        Sums a metric, in total or per group
+
+        :param str metric: The metric to sum
+        :param list[str] by: The keys to group by, when empty the total is returned
+
+        :return: The total as a float, or an AggregationFrame with one row per group
+        """
+        if not by:
+            return float(np.nansum(self.metrics[metric]))
+        return self.regroup(list(by), [metric])
+
+    def proportion(self, metric, by=()):
+        """
+        Computes the proportion of each row of a metric within its group
+
+        :param str metric: The metric
+        :param list[str] by: The keys defining the groups, when empty the proportion is of the total
+
+        :return: numpy.ndarray: The proportion for each row
+        """
+        values = np.nan_to_num(self.metrics[metric])
+        inverse, _ = self._group(list(by))
+        totals = np.bincount(inverse, weights=values)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return values / totals[inverse]
+
+    def to_rows(self):
+        """
+        Converts the frame back into rows
+
+        :return: list[dict]: The rows, as in the ``data`` of a ListAggregationResponse
+        """
+        columns = {name: self.key(name).tolist() for name in self.keys}
+        columns.update({name: values.tolist() for name, values in self.metrics.items()})
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
@@ -0,0 +1,131 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+
+
+class BatchResult:
+    """
+    This class is used for collecting the outcome of a batch run
+    """
+
+    def __init__(self):
+        self.succeeded = 0
+        self.rejected = []
+        self.failed_chunks = []
+        self.elapsed = 0.0
+
+    @property
+    def total(self):
+        """
+        The number of items which were submitted, including rejected items and items in failed chunks
+        """
+        return self.succeeded + len(self.rejected) + sum(len(chunk) for chunk, _ in self.failed_chunks)
+
+    @property
+    def rate(self):
+        """
+        The sustained number of items processed per second over the whole run
+        """
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return f"BatchResult(succeeded={self.succeeded}, rejected={len(self.rejected)}, " \
+               f"failed_chunks={len(self.failed_chunks)}, elapsed={self.elapsed:.3f}s, rate={self.rate:.1f}/s)"
+
+
+class BatchRunner:
+    """
+    This class is used for running a function over fixed size chunks of a stream of items concurrently
+    """
+
+    def __init__(self, max_workers=8, max_pending=None, retry_policy=None):
+        """
+
+        Parameters
+        ----------
+        max_workers : int, optional
+            The number of chunks to process concurrently
+        max_pending : int, optional
+            The maximum number of chunks read from the stream but not yet processed, defaults to twice
+            ``max_workers``. This bounds memory when the stream is much larger than can be held at once.
+        retry_policy : RetryPolicy, optional
+            The policy each chunk which fails with a transient error is retried under, only the failed chunk is
+            processed again. Chunks are not retried when not supplied.
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending if max_pending is not None else 2 * max_workers
+        self.retry_policy = retry_policy
+
+    @staticmethod
+    def chunk(items, chunk_size):
+        """
+        Generator splitting an iterable into lists of at most ``chunk_size`` items
+
+        Parameters
+        ----------
+        items : iterable
+            The items to split
+        chunk_size : int
+            The maximum size of each chunk
+
+        Yields
+        -------
+        list
+            The next chunk of items
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+
+        iterator = iter(items)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def run(self, process_chunk, chunks):
+        """
+        Runs ``process_chunk`` over each chunk concurrently
+
+        Parameters
+        ----------
+        process_chunk : typing.Callable[[list], list]
+            Function processing a single chunk. It returns a list of the items in the chunk which were rejected,
+            each as a ``(item, reason)`` tuple. Any exception it raises marks the whole chunk as failed.
+        chunks : iterable[list]
+            The chunks to process, these are consumed lazily
+
+        Returns
+        -------
+        BatchResult
+            The counts of succeeded and rejected items, the failed chunks and the elapsed time
+        """
+        result = BatchResult()
+        start = time.perf_counter()
+
+        def collect(futures):
+            for future in futures:
+                chunk = pending.pop(future)
+                try:
+                    rejected = future.result()
+                except Exception as ex:
+                    result.failed_chunks.append((chunk, ex))
+                    continue
+                result.rejected.extend(rejected)
+                result.succeeded += len(chunk) - len(rejected)
+
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for chunk in chunks:
+                if len(pending) >= self.max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                if self.retry_policy is not None:
+                    pending[executor.submit(self.retry_policy.call, process_chunk, chunk)] = chunk
+                else:
+                    pending[executor.submit(process_chunk, chunk)] = chunk
+
+            collect(list(pending))
+
+        result.elapsed = time.perf_counter() - start
+        return result
@@ -0,0 +1,271 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+
+import lusid.models as models
+
+
+class CashflowSchedule:
+    """
+    This class holds the cashflows of many instruments in columns, one entry per cashflow
+    """
+
+    def __init__(self, instrument_index, dates, amounts, currencies):
+        """
+
+        Parameters
+        ----------
+        instrument_index : numpy.ndarray
+            The position of the instrument each cashflow belongs to in the generated list
+        dates : numpy.ndarray
+            The adjusted payment date of each cashflow as datetime64[D]
+        amounts : numpy.ndarray
+            The amount of each cashflow as float64, positive amounts are received by the holder
+        currencies : numpy.ndarray
+            The currency of each cashflow
+        """
+        self.instrument_index = instrument_index
+        self.dates = dates
+        self.amounts = amounts
+        self.currencies = currencies
+
+    def __len__(self):
+        return len(self.dates)
+
+    def for_instrument(self, index):
+        """
+        Selects the cashflows of one instrument
+
+        :param int index: The position of the instrument in the generated list
+
+        :return: (numpy.ndarray, numpy.ndarray): The dates and amounts of its cashflows
+        """
+        mask = self.instrument_index == index
+        return self.dates[mask], self.amounts[mask]
+
+
+class CashflowScheduleGenerator:
+    """
+    This class is used for expanding Bond and TermDeposit definitions into their cashflows locally, without a
+    valuation in LUSID
+    """
+
+    # Roll conventions of FlowConventions mapped to the business day conventions of numpy
+    roll_conventions = {
+        "F": "following",
+        "Following": "following",
+        "MF": "modifiedfollowing",
+        "ModifiedFollowing": "modifiedfollowing",
+        "P": "preceding",
+        "Previous": "preceding",
+        "Preceding": "preceding",
+        "MP": "modifiedpreceding",
+        "ModifiedPrevious": "modifiedpreceding",
+        "ModifiedPreceding": "modifiedpreceding",
+        "None": None,
+        "NoAdjustment": None,
+    }
+
+    def __init__(self, holidays=None):
+        """
+
+        Parameters
+        ----------
+        holidays : dict[str, list], optional
+            The holidays of each calendar named in the ``payment_calendars`` of the flow conventions, as dates
+            or ISO 8601 strings. Weekends are always non business days.
+        """
+        self.holidays = {
+            code: np.array(dates, dtype="datetime64[D]") for code, dates in (holidays or {}).items()
+        }
+
+        # The grids are memoised per generator as they depend on the holidays it was built with
+        self.schedule_dates = lru_cache(maxsize=None)(self._schedule_dates)
+        self._calendar = lru_cache(maxsize=None)(self._business_day_calendar)
+
+    @staticmethod
+    def to_date(value):
+        """
+        Converts a datetime, date or ISO 8601 string to a datetime64[D]
+        """
+        if hasattr(value, "date"):
+            value = value.date()
+        elif isinstance(value, str):
+            value = value[:10]
+        return np.datetime64(value, "D")
+
+    @staticmethod
+    def parse_tenor(tenor):
+        """
+        Parses a payment frequency such as '6M', '1Y' or '1W'
+
+        :param str tenor: The payment frequency
+
+        :return: (int, str): The count and unit ('D', 'W', 'M' or 'Y'), or None for a frequency without
+        periodic payments such as '0Invalid'
+        """
+        match = re.fullmatch(r"(\d+)([DWMY])", tenor or "")
+        if match is None or int(match.group(1)) == 0:
+            return None
+        return int(match.group(1)), match.group(2)
+
+    def _business_day_calendar(self, payment_calendars):
+        holidays = [self.holidays[code] for code in payment_calendars if code in self.holidays]
+        return np.busdaycalendar(holidays=np.concatenate(holidays) if holidays else [])
+
+    @staticmethod
+    def add_months(dates, months):
+        """
+        Adds whole months to dates, moving to the last day of the month where the day does not exist
+
+        :param numpy.ndarray dates: The dates as datetime64[D]
+        :param months: The number of months to add, broadcast against ``dates``
+
+        :return: numpy.ndarray: The dates as datetime64[D]
+        """
+        month_start = dates.astype("datetime64[M]")
+        day = (dates - month_start.astype("datetime64[D]")).astype(np.int64)
+        target = month_start + np.asarray(months, dtype=np.int64)
+        days_in_month = ((target + 1).astype("datetime64[D]") - target.astype("datetime64[D]")).astype(np.int64)
+        return target.astype("datetime64[D]") + np.minimum(day, days_in_month - 1)
+
+    def _schedule_dates(self, start, maturity, payment_frequency, roll_convention, payment_calendars):
+        """
+        Returns the adjusted accrual dates from start to maturity, rolled back from maturity by the frequency
+        """
+        start, maturity = np.datetime64(start, "D"), np.datetime64(maturity, "D")
+        tenor = self.parse_tenor(payment_frequency)
+
+        if tenor is None:
+            unadjusted = np.array([start, maturity], dtype="datetime64[D]")
+        else:
+            count, unit = tenor
+            if unit in "DW":
+                step = np.timedelta64(count * (7 if unit == "W" else 1), "D")
+                periods = int((maturity - start) / step) + 1
+                unadjusted = maturity - step * np.arange(periods)[::-1]
+            else:
+                months = count * (12 if unit == "Y" else 1)
+                total_months = (maturity.astype("datetime64[M]") - start.astype("datetime64[M]")).astype(int)
+                periods = total_months // months + 1
+                unadjusted = self.add_months(np.full(periods, maturity), -months * np.arange(periods)[::-1])
+
+            # Drop any roll date on or before the start, leaving a short first period
+            unadjusted = np.concatenate([[start], unadjusted[unadjusted > start]])
+
+        roll = self.roll_conventions.get(roll_convention)
+        if roll is None:
+            adjusted = unadjusted
+        else:
+            adjusted = np.busday_offset(unadjusted, 0, roll=roll, busdaycal=self._calendar(payment_calendars))
+
+        adjusted.setflags(write=False)
+        return adjusted
+
+    @staticmethod
+    def year_fractions(start, end, day_count_convention):
+        """
+        Computes the year fraction between each pair of dates
+
+        :param numpy.ndarray start: The period start dates as datetime64[D]
+        :param numpy.ndarray end: The period end dates as datetime64[D]
+        :param str day_count_convention: The day count convention of the flow conventions
+
+        :return: numpy.ndarray: The year fractions
+        """
+        days = (end - start).astype(np.float64)
+        convention = day_count_convention.replace("/", "").replace("_", "").lower()
+
+        if convention in ("act365", "act365f", "actual365"):
+            return days / 365.0
+        if convention in ("act360", "actual360"):
+            return days / 360.0
+        if convention in ("thirty360", "30360", "thirtye360", "30e360"):
+            years = [dates.astype("datetime64[Y]") for dates in (start, end)]
+            months = [dates.astype("datetime64[M]") for dates in (start, end)]
+            d1, d2 = [(dates - month.astype("datetime64[D]")).astype(np.int64) + 1
+                      for dates, month in zip((start, end), months)]
+            y1, y2 = [year.astype(np.int64) for year in years]
+            m1, m2 = [(month - year.astype("datetime64[M]")).astype(np.int64) for month, year in zip(months, years)]
+            d1 = np.minimum(d1, 30)
+            d2 = np.minimum(d2, 30) if convention.startswith("thirtye") or convention.startswith("30e") \
+                else np.where(d1 == 30, np.minimum(d2, 30), d2)
+            return (360 * (y2 - y1) + 30 * (m2 - m1) + (d2 - d1)) / 360.0
+        if convention in ("actact", "actactisda"):
+            start_year, end_year = start.astype("datetime64[Y]"), end.astype("datetime64[Y]")
+
+            def days_in_year(year):
+                return ((year + 1).astype("datetime64[D]") - year.astype("datetime64[D]")).astype(np.float64)
+
+            first = ((start_year + 1).astype("datetime64[D]") - start).astype(np.float64) / days_in_year(start_year)
+            last = (end - end_year.astype("datetime64[D]")).astype(np.float64) / days_in_year(end_year)
+            whole = (end_year - start_year).astype(np.float64) - 1
+            return np.where(start_year == end_year, days / days_in_year(start_year), first + whole + last)
+
+        raise ValueError(f"Unsupported day count convention '{day_count_convention}'")
+
+    def _instrument_periods(self, instrument):
+        """
+        Returns the accrual dates, notional, rate, currency and conventions of a Bond or TermDeposit
+        """
+        if isinstance(instrument, models.Bond):
+            conventions = instrument.flow_conventions
+            notional, rate, currency = instrument.principal, instrument.coupon_rate, instrument.dom_ccy
+            payment_frequency = conventions.payment_frequency
+        elif isinstance(instrument, models.TermDeposit):
+            conventions = instrument.flow_convention
+            notional, rate, currency = instrument.contract_size, instrument.rate, conventions.currency
+            # The interest on a term deposit is paid in full at maturity
+            payment_frequency = None
+        else:
+            raise ValueError(f"Unsupported instrument type '{type(instrument).__name__}'")
+
+        dates = self.schedule_dates(
+            str(self.to_date(instrument.start_date)),
+            str(self.to_date(instrument.maturity_date)),
+            payment_frequency,
+            conventions.roll_convention,
+            tuple(conventions.payment_calendars or ()))
+
+        return dates, notional, rate or 0.0, currency, conventions.day_count_convention
+
+    def generate(self, instruments):
+        """
+        Expands Bond and TermDeposit definitions into their interest and principal cashflows
+
+        :param list instruments: The Bond and TermDeposit definitions
+
+        :return: CashflowSchedule: The cashflows of all of the instruments
+        """
+        periods = [self._instrument_periods(instrument) for instrument in instruments]
+
+        # Lay out every accrual period of every instrument in flat arrays
+        lengths = np.array([len(dates) - 1 for dates, *_ in periods], dtype=np.int64)
+        index = np.repeat(np.arange(len(periods)), lengths)
+        period_start = np.concatenate([dates[:-1] for dates, *_ in periods] or [np.array([], "datetime64[D]")])
+        period_end = np.concatenate([dates[1:] for dates, *_ in periods] or [np.array([], "datetime64[D]")])
+        notional = np.array([period[1] for period in periods], dtype=np.float64)
+        rate = np.array([period[2] for period in periods], dtype=np.float64)
+        currency = np.array([period[3] for period in periods], dtype=object)
+        day_counts = np.array([period[4] for period in periods], dtype=object)
+
+        # One vectorised year fraction calculation per day count convention in use
+        interest = np.zeros(len(index), dtype=np.float64)
+        accruing = rate[index] != 0
+        for day_count in set(day_counts[rate != 0]):
+            mask = accruing & (day_counts[index] == day_count)
+            interest[mask] = notional[index[mask]] * rate[index[mask]] * \
+                self.year_fractions(period_start[mask], period_end[mask], day_count)
+
+        # Principal is repaid on the final accrual date
+        final = np.cumsum(lengths) - 1
+        has_periods = lengths > 0
+
+        instrument_index = np.concatenate([index[accruing], np.arange(len(periods))[has_periods]])
+        dates = np.concatenate([period_end[accruing], period_end[final[has_periods]]])
+        amounts = np.concatenate([interest[accruing], notional[has_periods]])
+
+        order = np.lexsort((dates, instrument_index))
+        return CashflowSchedule(instrument_index[order], dates[order], amounts[order],
+                                currency[instrument_index[order]])
@@ -0,0 +1,240 @@
+from datetime import datetime
+
+import numpy as np
+from dateutil.parser import isoparse
+
+from utilities.aggregation_frame import AggregationFrame
+
+
+class CorporateActionEngine:
+    """
+    This class is used for projecting the effect of corporate actions on the holdings of many portfolios locally,
+    before the corporate actions are upserted into LUSID.
+
+    Holdings are held in an AggregationFrame keyed by 'portfolio' and 'instrument' with the metrics 'units' and
+    'cost'. The transitions of each corporate action move the units and cost of every holding of its input
+    instrument into its output instruments, scaled by the factor of each output over the factor of the input. An
+    output for the input instrument itself replaces its holding, so a split or a zeroing output is applied to it,
+    otherwise the holding of the input instrument is left as it is.
+
+    The actions are applied in ex date order. All the actions of an ex date are applied to every portfolio in one
+    pass over the holdings, unless one of them depends on the outcome of another.
+    """
+
+    def __init__(self, identifier_key="Instrument/default/Figi"):
+        """
+
+        Parameters
+        ----------
+        identifier_key : str, optional
+            The identifier the instruments of the transitions and the holdings are matched on
+        """
+        self.identifier_key = identifier_key
+        self.actions = []
+
+    @staticmethod
+    def _date(value):
+        if isinstance(value, str):
+            value = isoparse(value)
+        return np.datetime64(value.replace(tzinfo=None) if isinstance(value, datetime) else value, "us")
+
+    def instrument(self, component):
+        """
+        The instrument of a component of a transition
+
+        :param component: A CorporateActionTransitionComponentRequest or CorporateActionTransitionComponent
+
+        :return: str: The value of the identifier of the instrument
+        """
+        identifiers = component.instrument_identifiers or {}
+        instrument = identifiers.get(self.identifier_key) or getattr(component, "instrument_uid", None)
+        if instrument is None:
+            raise ValueError(f"The transition component has no '{self.identifier_key}' identifier: {identifiers}")
+        return instrument
+
+    def add(self, corporate_actions):
+        """
+        Adds corporate actions to be projected
+
+        :param corporate_actions: The corporate actions, each an UpsertCorporateActionRequest or a CorporateAction
+        as listed from a corporate action source
+
+        :return: None
+        """
+        for corporate_action in corporate_actions:
+            ex_date = self._date(corporate_action.ex_date)
+            for transition in corporate_action.transitions or []:
+                source = transition.input_transition
+                self.actions.append((
+                    ex_date,
+                    len(self.actions),
+                    self.instrument(source),
+                    float(source.units_factor or 1),
+                    float(source.cost_factor or 1),
+                    [(self.instrument(output), float(output.units_factor), float(output.cost_factor))
+                     for output in transition.output_transitions or []],
+                ))
+
+    def frame(self, holdings, positions_only=True):
+        """
+        Builds a frame of the holdings of portfolios
+
+        :param dict[str, list[PortfolioHolding]] holdings: The holdings of each portfolio keyed by its code. The
+        identifier of each holding is read from its properties, so the holdings must be fetched with the identifier
+        in their ``property_keys``, falling back to the LUSID instrument id.
+        :param bool positions_only: Whether only position holdings are included, leaving out cash and accruals
+
+        :return: AggregationFrame: The holdings keyed by 'portfolio' and 'instrument'
+        """
+        rows = []
+        for portfolio, portfolio_holdings in holdings.items():
+            for holding in portfolio_holdings:
+                if positions_only and holding.holding_type != "P":
+                    continue
+                identifier = (holding.properties or {}).get(self.identifier_key)
+                rows.append({
+                    "portfolio": portfolio,
+                    "instrument": identifier.value.label_value if identifier is not None else holding.instrument_uid,
+                    "units": holding.units,
+                    "cost": None if holding.cost is None else holding.cost.amount,
+                })
+
+        if not rows:
+            empty = np.empty(0, dtype=object)
+            return AggregationFrame({"portfolio": (np.empty(0, dtype=np.int32), empty),
+                                     "instrument": (np.empty(0, dtype=np.int32), empty)},
+                                    {"units": np.empty(0), "cost": np.empty(0)})
+
+        return AggregationFrame.from_rows(rows, ["portfolio", "instrument"]).regroup(["portfolio", "instrument"])
+
+    def passes(self, until=None):
+        """
+        Splits the actions into passes which can each be applied in one step. A new pass is started at each ex
+        date, and when an action's input instrument is the input or an output of an action already in the pass.
+
+        :param until: Only the actions with an ex date up to and including this date are included
+
+        :return: list[list[tuple]]: The actions of each pass, in the order they are applied
+        """
+        until = None if until is None else self._date(until)
+
+        passes = []
+        ex_date, touched = None, set()
+        for action in sorted(self.actions, key=lambda action: action[:2]):
+            if until is not None and action[0] > until:
+                break
+            if not passes or action[0] != ex_date or action[2] in touched:
+                passes.append([])
+                ex_date, touched = action[0], set()
+            passes[-1].append(action)
+            touched.add(action[2])
+            touched.update(instrument for instrument, _, _ in action[5])
+        return passes
+
+    @staticmethod
+    def _apply(portfolios, instruments, units, cost, actions, index):
+        """
+        Applies the actions of one pass to holdings held as arrays of portfolio and instrument codes
+        """
+        inputs = np.array([index[action[2]] for action in actions], dtype=np.int64)
+        lookup = np.full(len(index), -1, dtype=np.int64)
+        lookup[inputs] = np.arange(len(actions))
+
+        # The outputs of every action flattened, the outputs of action a are from start[a] to start[a] + counts[a]
+        counts = np.array([len(action[5]) for action in actions], dtype=np.int64)
+        start = np.cumsum(counts) - counts
+        output_instruments = np.array([index[output] for action in actions for output, _, _ in action[5]],
+                                      dtype=np.int64)
+        unit_ratios = np.array([factor / action[3] for action in actions for _, factor, _ in action[5]])
+        cost_ratios = np.array([factor / action[4] for action in actions for _, _, factor in action[5]])
+        replaces_input = np.array([action[2] in {output for output, _, _ in action[5]} for action in actions])
+
+        action_of_row = lookup[instruments]
+        affected = np.flatnonzero(action_of_row >= 0)
+        affected_actions = action_of_row[affected]
+
+        # Expand each affected holding into one row per output of its action
+        repeats = counts[affected_actions]
+        rows = np.repeat(affected, repeats)
+        first = np.repeat(np.cumsum(repeats) - repeats, repeats)
+        outputs = np.arange(len(rows)) - first + np.repeat(start[affected_actions], repeats)
+
+        kept = np.ones(len(instruments), dtype=bool)
+        kept[affected[replaces_input[affected_actions]]] = False
+
+        return (
+            np.concatenate([portfolios[kept], portfolios[rows]]),
+            np.concatenate([instruments[kept], output_instruments[outputs]]),
+            np.concatenate([units[kept], units[rows] * unit_ratios[outputs]]),
+            np.concatenate([cost[kept], cost[rows] * cost_ratios[outputs]]),
+        )
+
+    def project(self, frame, until=None):
+        """
+        Projects the holdings after the corporate actions
+
+        :param AggregationFrame frame: The holdings before the corporate actions, as built by ``frame``
+        :param until: Only the actions with an ex date up to and including this date are applied
+
+        :return: AggregationFrame: The projected holdings keyed by 'portfolio' and 'instrument', holdings left with
+        no units and no cost are dropped
+        """
+        portfolio_codes, portfolio_categories = frame.keys["portfolio"]
+        instrument_codes, instrument_categories = frame.keys["instrument"]
+
+        # Extend the instruments of the holdings with those of the actions
+        index = {instrument: code for code, instrument in enumerate(instrument_categories.tolist())}
+        for action in self.actions:
+            for instrument in [action[2]] + [output for output, _, _ in action[5]]:
+                index.setdefault(instrument, len(index))
+        categories = np.empty(len(index), dtype=object)
+        categories[:] = list(index)
+
+        portfolios = portfolio_codes.astype(np.int64)
+        instruments = instrument_codes.astype(np.int64)
+        units = np.nan_to_num(frame.metrics["units"])
+        cost = np.nan_to_num(frame.metrics["cost"])
+
+        for actions in self.passes(until):
+            portfolios, instruments, units, cost = self._apply(portfolios, instruments, units, cost, actions, index)
+
+        projected = AggregationFrame(
+            {"portfolio": (portfolios.astype(np.int32), portfolio_categories),
+             "instrument": (instruments.astype(np.int32), categories)},
+            {"units": units, "cost": cost}).regroup(["portfolio", "instrument"])
+
+        return projected.filter((projected.metrics["units"] != 0) | (projected.metrics["cost"] != 0))
+
+    @staticmethod
+    def compare(projected, actual, tolerance=1e-6):
+        """
+        Compares projected holdings with the holdings in LUSID after the corporate actions were applied
+
+        :param AggregationFrame projected: The projected holdings
+        :param AggregationFrame actual: The holdings from LUSID, as built by ``frame``
+        :param float tolerance: The largest difference in units or cost which is not reported
+
+        :return: list[dict]: The portfolio, instrument and the projected and actual units and cost of each holding
+        which differs
+        """
+        # Encode the keys of both frames together so the holdings can be matched on their codes
+        portfolios, portfolio_categories = AggregationFrame.encode(
+            np.concatenate([projected.key("portfolio"), actual.key("portfolio")]).tolist())
+        instruments, instrument_categories = AggregationFrame.encode(
+            np.concatenate([projected.key("instrument"), actual.key("instrument")]).tolist())
+
+        sign = np.concatenate([np.ones(len(projected)), -np.ones(len(actual))])
+        combined = AggregationFrame(
+            {"portfolio": (portfolios, portfolio_categories), "instrument": (instruments, instrument_categories)},
+            {
+                "projected_units": np.concatenate([projected.metrics["units"], np.zeros(len(actual))]),
+                "actual_units": np.concatenate([np.zeros(len(projected)), actual.metrics["units"]]),
+                "projected_cost": np.concatenate([projected.metrics["cost"], np.zeros(len(actual))]),
+                "actual_cost": np.concatenate([np.zeros(len(projected)), actual.metrics["cost"]]),
+                "units_difference": np.concatenate([projected.metrics["units"], actual.metrics["units"]]) * sign,
+                "cost_difference": np.concatenate([projected.metrics["cost"], actual.metrics["cost"]]) * sign,
+            }).regroup(["portfolio", "instrument"])
+
+        differs = (np.abs(combined.metrics["units_difference"]) > tolerance) | \
+                  (np.abs(combined.metrics["cost_difference"]) > tolerance)
+        return combined.filter(differs).to_rows()
@@ -0,0 +1,225 @@
+import csv
+import threading
+
+import lusid
+import lusid.models as models
+from lusid import ApiException
+from utilities.batch_runner import BatchRunner
+
+
+class CorporateActionLoader:
+    """
+    This class is used for loading a calendar of corporate actions across many corporate action sources into LUSID.
+
+    A calendar has one row per output of a transition. Rows with the same source and corporate action code make up
+    one corporate action, and within it rows with the same input instrument make up one transition. The instruments
+    are resolved to LUSID instrument ids in bulk through a cache, and the corporate actions of each source are
+    upserted in concurrent chunks.
+    """
+
+    # The columns of a calendar, the factors of the input default to 1 when empty
+    columns = ("source_scope", "source_code", "corporate_action_code", "description", "announcement_date",
+               "ex_date", "record_date", "payment_date", "input_identifier", "input_units_factor",
+               "input_cost_factor", "output_identifier", "output_units_factor", "output_cost_factor")
+
+    lusid_instrument_id = "Instrument/default/LusidInstrumentId"
+
+    # The most corporate actions LUSID accepts in one request
+    max_chunk_size = 10000
+
+    def __init__(self, corporate_action_sources_api: lusid.CorporateActionSourcesApi,
+                 instruments_api: lusid.InstrumentsApi, identifier_type="Figi", chunk_size=1000, max_workers=8,
+                 lookup_chunk_size=500):
+        """
+
+        Parameters
+        ----------
+        corporate_action_sources_api : lusid.CorporateActionSourcesApi
+            The api used to upsert the corporate actions
+        instruments_api : lusid.InstrumentsApi
+            The api used to resolve the instruments of the calendar
+        identifier_type : str, optional
+            The type of the instrument identifiers in the calendar e.g. 'Figi' or 'Isin'
+        chunk_size : int, optional
+            The number of corporate actions sent in each request, at most 10000
+        max_workers : int, optional
+            The number of requests to send concurrently
+        lookup_chunk_size : int, optional
+            The number of identifiers resolved in each ``get_instruments`` request
+        """
+        if not 1 <= chunk_size <= self.max_chunk_size:
+            raise ValueError(f"chunk_size must be between 1 and {self.max_chunk_size}, got {chunk_size}")
+
+        self.corporate_action_sources_api = corporate_action_sources_api
+        self.instruments_api = instruments_api
+        self.identifier_type = identifier_type
+        self.chunk_size = chunk_size
+        self.lookup_chunk_size = lookup_chunk_size
+        self.runner = BatchRunner(max_workers=max_workers)
+
+        # The LUSID instrument id of each identifier resolved so far, None for identifiers with no instrument
+        self._instruments = {}
+        self._lock = threading.Lock()
+
+        # A single configuration shared by every model built by the loader
+        self._configuration = lusid.Configuration()
+
+    @staticmethod
+    def read_csv(path):
+        """
+        Generator reading the rows of a calendar from a CSV file with a header of the ``columns``
+
+        :param str path: The path of the file
+
+        :return: Iterator[dict]: The rows
+        """
+        with open(path, newline="") as csv_file:
+            yield from csv.DictReader(csv_file)
+
+    def resolve(self, identifiers):
+        """
+        Resolves instrument identifiers to LUSID instrument ids, only identifiers not resolved before are requested
+
+        :param iterable[str] identifiers: The identifiers, of the ``identifier_type`` of the loader
+
+        :return: dict[str, str]: The LUSID instrument id of each identifier, None when there is no instrument
+        """
+        identifiers = set(identifiers)
+        with self._lock:
+            unresolved = sorted(identifiers.difference(self._instruments))
+
+        def lookup(chunk):
+            response = self.instruments_api.get_instruments(identifier_type=self.identifier_type, request_body=chunk)
+            resolved = {identifier: instrument.lusid_instrument_id
+                        for identifier, instrument in response.values.items()}
+            with self._lock:
+                self._instruments.update({identifier: resolved.get(identifier) for identifier in chunk})
+            return []
+
+        if unresolved:
+            result = self.runner.run(lookup, BatchRunner.chunk(unresolved, self.lookup_chunk_size))
+            if result.failed_chunks:
+                raise result.failed_chunks[0][1]
+
+        with self._lock:
+            return {identifier: self._instruments[identifier] for identifier in identifiers}
+
+    @staticmethod
+    def _factor(value, default=None):
+        if value is None or value == "":
+            if default is None:
+                raise ValueError("A factor of an output is missing")
+            return default
+        return float(value)
+
+    def _component(self, instrument_id, units_factor, cost_factor):
+        return models.CorporateActionTransitionComponentRequest(
+            instrument_identifiers={self.lusid_instrument_id: instrument_id},
+            units_factor=units_factor,
+            cost_factor=cost_factor,
+            local_vars_configuration=self._configuration)
+
+    def build(self, rows):
+        """
+        Builds the corporate action requests of a calendar, grouped by corporate action source
+
+        :param iterable[dict] rows: The rows of the calendar
+
+        :return: (dict[(str, str), list[UpsertCorporateActionRequest]], list[tuple]): The requests of each
+        (scope, code) of a source, and the corporate actions which could not be built as
+        ((scope, code, corporate action code), reason) tuples
+        """
+        # Group the outputs by source, corporate action and input, keeping the order of the calendar
+        actions = {}
+        for row in rows:
+            key = (row["source_scope"], row["source_code"], row["corporate_action_code"])
+            action = actions.get(key)
+            if action is None:
+                action = actions[key] = {"row": row, "transitions": {}}
+            action["transitions"].setdefault(row["input_identifier"], []).append(row)
+
+        instruments = self.resolve(
+            identifier
+            for action in actions.values()
+            for input_identifier, outputs in action["transitions"].items()
+            for identifier in [input_identifier] + [output["output_identifier"] for output in outputs]
+        )
+
+        requests, rejected = {}, []
+        for (scope, code, corporate_action_code), action in actions.items():
+            try:
+                transitions = []
+                for input_identifier, outputs in action["transitions"].items():
+                    missing = [identifier for identifier in
+                               [input_identifier] + [output["output_identifier"] for output in outputs]
+                               if instruments[identifier] is None]
+                    if missing:
+                        raise ValueError(f"No instrument with the {self.identifier_type} {', '.join(missing)}")
+
+                    first = outputs[0]
+                    transitions.append(models.CorporateActionTransitionRequest(
+                        input_transition=self._component(instruments[input_identifier],
+                                                         self._factor(first.get("input_units_factor"), 1.0),
+                                                         self._factor(first.get("input_cost_factor"), 1.0)),
+                        output_transitions=[
+                            self._component(instruments[output["output_identifier"]],
+                                            self._factor(output["output_units_factor"]),
+                                            self._factor(output["output_cost_factor"]))
+                            for output in outputs
+                        ],
+                        local_vars_configuration=self._configuration))
+
+                row = action["row"]
+                request = models.UpsertCorporateActionRequest(
+                    corporate_action_code=corporate_action_code,
+                    description=row.get("description") or None,
+                    announcement_date=row["announcement_date"],
+                    ex_date=row["ex_date"],
+                    record_date=row["record_date"],
+                    payment_date=row["payment_date"],
+                    transitions=transitions,
+                    local_vars_configuration=self._configuration)
+            except (ValueError, KeyError) as ex:
+                rejected.append(((scope, code, corporate_action_code), str(ex)))
+                continue
+
+            requests.setdefault((scope, code), []).append(request)
+
+        return requests, rejected
+
+    def _upsert_chunk(self, chunk):
+        (scope, code), _ = chunk[0]
+        requests = [request for _, request in chunk]
+        try:
+            response = self.corporate_action_sources_api.batch_upsert_corporate_actions(
+                scope=scope, code=code, upsert_corporate_action_request=requests)
+        except ApiException as ex:
+            # A validation failure of the whole request is reported against each of its corporate actions
+            if ex.status != 400:
+                raise
+            return [((scope, code, request.corporate_action_code), ex.body) for request in requests]
+
+        return [((scope, code, corporate_action_code), error.detail or error.type)
+                for corporate_action_code, error in (response.failed or {}).items()]
+
+    def upsert(self, calendar):
+        """
+        Upserts the corporate actions of a calendar into their sources
+
+        :param calendar: The calendar, either the path of a CSV file accepted by ``read_csv`` or an iterable of rows
+
+        :return: BatchResult: The result, with the corporate actions which could not be built or were rejected by
+        LUSID as ((scope, code, corporate action code), reason) tuples
+        """
+        rows = self.read_csv(calendar) if isinstance(calendar, str) else calendar
+        requests, rejected = self.build(rows)
+
+        chunks = (
+            [(source, request) for request in chunk]
+            for source, source_requests in requests.items()
+            for chunk in BatchRunner.chunk(source_requests, self.chunk_size)
+        )
+
+        result = self.runner.run(self._upsert_chunk, chunks)
+        result.rejected.extend(rejected)
+        return result
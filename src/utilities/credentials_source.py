@@ -1,7 +1,9 @@
 import json
 import os
+import threading
 from pathlib import Path
 import lusid.utilities
+from lusid.utilities import ApiConfiguration, ProxyConfig
 
 
 class CredentialsSource:
@@ -32,82 +34,122 @@ class CredentialsSource:
     def fetch_pat(cls):
         return os.getenv("FBN_ACCESS_TOKEN", None)
 
+    # The environment variables and secrets file entries of the required and optional configuration
+    _required_keys = {
+        "token_url": ("FBN_TOKEN_URL", "api", "tokenUrl"),
+        "username": ("FBN_USERNAME", "api", "username"),
+        "password": ("FBN_PASSWORD", "api", "password"),
+        "client_id": ("FBN_CLIENT_ID", "api", "clientId"),
+        "client_secret": ("FBN_CLIENT_SECRET", "api", "clientSecret"),
+        "api_url": ("FBN_LUSID_API_URL", "api", "apiUrl"),
+    }
+    _optional_keys = {
+        "app_name": ("FBN_APP_NAME", "api", "applicationName"),
+        "certificate_filename": ("FBN_CLIENT_CERTIFICATE", "api", "clientCertificate"),
+        "proxy_address": ("FBN_PROXY_ADDRESS", "proxy", "address"),
+        "proxy_username": ("FBN_PROXY_USERNAME", "proxy", "username"),
+        "proxy_password": ("FBN_PROXY_PASSWORD", "proxy", "password"),
+    }
+
+    _cache_lock = threading.Lock()
+    _cache = None
+
+    @classmethod
+    def _secrets_stamp(cls, credentials):
+        try:
+            stat = os.stat(credentials)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @classmethod
+    def _load(cls, credentials):
+        """
+        Parses the secrets file, None when there is none
+        """
+        if not os.path.isfile(credentials):
+            return None
+        with open(credentials) as secrets_file:
+            return json.load(secrets_file)
+
     @classmethod
-    def fetch_credentials(cls):
+    def _secrets(cls):
+        """
+        The contents of the secrets file, only parsed again when its modification time or size changes
+        """
         credentials = cls.secrets_path()
+        key = (str(credentials), cls._secrets_stamp(credentials))
+
+        cache = cls._cache
+        if cache is None or cache[0] != key:
+            with cls._cache_lock:
+                cache = cls._cache
+                if cache is None or cache[0] != key:
+                    cache = (key, cls._load(credentials))
+                    cls._cache = cache
 
-        # Get all the required variables available as environment variables
-        vars = {
-            "token_url": os.getenv("FBN_TOKEN_URL", None),
-            "username": os.getenv("FBN_USERNAME", None),
-            "password": os.getenv("FBN_PASSWORD", None),
-            "client_id": os.getenv("FBN_CLIENT_ID", None),
-            "client_secret": os.getenv("FBN_CLIENT_SECRET", None),
-            "api_url": os.getenv("FBN_LUSID_API_URL", None)
-        }
-
-        # If there is a secrets file get the required variables from here too
-        if os.path.isfile(credentials):
-            with open(credentials) as secrets_file:
-                secrets = json.load(secrets_file)
-
-                config_vars = {
-                    "token_url": secrets["api"].get("tokenUrl", None),
-                    "username": secrets["api"].get("username", None),
-                    "password": secrets["api"].get("password", None),
-                    "client_id": secrets["api"].get("clientId", None),
-                    "client_secret": secrets["api"].get("clientSecret", None),
-                    "api_url": secrets["api"].get("apiUrl", None),
-                }
-
-            # Enrich the values from the environment variables with the secrets file
-            for key, value in vars.items():
-                if value is None:
-                    vars[key] = config_vars[key]
+        return cache[1]
+
+    @classmethod
+    def _resolve(cls, secrets, secrets_first):
+        """
+        Merges the environment variables with the secrets file, the one taking precedence filling in its values first
+        """
+        def lookup(keys):
+            resolved = {}
+            for key, (env_name, section, name) in keys.items():
+                from_env = os.getenv(env_name, None)
+                from_file = secrets.get(section, {}).get(name, None) if secrets is not None else None
+                resolved[key] = (from_file if from_file is not None else from_env) if secrets_first else \
+                    (from_env if from_env is not None else from_file)
+            return resolved
+
+        vars = lookup(cls._required_keys)
 
         # Allow the Personal Access Token (PAT) to take precedence.
         # If the PAT exists, then an API URL must also exist in either an env var, or the secrets file.
-        if cls.fetch_pat() is not None:
-            vars_pat = {
-                "access_token": cls.fetch_pat(),
-                "api_url": vars.get("api_url", None),
-                "token_url": vars.get("token_url", None),
-                "username": vars.get("username", None),
-                "password": vars.get("password", None),
-                "client_id": vars.get("client_id", None),
-                "client_secret": vars.get("client_secret", None),
-                "api_url": vars.get("api_url", None)
-            }
-            return vars_pat
-
-        if None in vars.values():
+        pat = cls.fetch_pat()
+        if secrets_first and secrets is not None:
+            pat = secrets.get("api", {}).get("accessToken", pat)
+
+        if pat is None and None in vars.values():
             assert False, "Source test configuration missing values from both secrets file and environment variables"
 
-        vars_optional = {
-            "app_name": os.getenv("FBN_APP_NAME", None),
-            "certificate_filename": os.getenv("FBN_CLIENT_CERTIFICATE", None),
-            "proxy_address": os.getenv("FBN_PROXY_ADDRESS", None),
-            "proxy_username": os.getenv("FBN_PROXY_USERNAME", None),
-            "proxy_password": os.getenv("FBN_PROXY_PASSWORD", None)
-        }
-
-        # If there is a secrets file get the required variables from here too
-        if os.path.isfile(credentials):
-            with open(credentials) as secrets_file:
-                secrets = json.load(secrets_file)
-
-                config_vars_optional = {
-                    "app_name": secrets["api"].get("applicationName", None),
-                    "certificate_filename": secrets["api"].get("clientCertificate", None),
-                    "proxy_address": secrets.get("proxy", {}).get("address", None),
-                    "proxy_username": secrets.get("proxy", {}).get("username", None),
-                    "proxy_password": secrets.get("proxy", {}).get("password", None),
-                }
-
-            # Enrich the values from the environment variables with the secrets file
-            for key, value in vars_optional.items():
-                if value is None:
-                    vars_optional[key] = config_vars_optional[key]
-
-        vars.update(vars_optional)
-        return vars
\ No newline at end of file
+        # The application name and proxy apply to either way of authenticating
+        vars.update(lookup(cls._optional_keys))
+        if pat is not None:
+            vars["access_token"] = pat
+        return vars
+
+    @classmethod
+    def fetch_credentials(cls, secrets_first=False):
+        """
+        Resolves the configuration from the environment variables and the secrets file
+
+        The secrets file is only parsed again when its modification time or size changes, otherwise its cached
+        contents are used. This is safe to call from many threads.
+
+        :param bool secrets_first: Whether values in the secrets file take precedence over the environment
+        variables, as they do for the ``ApiConfigurationLoader`` of the SDK, rather than the other way around
+
+        :return: dict: The configuration
+        """
+        return cls._resolve(cls._secrets(), secrets_first)
+
+    @classmethod
+    def api_configuration(cls):
+        """
+        Builds the configuration of an api client from the cached credentials, so that building a client does not
+        read the secrets file again. As with the ``ApiConfigurationLoader`` of the SDK, values in the secrets file
+        take precedence over the environment variables.
+
+        :return: ApiConfiguration: The configuration
+        """
+        credentials = cls.fetch_credentials(secrets_first=True)
+        proxy_address = credentials.pop("proxy_address", None)
+        proxy_username = credentials.pop("proxy_username", None)
+        proxy_password = credentials.pop("proxy_password", None)
+        if proxy_address is not None:
+            credentials["proxy_config"] = ProxyConfig(address=proxy_address, username=proxy_username,
+                                                      password=proxy_password)
+        return ApiConfiguration(**credentials)
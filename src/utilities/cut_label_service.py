@@ -0,0 +1,213 @@
+import threading
+
+import numpy as np
+import pytz
+
+import lusid
+import lusid.models as models
+from lusid import ApiException
+
+
+class CutLabelService:
+    """
+    This class is used for resolving cut labels to UTC instants locally, from definitions loaded once from LUSID.
+
+    The UTC offset of a cut label depends on the date, as the local time of the cut is fixed through daylight
+    saving changes. The offsets are held in a table per time zone and cut time with one entry per day, so that
+    arrays of dates are converted by a lookup rather than a time zone calculation per row.
+    """
+
+    def __init__(self, cut_label_definitions_api: lusid.CutLabelDefinitionsApi):
+        """
+
+        Parameters
+        ----------
+        cut_label_definitions_api : lusid.CutLabelDefinitionsApi
+            The api used to list and create the cut label definitions
+        """
+        self.cut_label_definitions_api = cut_label_definitions_api
+        self._lock = threading.Lock()
+        self._definitions = None
+
+        # The offset tables keyed by (time zone, seconds after midnight of the cut), each holding the first day
+        # covered and the offset in seconds of every day from it
+        self._offset_tables = {}
+
+    @property
+    def definitions(self):
+        """
+        The cut label definitions keyed by code, loaded from LUSID on first use
+        """
+        if self._definitions is None:
+            self.load()
+        return self._definitions
+
+    def load(self):
+        """
+        Loads every cut label definition from LUSID, replacing any already loaded
+
+        :return: dict[str, CutLabelDefinition]: The definitions keyed by code
+        """
+        definitions = {}
+        page = None
+        while True:
+            response = self.cut_label_definitions_api.list_cut_label_definitions(
+                **({"page": page} if page is not None else {}))
+            definitions.update((definition.code, definition) for definition in response.values)
+            page = response.next_page
+            if page is None:
+                break
+
+        with self._lock:
+            self._definitions = definitions
+        return definitions
+
+    @staticmethod
+    def _same_definition(existing, definition):
+        return existing.cut_local_time == definition.cut_local_time and existing.time_zone == definition.time_zone
+
+    def create(self, definitions):
+        """
+        Creates the cut label definitions which are not already in LUSID
+
+        :param list[CutLabelDefinition] definitions: The definitions to create
+
+        :return: list[str]: The codes of the definitions which were created
+        """
+        created = []
+        for definition in definitions:
+            existing = self.definitions.get(definition.code)
+            if existing is not None:
+                if not self._same_definition(existing, definition):
+                    raise ValueError(f"Cut label {definition.code} already exists with a different time or zone")
+                continue
+
+            try:
+                result = self.cut_label_definitions_api.create_cut_label_definition(
+                    create_cut_label_definition_request=models.CreateCutLabelDefinitionRequest(
+                        code=definition.code,
+                        display_name=definition.display_name,
+                        description=definition.description,
+                        cut_local_time=definition.cut_local_time,
+                        time_zone=definition.time_zone))
+                created.append(definition.code)
+            except ApiException as ex:
+                # Created elsewhere since the definitions were loaded
+                if ex.status != 409:
+                    raise
+                result = definition
+
+            with self._lock:
+                self._definitions[definition.code] = result
+
+        return created
+
+    def _resolve(self, code):
+        """
+        Returns the time zone and the seconds after midnight of the cut of a cut label
+        """
+        definition = self.definitions.get(code)
+        if definition is None:
+            # The label may have been created since the definitions were loaded
+            definition = self.load().get(code)
+            if definition is None:
+                raise ValueError(f"Cut label {code} does not exist")
+
+        cut_local_time = definition.cut_local_time
+        return definition.time_zone, cut_local_time.hours * 3600 + cut_local_time.minutes * 60
+
+    @staticmethod
+    def _offsets_from(time_zone, seconds, first_day, last_day):
+        """
+        Computes the UTC offset in seconds of the local cut time on every day from first_day to last_day
+        """
+        zone = pytz.timezone(time_zone)
+        days = np.arange(first_day, last_day + 1, dtype="datetime64[D]")
+        wall_clock = (days.astype("datetime64[s]") + np.timedelta64(seconds, "s")).tolist()
+        return np.array([
+            zone.localize(local, is_dst=False).utcoffset().total_seconds() for local in wall_clock
+        ], dtype=np.int64)
+
+    def offsets(self, time_zone, seconds, days):
+        """
+        Looks up the UTC offset of a local cut time on each day, extending the table of the zone by whole years
+        to cover the days where needed
+
+        :param str time_zone: The time zone of the cut
+        :param int seconds: The seconds after midnight of the cut
+        :param numpy.ndarray days: The days as datetime64[D]
+
+        :return: numpy.ndarray: The offset in seconds on each day
+        """
+        if len(days) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        key = (time_zone, seconds)
+        first = days.min().astype("datetime64[Y]").astype("datetime64[D]")
+        last = (days.max().astype("datetime64[Y]") + 1).astype("datetime64[D]") - 1
+
+        with self._lock:
+            start, table = self._offset_tables.get(key, (first, np.zeros(0, dtype=np.int64)))
+            end = start + len(table) - 1
+
+            if len(table) == 0:
+                start, table = first, self._offsets_from(time_zone, seconds, first, last)
+            else:
+                if first < start:
+                    table = np.concatenate([self._offsets_from(time_zone, seconds, first, start - 1), table])
+                    start = first
+                if last > end:
+                    table = np.concatenate([table, self._offsets_from(time_zone, seconds, end + 1, last)])
+
+            self._offset_tables[key] = (start, table)
+
+        return table[(days - start).astype(np.int64)]
+
+    @staticmethod
+    def _days(dates):
+        dates = np.asarray(dates)
+        if dates.dtype.kind == "M":
+            return dates.astype("datetime64[D]")
+        return np.array([
+            np.datetime64(date.date() if hasattr(date, "date") else str(date)[:10], "D") for date in dates.flat
+        ], dtype="datetime64[D]").reshape(dates.shape)
+
+    def to_utc(self, dates, cut_labels):
+        """
+        Converts (date, cut label) pairs to UTC instants
+
+        :param dates: The local dates, as datetime64, dates or ISO 8601 strings
+        :param cut_labels: The code of the cut label of each date, or a single code for every date
+
+        :return: numpy.ndarray: The UTC instants as datetime64[s]
+        """
+        days = self._days(dates).reshape(-1)
+        cut_labels = np.broadcast_to(np.asarray(cut_labels, dtype=object), days.shape)
+
+        instants = np.empty(len(days), dtype="datetime64[s]")
+        codes, inverse = np.unique(cut_labels.astype(str), return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        # One lookup per distinct cut label
+        for index, code in enumerate(codes):
+            rows = inverse == index
+            time_zone, seconds = self._resolve(code)
+            offsets = self.offsets(time_zone, seconds, days[rows])
+            instants[rows] = days[rows].astype("datetime64[s]") + (seconds - offsets).astype("timedelta64[s]")
+
+        return instants
+
+    @staticmethod
+    def labels(dates, cut_labels):
+        """
+        Formats (date, cut label) pairs as the cut label dates accepted in place of an effective date e.g.
+        '2020-01-01NLondonOpen'
+
+        :param dates: The local dates, as datetime64, dates or ISO 8601 strings
+        :param cut_labels: The code of the cut label of each date, or a single code for every date
+
+        :return: numpy.ndarray: The cut label dates
+        """
+        days = CutLabelService._days(dates)
+        return np.char.add(np.char.add(np.datetime_as_string(days, unit="D"), "N"),
+                           np.asarray(cut_labels, dtype=str))
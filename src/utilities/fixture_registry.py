@@ -0,0 +1,199 @@
+import atexit
+import threading
+from datetime import datetime
+
+import pytz
+
+import lusid
+import lusid.models as models
+from utilities.id_generator import IdGenerator
+from utilities.id_generator_utilities import delete_entities
+from utilities.instrument_loader import InstrumentLoader
+from utilities.request_body_encoder import RequestBodyEncoder
+from utilities.test_data_utilities import TestDataUtilities
+
+
+class SeededPortfolio:
+    """
+    This class holds a transaction portfolio created by the FixtureRegistry and the transactions it was seeded with
+    """
+
+    def __init__(self, scope, code, effective_date, transactions, body=None):
+        self.scope = scope
+        self.code = code
+        self.effective_date = effective_date
+        self.transactions = transactions
+        # The transactions as sent, prepared once so that clones of the portfolio reuse the serialised body
+        self.body = body if body is not None else transactions
+
+    def __repr__(self):
+        return f"SeededPortfolio(scope={self.scope!r}, code={self.code!r}, transactions={len(self.transactions)})"
+
+
+class FixtureRegistry:
+    """
+    This class is used for building the canonical datasets of the tutorials once per test session.
+
+    Tests which only read a dataset share the one built by the first test to ask for it. Tests which modify a
+    portfolio ask for a clone, a new portfolio holding a copy of the transactions of the shared portfolio, so that
+    the shared portfolio is never changed. Everything the registry creates is deleted when the session ends.
+    """
+
+    # The date the seeded portfolio and the quotes are effective from
+    effective_date = datetime(2019, 4, 15, tzinfo=pytz.utc)
+
+    # The price each of the first three instruments is bought at and the price it is quoted at
+    transaction_prices = [101, 102, 103]
+    quote_prices = [100, 200, 300]
+
+    _session = None
+    _session_lock = threading.Lock()
+
+    def __init__(self, api_client):
+        """
+
+        Parameters
+        ----------
+        api_client : lusid.ApiClient
+            The api client used to build the datasets
+        """
+        self.transaction_portfolios_api = lusid.TransactionPortfoliosApi(api_client)
+        self.instruments_api = lusid.InstrumentsApi(api_client)
+        self.quotes_api = lusid.QuotesApi(api_client)
+        self.test_data_utilities = TestDataUtilities(self.transaction_portfolios_api)
+        self.id_generator = IdGenerator(scope=TestDataUtilities.tutorials_scope)
+
+        self._lock = threading.Lock()
+        self._name_locks = {}
+        self._datasets = {}
+
+    @classmethod
+    def session(cls):
+        """
+        The registry shared by every test in the session, which cleans up after itself when the session ends
+
+        :return: FixtureRegistry: The registry
+        """
+        if not cls._session:
+            with cls._session_lock:
+                if not cls._session:
+                    cls._session = cls(TestDataUtilities.api_client())
+                    atexit.register(cls._session.close)
+        return cls._session
+
+    def close(self):
+        """
+        Deletes every entity the registry created
+
+        :return: None
+        """
+        delete_entities(self.id_generator)
+        self._datasets.clear()
+
+    def get(self, name, build):
+        """
+        Returns a dataset, building it on first use. Each dataset is built once even when many threads ask for it.
+
+        :param str name: The name of the dataset
+        :param callable build: Function building the dataset
+
+        :return: The dataset
+        """
+        with self._lock:
+            if name in self._datasets:
+                return self._datasets[name]
+            name_lock = self._name_locks.setdefault(name, threading.Lock())
+
+        with name_lock:
+            if name not in self._datasets:
+                dataset = build()
+                with self._lock:
+                    self._datasets[name] = dataset
+            return self._datasets[name]
+
+    def instrument_ids(self):
+        """
+        The LUSID instrument ids of the instruments of the InstrumentLoader, loaded once per session
+
+        :return: list[str]: The instrument ids, a copy which the caller may modify
+        """
+        return list(self.get("instruments", lambda: InstrumentLoader(self.instruments_api).load_instruments()))
+
+    def _seed_transactions(self):
+        instrument_ids = self.instrument_ids()
+        return [
+            self.test_data_utilities.build_transaction_request(instrument_id=instrument_id,
+                                                               units=100,
+                                                               price=price,
+                                                               currency="GBP",
+                                                               trade_date=self.effective_date.isoformat(),
+                                                               transaction_type="StockIn")
+            for instrument_id, price in zip(instrument_ids, self.transaction_prices)
+        ]
+
+    def _create_portfolio(self, scope, body, id_generator):
+        code = self.test_data_utilities.create_transaction_portfolio(scope)
+        id_generator.add_scope_and_code("portfolio", scope, code)
+        self.transaction_portfolios_api.upsert_transactions(scope=scope, code=code, transaction_request=body)
+        return code
+
+    def _create_seeded_portfolio(self):
+        transactions = self._seed_transactions()
+        scope = TestDataUtilities.tutorials_scope
+        body = RequestBodyEncoder.prepared(self.transaction_portfolios_api, transactions)
+
+        code = self._create_portfolio(scope, body, self.id_generator)
+
+        return SeededPortfolio(scope, code, self.effective_date, transactions, body)
+
+    def seeded_portfolio(self):
+        """
+        A transaction portfolio holding 100 units of each of the first three instruments, shared by every test in
+        the session. It must not be modified, use ``clone_portfolio`` for a portfolio which may be modified.
+
+        :return: SeededPortfolio: The portfolio
+        """
+        return self.get("seeded_portfolio", self._create_seeded_portfolio)
+
+    def clone_portfolio(self, id_generator=None):
+        """
+        Creates a new portfolio holding a copy of the transactions of the shared portfolio, for a test to modify.
+        The transactions keep their ids, which only need to be unique within a portfolio.
+
+        :param IdGenerator id_generator: The generator to record the clone in for deletion, defaults to the
+        registry's own so that the clone is deleted when the session ends
+
+        :return: SeededPortfolio: The clone
+        """
+        seeded = self.seeded_portfolio()
+        code = self._create_portfolio(seeded.scope, seeded.body, id_generator or self.id_generator)
+        return SeededPortfolio(seeded.scope, code, seeded.effective_date, list(seeded.transactions), seeded.body)
+
+    def _upsert_quotes(self):
+        instrument_ids = self.instrument_ids()
+        requests = {
+            f"quote{index}": models.UpsertQuoteRequest(
+                quote_id=models.QuoteId(
+                    models.QuoteSeriesId(
+                        provider="Lusid",
+                        instrument_id=instrument_id,
+                        instrument_id_type="LusidInstrumentId",
+                        quote_type="Price",
+                        field="mid",
+                    ),
+                    effective_at=self.effective_date.isoformat(),
+                ),
+                metric_value=models.MetricValue(value=price, unit="GBP"),
+            )
+            for index, (instrument_id, price) in enumerate(zip(instrument_ids, self.quote_prices))
+        }
+        self.quotes_api.upsert_quotes(TestDataUtilities.tutorials_scope, request_body=requests)
+        return TestDataUtilities.tutorials_scope
+
+    def quote_set(self):
+        """
+        Mid prices from the 'Lusid' provider of the first three instruments, upserted once per session
+
+        :return: str: The scope of the quotes
+        """
+        return self.get("quotes", self._upsert_quotes)
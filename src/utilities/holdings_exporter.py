@@ -0,0 +1,287 @@
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import pytz
+
+import lusid
+from utilities.batch_runner import BatchRunner
+
+
+class HoldingsExport:
+    """
+    This class is used for reporting the outcome of a holdings snapshot export
+    """
+
+    def __init__(self, path, as_at, effective_at, result, rows, skipped, peak_memory, arrow_memory=None):
+        self.path = path
+        self.as_at = as_at
+        self.effective_at = effective_at
+        self.result = result
+        self.rows = rows
+        self.skipped = skipped
+        # The peak memory allocated by Python objects, which does not include the native buffers of Arrow
+        self.peak_memory = peak_memory
+        # The most memory held by the Arrow memory pool while a portfolio was being written
+        self.arrow_memory = arrow_memory
+
+    @property
+    def elapsed(self):
+        """
+        The time taken to export the whole scope in seconds
+        """
+        return self.result.elapsed
+
+    def __repr__(self):
+        peak_memory, arrow_memory = ("n/a" if memory is None else f"{memory / 2 ** 20:.1f}MiB"
+                                     for memory in (self.peak_memory, self.arrow_memory))
+        return f"HoldingsExport(portfolios={self.result.succeeded}, skipped={self.skipped}, " \
+               f"failed={len(self.result.failed_chunks)}, rows={self.rows}, elapsed={self.elapsed:.3f}s, " \
+               f"peak_memory={peak_memory}, arrow_memory={arrow_memory})"
+
+
+class HoldingsExporter:
+    """
+    This class is used for exporting a consistent snapshot of the holdings of every portfolio in a scope to a
+    columnar dataset.
+
+    The holdings of each portfolio are written to their own file in the dataset directory as soon as they are
+    fetched, so that memory is bounded by the portfolios in flight and an interrupted export can be resumed by
+    exporting to the same directory again. The whole directory reads back as one table with ``read``.
+    """
+
+    manifest_name = "_manifest.json"
+    extensions = {"parquet": "parquet", "ipc": "arrow"}
+
+    schema = pa.schema([
+        ("portfolio_scope", pa.string()),
+        ("portfolio_code", pa.string()),
+        ("instrument_scope", pa.string()),
+        ("instrument_uid", pa.string()),
+        ("sub_holding_keys", pa.string()),
+        ("holding_type", pa.string()),
+        ("units", pa.float64()),
+        ("settled_units", pa.float64()),
+        ("currency", pa.string()),
+        ("cost", pa.float64()),
+        ("cost_currency", pa.string()),
+        ("cost_portfolio_ccy", pa.float64()),
+        ("cost_portfolio_ccy_currency", pa.string()),
+    ])
+
+    def __init__(self, portfolios_api: lusid.PortfoliosApi, transaction_portfolios_api: lusid.TransactionPortfoliosApi,
+                 max_workers=8, file_format="parquet"):
+        """
+
+        Parameters
+        ----------
+        portfolios_api : lusid.PortfoliosApi
+            The api used to list the portfolios in a scope
+        transaction_portfolios_api : lusid.TransactionPortfoliosApi
+            The api used to get the holdings of each portfolio
+        max_workers : int, optional
+            The number of portfolios to fetch concurrently
+        file_format : str, optional
+            The format of the dataset, 'parquet' or 'ipc' for Arrow IPC files
+        """
+        if file_format not in self.extensions:
+            raise ValueError(f"Unsupported file format '{file_format}', expected one of {list(self.extensions)}")
+
+        self.portfolios_api = portfolios_api
+        self.transaction_portfolios_api = transaction_portfolios_api
+        self.runner = BatchRunner(max_workers=max_workers)
+        self.file_format = file_format
+
+    def list_portfolio_codes(self, scope, as_at, effective_at):
+        """
+        Generator paging through the codes of the transaction portfolios in a scope
+
+        :param str scope: The scope
+        :param str as_at: The as at to list the portfolios at
+        :param str effective_at: The effective date to list the portfolios at
+
+        :return: Iterator[str]: The portfolio codes
+        """
+        page = None
+        while True:
+            kwargs = {"page": page} if page is not None else {"as_at": as_at, "effective_at": effective_at}
+            response = self.portfolios_api.list_portfolios_for_scope(scope=scope, **kwargs)
+
+            for portfolio in response.values:
+                # Only transaction portfolios and derived transaction portfolios have holdings
+                if portfolio.type in ("Transaction", "DerivedTransaction"):
+                    yield portfolio.id.code
+
+            page = response.next_page
+            if page is None:
+                return
+
+    @staticmethod
+    def _property_value(model_property):
+        if model_property is None or model_property.value is None:
+            return None
+        value = model_property.value
+        if value.label_value is not None:
+            return value.label_value
+        if value.metric_value is not None:
+            return str(value.metric_value.value)
+        return None
+
+    @staticmethod
+    def _amounts(holdings, attribute):
+        amounts = [getattr(holding, attribute) for holding in holdings]
+        return [None if amount is None else amount.amount for amount in amounts], \
+            [None if amount is None else amount.currency for amount in amounts]
+
+    def to_record_batch(self, scope, code, holdings, property_keys=()):
+        """
+        Converts the holdings of a portfolio to an Arrow record batch, with one string column per property key
+
+        :param str scope: The scope of the portfolio
+        :param str code: The code of the portfolio
+        :param list[PortfolioHolding] holdings: The holdings
+        :param list[str] property_keys: The keys of the properties decorated onto the holdings
+
+        :return: pyarrow.RecordBatch: The holdings
+        """
+        cost, cost_currency = self._amounts(holdings, "cost")
+        cost_portfolio_ccy, cost_portfolio_ccy_currency = self._amounts(holdings, "cost_portfolio_ccy")
+
+        columns = [
+            [scope] * len(holdings),
+            [code] * len(holdings),
+            [holding.instrument_scope for holding in holdings],
+            [holding.instrument_uid for holding in holdings],
+            [
+                ";".join(f"{key}={self._property_value(value)}" for key, value in sorted(keys.items()))
+                if keys else None
+                for keys in (holding.sub_holding_keys for holding in holdings)
+            ],
+            [holding.holding_type for holding in holdings],
+            [holding.units for holding in holdings],
+            [holding.settled_units for holding in holdings],
+            [holding.currency for holding in holdings],
+            cost,
+            cost_currency,
+            cost_portfolio_ccy,
+            cost_portfolio_ccy_currency,
+        ]
+        columns.extend(
+            [self._property_value((holding.properties or {}).get(key)) for holding in holdings]
+            for key in property_keys
+        )
+
+        schema = self.schema
+        for key in property_keys:
+            schema = schema.append(pa.field(key, pa.string()))
+
+        return pa.RecordBatch.from_arrays([pa.array(column, type=field.type)
+                                           for column, field in zip(columns, schema)], schema=schema)
+
+    def _write(self, batch, path):
+        # Written under a hidden name and renamed, so that a part file only exists once it is complete
+        temp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+        if self.file_format == "parquet":
+            pq.write_table(pa.Table.from_batches([batch]), temp_path)
+        else:
+            with pa.OSFile(temp_path, "wb") as sink, ipc.new_file(sink, batch.schema) as writer:
+                writer.write_batch(batch)
+        os.replace(temp_path, path)
+
+    def _read_manifest(self, path, scope):
+        manifest_path = os.path.join(path, self.manifest_name)
+        if not os.path.isfile(manifest_path):
+            return None
+
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest["scope"] != scope or manifest["file_format"] != self.file_format:
+            raise ValueError(f"{path} holds a {manifest['file_format']} export of scope {manifest['scope']}")
+        return manifest
+
+    def export(self, scope, path, as_at=None, effective_at=None, property_keys=(), trace_memory=False):
+        """
+        Exports the holdings of every transaction portfolio in a scope at a pinned as at
+
+        When the directory already holds an export of the scope, the as at and effective date it was started
+        with are reused and the portfolios already written are skipped, completing the snapshot.
+
+        :param str scope: The scope of the portfolios
+        :param str path: The directory of the dataset, created if it does not exist
+        :param as_at: The as at of the snapshot, defaults to now
+        :param effective_at: The effective date or cut label of the holdings, defaults to the as at
+        :param list[str] property_keys: Keys of properties to decorate onto the holdings, each exported as a column
+        :param bool trace_memory: Whether to trace the peak memory allocated by Python objects during the export
+        with tracemalloc, which slows every allocation down. When the caller is already tracing, its tracing is left
+        running and the peak reported is the peak since it started.
+
+        :return: HoldingsExport: The report of the export, including its duration and peak memory
+        """
+        os.makedirs(path, exist_ok=True)
+        property_keys = list(property_keys)
+
+        manifest = self._read_manifest(path, scope)
+        if manifest is None:
+            as_at = as_at if as_at is not None else datetime.now(pytz.utc)
+            as_at = as_at if isinstance(as_at, str) else as_at.isoformat()
+            effective_at = effective_at if effective_at is not None else as_at
+            effective_at = effective_at if isinstance(effective_at, str) else effective_at.isoformat()
+
+            manifest = {"scope": scope, "as_at": as_at, "effective_at": effective_at,
+                        "file_format": self.file_format, "property_keys": property_keys}
+            with open(os.path.join(path, self.manifest_name), "w") as manifest_file:
+                json.dump(manifest, manifest_file)
+
+        as_at, effective_at = manifest["as_at"], manifest["effective_at"]
+        property_keys = manifest["property_keys"]
+        extension = self.extensions[self.file_format]
+
+        # Only tracing started here is stopped here
+        start_tracing = trace_memory and not tracemalloc.is_tracing()
+        if start_tracing:
+            tracemalloc.start()
+        arrow_memory = [pa.total_allocated_bytes()]
+
+        try:
+            start = time.perf_counter()
+            codes = list(self.list_portfolio_codes(scope, as_at, effective_at))
+            remaining = [code for code in codes if not os.path.isfile(os.path.join(path, f"{code}.{extension}"))]
+            rows = []
+
+            def export_portfolio(chunk):
+                for code in chunk:
+                    holdings = self.transaction_portfolios_api.get_holdings(
+                        scope=scope, code=code, as_at=as_at, effective_at=effective_at,
+                        **({"property_keys": property_keys} if property_keys else {})).values
+                    batch = self.to_record_batch(scope, code, holdings, property_keys)
+                    arrow_memory.append(pa.total_allocated_bytes())
+                    self._write(batch, os.path.join(path, f"{code}.{extension}"))
+                    rows.append(len(holdings))
+                return []
+
+            result = self.runner.run(export_portfolio, BatchRunner.chunk(remaining, 1))
+            result.elapsed = time.perf_counter() - start
+
+            peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        finally:
+            if start_tracing:
+                tracemalloc.stop()
+
+        return HoldingsExport(path, as_at, effective_at, result, sum(rows), len(codes) - len(remaining),
+                              peak_memory, max(arrow_memory))
+
+    def read(self, path):
+        """
+        Reads an exported dataset back as a single table
+
+        :param str path: The directory of the dataset
+
+        :return: pyarrow.Table: The holdings of every portfolio in the export
+        """
+        return ds.dataset(path, format=self.file_format).to_table()
@@ -1,3 +1,4 @@
+import os
 import uuid
 
 
@@ -5,6 +6,9 @@ class IdGenerator:
 
     default_scope = "sdk_example"
 
+    # Environment variable holding the namespace of a worker when the tutorials are run in parallel
+    namespace_variable = "FBN_TEST_NAMESPACE"
+
     def __init__(self, scope=default_scope):
         """
 
@@ -17,6 +21,25 @@ class IdGenerator:
         self.scope = scope if scope is not None else self.default_scope
         self._scope_and_codes = set()
 
+    @classmethod
+    def namespaced(cls, scope):
+        """
+        Qualifies a scope with the namespace of the current worker, so that tests running in parallel processes do
+        not collide on the same scopes and codes
+
+        Parameters
+        ----------
+        scope : str
+            The scope
+
+        Returns
+        -------
+        str
+            The scope suffixed with the namespace, or the scope unchanged when no namespace is set
+        """
+        namespace = os.getenv(cls.namespace_variable)
+        return f"{scope}-{namespace}" if namespace else scope
+
     def generate_scope_and_code(self, entity, scope=None, code_prefix=None, annotations=[]):
         """
         Generate a scope and code
@@ -2,6 +2,7 @@ from collections import namedtuple
 
 import lusid
 import lusid.models as models
+from utilities.request_body_encoder import RequestBodyEncoder
 
 
 class InstrumentLoader:
@@ -28,7 +29,8 @@ class InstrumentLoader:
             ) for i in self.__instruments
         }
 
-        response = self.instruments_api.upsert_instruments(request_body=instruments_to_create)
+        response = self.instruments_api.upsert_instruments(
+            request_body=RequestBodyEncoder.prepared(self.instruments_api, instruments_to_create))
 
         assert (len(response.failed) == 0)
 
@@ -0,0 +1,162 @@
+import json
+import sys
+
+from dateutil.parser import isoparse
+
+import lusid
+import lusid.models as models
+from lusid import ApiException
+from utilities.batch_runner import BatchRunner
+from utilities.request_body_encoder import RequestBodyEncoder
+from utilities.retry_policy import RetryPolicy
+
+
+class OrderLoader:
+    """
+    This class is used for loading a stream of orders into LUSID in concurrent ``OrderSetRequest`` chunks
+    """
+
+    def __init__(self, orders_api: lusid.OrdersApi, chunk_size=1000, max_workers=8, retry_policy=None):
+        """
+
+        Parameters
+        ----------
+        orders_api : lusid.OrdersApi
+            The api used to upsert the orders
+        chunk_size : int, optional
+            The number of orders sent in each ``OrderSetRequest``
+        max_workers : int, optional
+            The number of chunks to upsert concurrently
+        retry_policy : RetryPolicy, optional
+            The policy a request which fails with a transient error is retried under, orders are upserted by their
+            id so sending a request again is safe. When a RequestBodyEncoder is installed on the api client the
+            body of each request is serialised once and the same bytes are sent on every attempt.
+        """
+        self.orders_api = orders_api
+        self.chunk_size = chunk_size
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=1)
+        self.encoder = RequestBodyEncoder.of(orders_api.api_client)
+        self.runner = BatchRunner(max_workers=max_workers)
+
+        # A single configuration shared by every model built by the loader, the models otherwise each take
+        # a copy of the default configuration
+        self._configuration = lusid.Configuration()
+        self._properties = {}
+        self._resource_ids = {}
+
+    def perpetual_property(self, key, value):
+        """
+        Returns a PerpetualProperty for the key and label value, the same instance is returned for repeated
+        keys and values so that an order stream with a small set of property values only holds one of each
+
+        :param str key: The property key e.g. 'Order/scope/TIF'
+        :param str value: The label value of the property
+
+        :return: PerpetualProperty: The interned property
+        """
+        perpetual_property = self._properties.get((key, value))
+        if perpetual_property is None:
+            key = sys.intern(key)
+            perpetual_property = models.PerpetualProperty(
+                key=key,
+                value=models.PropertyValue(label_value=value, local_vars_configuration=self._configuration),
+                local_vars_configuration=self._configuration)
+            self._properties[(key, value)] = perpetual_property
+        return perpetual_property
+
+    def resource_id(self, scope, code):
+        """
+        Returns a ResourceId for the scope and code, the same instance is returned for repeated values
+
+        :param str scope: The scope of the resource
+        :param str code: The code of the resource
+
+        :return: ResourceId: The interned resource id
+        """
+        resource_id = self._resource_ids.get((scope, code))
+        if resource_id is None:
+            resource_id = models.ResourceId(scope=scope, code=code, local_vars_configuration=self._configuration)
+            self._resource_ids[(scope, code)] = resource_id
+        return resource_id
+
+    def build_order_request(self, order):
+        """
+        Builds an OrderRequest from a dictionary, as read from one line of an NDJSON order file
+
+        The dictionary has the keys 'scope', 'code', 'instrument_identifiers', 'quantity', 'side', 'portfolio_scope',
+        'portfolio_code' and optionally 'state', 'type', 'date' and 'properties' (a dictionary of property key
+        to label value).
+
+        :param dict order: The order
+
+        :return: OrderRequest: The order request
+        """
+        date = order.get("date")
+        if isinstance(date, str):
+            date = isoparse(date)
+
+        return models.OrderRequest(
+            properties={
+                sys.intern(key): self.perpetual_property(key, value)
+                for key, value in order.get("properties", {}).items()
+            },
+            instrument_identifiers=order["instrument_identifiers"],
+            quantity=order["quantity"],
+            side=sys.intern(order["side"]),
+            portfolio_id=self.resource_id(order["portfolio_scope"], order["portfolio_code"]),
+            id=models.ResourceId(scope=sys.intern(order["scope"]), code=order["code"],
+                                 local_vars_configuration=self._configuration),
+            state=order.get("state"),
+            type=order.get("type"),
+            date=date,
+            local_vars_configuration=self._configuration)
+
+    @staticmethod
+    def read_ndjson(path):
+        """
+        Generator reading orders from a newline delimited JSON file, one order per line
+
+        :param str path: The path of the file
+
+        :return: Iterator[dict]: The orders
+        """
+        with open(path) as ndjson_file:
+            for line in ndjson_file:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _upsert_chunk(self, order_requests):
+        body = models.OrderSetRequest(order_requests=order_requests, local_vars_configuration=self._configuration)
+        if self.encoder is not None:
+            body = self.encoder.prepare(body)
+        try:
+            self.retry_policy.call(self.orders_api.upsert_orders, order_set_request=body)
+            return []
+        except ApiException as ex:
+            # Only a validation failure is specific to the orders, anything else fails the chunk
+            if ex.status != 400:
+                raise
+
+            if len(order_requests) == 1:
+                return [(order_requests[0].id, ex.body)]
+
+        # Find the rejected orders by splitting the chunk, allowing the valid orders to be saved
+        middle = len(order_requests) // 2
+        return self._upsert_chunk(order_requests[:middle]) + self._upsert_chunk(order_requests[middle:])
+
+    def upsert_orders(self, orders):
+        """
+        Upserts a stream of orders into LUSID
+
+        :param iterable orders: The orders, each either an OrderRequest or a dictionary accepted by
+        ``build_order_request``
+
+        :return: BatchResult: The result, with the rate in orders per second and the rejected orders as
+        (ResourceId, error) tuples
+        """
+        order_requests = (
+            order if isinstance(order, models.OrderRequest) else self.build_order_request(order)
+            for order in orders
+        )
+
+        return self.runner.run(self._upsert_chunk, BatchRunner.chunk(order_requests, self.chunk_size))
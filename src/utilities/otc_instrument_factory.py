@@ -0,0 +1,183 @@
+import hashlib
+
+import numpy as np
+
+import lusid
+import lusid.models as models
+from utilities.batch_runner import BatchRunner
+from utilities.request_body_encoder import RequestBodyEncoder
+from utilities.retry_policy import RetryPolicy
+from utilities.valuation_scheduler import to_datetime64
+
+
+class OtcInstrumentFactory:
+    """
+    This class is used for building and upserting OTC instruments in bulk from columns of trade economics.
+
+    Each instrument is identified by a ClientInternal id derived from a hash of its economics, so identical
+    trades share one instrument and re-running a load does not create duplicates.
+    """
+
+    def __init__(self, instruments_api: lusid.InstrumentsApi, chunk_size=2000, max_workers=8, id_prefix="otc-",
+                 retry_policy=None):
+        """
+
+        Parameters
+        ----------
+        instruments_api : lusid.InstrumentsApi
+            The api used to upsert the instruments
+        chunk_size : int, optional
+            The number of instruments sent in each call to ``upsert_instruments``
+        max_workers : int, optional
+            The number of chunks to upsert concurrently
+        id_prefix : str, optional
+            Prefix for the generated ClientInternal ids
+        retry_policy : RetryPolicy, optional
+            The policy a request which fails with a transient error is retried under, instruments are upserted by
+            their ClientInternal id so sending a request again is safe. The body of each request is serialised once
+            and the same bytes are sent on every attempt when a RequestBodyEncoder is installed on the api client.
+        """
+        self.instruments_api = instruments_api
+        self.chunk_size = chunk_size
+        self.runner = BatchRunner(max_workers=max_workers)
+        self.id_prefix = id_prefix
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=1)
+        self._configuration = lusid.Configuration()
+
+    @staticmethod
+    def columns(**columns):
+        """
+        Converts the columns to numpy arrays of the same length, broadcasting any scalar columns
+
+        Dates are converted to ISO 8601 strings in UTC and amounts to float64.
+
+        :param columns: The columns keyed by name, each a scalar or a sequence
+
+        :return: dict[str, numpy.ndarray]: The columns
+        """
+        arrays = {}
+        for name, values in columns.items():
+            values = np.asarray(values)
+            if name.endswith("_date") and values.dtype.kind != "M":
+                values = np.array([to_datetime64(value) for value in values.flat],
+                                  dtype="datetime64[s]").reshape(values.shape)
+            if values.dtype.kind == "M":
+                values = np.char.add(np.datetime_as_string(values.astype("datetime64[s]"), unit="s"), "Z")
+            arrays[name] = values
+
+        arrays = dict(zip(arrays, np.broadcast_arrays(*arrays.values())))
+        return {name: np.ascontiguousarray(values) for name, values in arrays.items()}
+
+    def economic_ids(self, instrument_type, columns):
+        """
+        Derives an id for each row from a hash of its economics
+
+        :param str instrument_type: The instrument type, part of the economics
+        :param dict[str, numpy.ndarray] columns: The economics of each row
+
+        :return: numpy.ndarray: The ids
+        """
+        keys = np.full(len(next(iter(columns.values()))), instrument_type, dtype=object)
+        for name in sorted(columns):
+            values = columns[name]
+            values = np.char.mod("%.12g", values) if values.dtype.kind in "fiu" else values.astype(str)
+            keys = keys + f"|{name}=" + values.astype(object)
+
+        return np.array([
+            self.id_prefix + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] for key in keys
+        ], dtype=object)
+
+    def _definitions(self, instrument_type, columns, build):
+        """
+        Builds an InstrumentDefinition for each distinct row, keyed by its economic id
+        """
+        ids = self.economic_ids(instrument_type, columns)
+
+        # Identical trades are only built once
+        _, first = np.unique(ids, return_index=True)
+        first.sort()
+
+        definitions = {}
+        for row in first:
+            values = {name: column[row].item() for name, column in columns.items()}
+            definitions[ids[row]] = models.InstrumentDefinition(
+                name=f"{instrument_type} {values['dom_ccy']}/{values['fgn_ccy']}",
+                identifiers={
+                    "ClientInternal": models.InstrumentIdValue(value=ids[row],
+                                                               local_vars_configuration=self._configuration)
+                },
+                definition=build(values),
+                local_vars_configuration=self._configuration)
+        return ids, definitions
+
+    def fx_forwards(self, dom_ccy, fgn_ccy, dom_amount, fgn_amount, start_date, maturity_date):
+        """
+        Builds FxForward definitions from columns of economics, scalars are broadcast to every row
+
+        :return: (numpy.ndarray, dict[str, InstrumentDefinition]): The id of each row and the definition for each
+        distinct id
+        """
+        columns = self.columns(dom_ccy=dom_ccy, fgn_ccy=fgn_ccy, dom_amount=dom_amount, fgn_amount=fgn_amount,
+                               start_date=start_date, maturity_date=maturity_date)
+        columns["dom_amount"] = columns["dom_amount"].astype(np.float64)
+        columns["fgn_amount"] = columns["fgn_amount"].astype(np.float64)
+
+        return self._definitions("FxForward", columns, lambda values: models.FxForward(
+            instrument_type="FxForward", local_vars_configuration=self._configuration, **values))
+
+    def fx_options(self, dom_ccy, fgn_ccy, strike, start_date, option_maturity_date, option_settlement_date,
+                   is_call_not_put, is_delivery_not_cash):
+        """
+        Builds FxOption definitions from columns of economics, scalars are broadcast to every row
+
+        :return: (numpy.ndarray, dict[str, InstrumentDefinition]): The id of each row and the definition for each
+        distinct id
+        """
+        columns = self.columns(dom_ccy=dom_ccy, fgn_ccy=fgn_ccy, strike=strike, start_date=start_date,
+                               option_maturity_date=option_maturity_date,
+                               option_settlement_date=option_settlement_date,
+                               is_call_not_put=is_call_not_put, is_delivery_not_cash=is_delivery_not_cash)
+        columns["strike"] = columns["strike"].astype(np.float64)
+        columns["is_call_not_put"] = columns["is_call_not_put"].astype(bool)
+        columns["is_delivery_not_cash"] = columns["is_delivery_not_cash"].astype(bool)
+
+        return self._definitions("FxOption", columns, lambda values: models.FxOption(
+            instrument_type="FxOption", local_vars_configuration=self._configuration, **values))
+
+    def upsert(self, definitions):
+        """
+        Upserts the definitions into LUSID in concurrent chunks
+
+        The LUSID instrument id of each instrument is taken from the upsert response, so no read back is needed
+        for instruments the response confirms.
+
+        :param dict[str, InstrumentDefinition] definitions: The definitions keyed by their ClientInternal id
+
+        :return: (BatchResult, dict[str, str]): The result, with any failures as (id, ErrorDetail) tuples, and the
+        LUSID instrument id of each upserted instrument keyed by ClientInternal id
+        """
+        lusid_instrument_ids = {}
+
+        def upsert_chunk(chunk):
+            response = self.retry_policy.call(self.instruments_api.upsert_instruments,
+                                              request_body=RequestBodyEncoder.prepared(self.instruments_api,
+                                                                                       dict(chunk)))
+            for client_internal_id, instrument in response.values.items():
+                lusid_instrument_ids[client_internal_id] = instrument.lusid_instrument_id
+            return list(response.failed.items())
+
+        result = self.runner.run(upsert_chunk, BatchRunner.chunk(definitions.items(), self.chunk_size))
+
+        # Only read back instruments which the responses neither confirmed nor rejected
+        not_written = {client_internal_id for client_internal_id, _ in result.rejected}
+        not_written.update(client_internal_id for chunk, _ in result.failed_chunks for client_internal_id, _ in chunk)
+        unconfirmed = [
+            client_internal_id for client_internal_id in definitions
+            if client_internal_id not in lusid_instrument_ids and client_internal_id not in not_written
+        ]
+        for chunk in BatchRunner.chunk(unconfirmed, self.chunk_size):
+            response = self.instruments_api.get_instruments(identifier_type="ClientInternal", request_body=chunk)
+            for client_internal_id, instrument in response.values.items():
+                lusid_instrument_ids[client_internal_id] = instrument.lusid_instrument_id
+
+        return result, lusid_instrument_ids
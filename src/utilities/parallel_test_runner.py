@@ -0,0 +1,248 @@
+import argparse
+import heapq
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import unittest
+import uuid
+
+from utilities.id_generator import IdGenerator
+
+
+class ParallelTestRunner:
+    """
+    This class is used for running the test classes of the tutorials in parallel worker processes.
+
+    Each worker is given its own namespace, which ``IdGenerator.namespaced`` appends to the scopes the tutorials
+    create their entities in, so that workers do not collide. The test classes are sharded across the workers
+    balanced by the durations recorded on previous runs, and the reports of the workers are merged.
+
+    Run from the ``src`` directory with ``python -m utilities.parallel_test_runner tutorials --workers 8``
+    """
+
+    def __init__(self, start_dir, workers=4, durations_path=None, report_dir=None, default_duration=30.0):
+        """
+
+        Parameters
+        ----------
+        start_dir : str
+            The directory to discover test classes in
+        workers : int, optional
+            The number of worker processes
+        durations_path : str, optional
+            Path of a JSON file of the duration of each test class, read to balance the shards and updated after
+            each run. Defaults to ``.test_durations.json`` in the current directory.
+        report_dir : str, optional
+            The directory the report and output of each worker and the merged report are written to, defaults to
+            ``.test_reports`` in the current directory
+        default_duration : float, optional
+            The duration in seconds assumed for a test class with no recorded duration when none are recorded
+        """
+        self.start_dir = start_dir
+        self.workers = workers
+        self.durations_path = durations_path or ".test_durations.json"
+        self.report_dir = report_dir or ".test_reports"
+        self.default_duration = default_duration
+
+    def discover(self):
+        """
+        Discovers the test classes
+
+        :return: list[str]: The dotted name of each test class
+        """
+        suite = unittest.TestLoader().discover(self.start_dir, top_level_dir=os.getcwd())
+
+        def classes(tests):
+            for test in tests:
+                if isinstance(test, unittest.TestSuite):
+                    yield from classes(test)
+                elif isinstance(test, unittest.loader._FailedTest):
+                    raise ImportError(f"Failed to import {test.id()}")
+                else:
+                    yield f"{type(test).__module__}.{type(test).__qualname__}"
+
+        return list(dict.fromkeys(classes(suite)))
+
+    def load_durations(self):
+        """
+        Reads the recorded duration of each test class
+
+        :return: dict[str, float]: The durations in seconds keyed by test class
+        """
+        if not os.path.isfile(self.durations_path):
+            return {}
+        with open(self.durations_path) as durations_file:
+            return json.load(durations_file)
+
+    def shard(self, class_ids, durations):
+        """
+        Splits the test classes into one shard per worker, assigning the longest classes first to the shard with
+        the least work so far
+
+        :param list[str] class_ids: The test classes
+        :param dict[str, float] durations: The recorded duration of each test class
+
+        :return: list[list[str]]: The test classes of each shard, empty shards are dropped
+        """
+        estimate = statistics.median(durations.values()) if durations else self.default_duration
+        expected = {class_id: durations.get(class_id, estimate) for class_id in class_ids}
+
+        shards = [(0.0, index, []) for index in range(min(self.workers, len(class_ids)))]
+        heapq.heapify(shards)
+        for class_id in sorted(class_ids, key=lambda class_id: (-expected[class_id], class_id)):
+            total, index, shard = heapq.heappop(shards)
+            shard.append(class_id)
+            heapq.heappush(shards, (total + expected[class_id], index, shard))
+
+        return [shard for _, _, shard in sorted(shards, key=lambda item: item[1])]
+
+    def run(self, class_ids=None):
+        """
+        Runs the test classes in parallel worker processes and merges their reports
+
+        :param list[str] class_ids: The test classes to run, defaults to every discovered test class
+
+        :return: dict: The merged report
+        """
+        class_ids = class_ids if class_ids is not None else self.discover()
+        durations = self.load_durations()
+        shards = self.shard(class_ids, durations)
+
+        os.makedirs(self.report_dir, exist_ok=True)
+        run_id = uuid.uuid4().hex[:6]
+        python_path = os.pathsep.join(filter(None, [os.getcwd(), os.path.abspath(self.start_dir),
+                                                    os.environ.get("PYTHONPATH")]))
+
+        start = time.perf_counter()
+        workers = []
+        for index, shard in enumerate(shards):
+            report_path = os.path.join(self.report_dir, f"worker-{index}.json")
+            log_path = os.path.join(self.report_dir, f"worker-{index}.log")
+            env = dict(os.environ, PYTHONPATH=python_path)
+            env[IdGenerator.namespace_variable] = f"w{index}{run_id}"
+
+            with open(log_path, "w") as log_file:
+                process = subprocess.Popen(
+                    [sys.executable, "-m", "utilities.parallel_test_runner", "--worker", "--report", report_path,
+                     "--classes", *shard], env=env, stdout=log_file, stderr=subprocess.STDOUT)
+            workers.append((index, process, report_path, log_path, time.perf_counter()))
+
+        reports = []
+        for index, process, report_path, log_path, started in workers:
+            process.wait()
+            elapsed = time.perf_counter() - started
+            if os.path.isfile(report_path):
+                with open(report_path) as report_file:
+                    report = json.load(report_file)
+            else:
+                # The worker died before writing its report, so every class in its shard is counted as an error
+                report = {"classes": {class_id: {"duration": None, "tests": 0, "failures": [], "skipped": [],
+                                                 "errors": [[class_id, f"Worker exited with {process.returncode}"]]}
+                                      for class_id in shards[index]}}
+            report.update(worker=index, elapsed=elapsed, log=log_path)
+            reports.append(report)
+
+        merged = self.merge(reports, time.perf_counter() - start)
+
+        # Record the durations to balance the next run
+        durations.update({class_id: result["duration"] for report in reports
+                          for class_id, result in report["classes"].items() if result["duration"] is not None})
+        with open(self.durations_path, "w") as durations_file:
+            json.dump(durations, durations_file, indent=2, sort_keys=True)
+
+        with open(os.path.join(self.report_dir, "report.json"), "w") as report_file:
+            json.dump(merged, report_file, indent=2)
+
+        return merged
+
+    @staticmethod
+    def merge(reports, elapsed):
+        """
+        Merges the reports of the workers
+
+        :param list[dict] reports: The report of each worker
+        :param float elapsed: The wall time of the whole run in seconds
+
+        :return: dict: The merged report
+        """
+        classes = {class_id: result for report in reports for class_id, result in report["classes"].items()}
+        return {
+            "elapsed": elapsed,
+            "tests": sum(result["tests"] for result in classes.values()),
+            "failures": [failure for result in classes.values() for failure in result["failures"]],
+            "errors": [error for result in classes.values() for error in result["errors"]],
+            "skipped": sum(len(result["skipped"]) for result in classes.values()),
+            "workers": [
+                {"worker": report["worker"], "elapsed": report["elapsed"], "log": report["log"],
+                 "classes": sorted(report["classes"])}
+                for report in reports
+            ],
+            "classes": classes,
+        }
+
+    @staticmethod
+    def run_worker(class_ids, report_path):
+        """
+        Runs test classes one after another in this process, timing each class
+
+        :param list[str] class_ids: The test classes
+        :param str report_path: Path the report of the worker is written to
+
+        :return: bool: Whether every test passed
+        """
+        loader = unittest.TestLoader()
+        runner = unittest.TextTestRunner(stream=sys.stdout, verbosity=2)
+        classes = {}
+
+        for class_id in class_ids:
+            start = time.perf_counter()
+            result = runner.run(loader.loadTestsFromName(class_id))
+            classes[class_id] = {
+                "duration": time.perf_counter() - start,
+                "tests": result.testsRun,
+                "failures": [[test.id(), trace] for test, trace in result.failures] +
+                            [[test.id(), "Unexpected success"] for test in result.unexpectedSuccesses],
+                "errors": [[test.id(), trace] for test, trace in result.errors],
+                "skipped": [[test.id(), reason] for test, reason in result.skipped],
+            }
+
+        with open(report_path, "w") as report_file:
+            json.dump({"classes": classes}, report_file)
+
+        return all(not result["failures"] and not result["errors"] for result in classes.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs the tutorial test classes in parallel worker processes")
+    parser.add_argument("start_dir", nargs="?", default="tutorials", help="directory to discover tests in")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--durations", help="path of the recorded durations of the test classes")
+    parser.add_argument("--report-dir", help="directory the reports are written to")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--report", help=argparse.SUPPRESS)
+    parser.add_argument("--classes", nargs="*", default=[], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return 0 if ParallelTestRunner.run_worker(args.classes, args.report) else 1
+
+    runner = ParallelTestRunner(args.start_dir, workers=args.workers, durations_path=args.durations,
+                                report_dir=args.report_dir)
+    report = runner.run()
+
+    for worker in report["workers"]:
+        print(f"worker {worker['worker']}: {len(worker['classes'])} classes in {worker['elapsed']:.1f}s "
+              f"({worker['log']})")
+    for test_id, trace in report["failures"] + report["errors"]:
+        print(f"\nFAIL: {test_id}\n{trace}")
+    print(f"\nRan {report['tests']} tests in {report['elapsed']:.1f}s: {len(report['failures'])} failures, "
+          f"{len(report['errors'])} errors, {report['skipped']} skipped")
+
+    return 0 if not report["failures"] and not report["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import lusid
+from utilities.quote_uploader import QuoteUploader
+
+
+class QuotePublish:
+    """
+    This class is used for reporting the outcome of publishing a batch of quotes
+    """
+
+    def __init__(self, result, rows, sent):
+        self.result = result
+        self.rows = rows
+        self.sent = sent
+
+    @property
+    def unchanged(self):
+        """
+        The number of quotes which were not sent as they had already been published with the same value
+        """
+        return self.rows - self.sent
+
+    def __repr__(self):
+        return f"QuotePublish(rows={self.rows}, sent={self.sent}, unchanged={self.unchanged}, " \
+               f"rejected={len(self.result.rejected)}, failed_chunks={len(self.result.failed_chunks)}, " \
+               f"elapsed={self.result.elapsed:.3f}s)"
+
+
+class QuotePublisher:
+    """
+    This class is used for publishing batches of quotes to LUSID, sending only the quotes which are new or whose
+    value has changed since they were last published.
+
+    The last published value and unit of each quote, keyed by its quote series and effective at, are kept in a
+    SQLite database which survives restarts. The published quotes of a scope are loaded into memory on first use
+    and each batch is compared against them with a single join, so only the changed quotes are sent and written.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS published_quotes (
+            scope TEXT NOT NULL,
+            series TEXT NOT NULL,
+            effective_at TEXT NOT NULL,
+            value REAL NOT NULL,
+            unit TEXT,
+            PRIMARY KEY (scope, series, effective_at)
+        ) WITHOUT ROWID;
+    """
+
+    # The columns of a quote which make up its quote series id
+    series_columns = ("provider", "price_source", "instrument_id_type", "instrument_id", "quote_type", "field")
+
+    published_schema = pa.schema([
+        ("series", pa.string()),
+        ("effective_at", pa.string()),
+        ("value", pa.float64()),
+        ("unit", pa.string()),
+    ])
+
+    def __init__(self, quotes_api: lusid.QuotesApi, database_path, tolerance=0.0, **uploader_options):
+        """
+
+        Parameters
+        ----------
+        quotes_api : lusid.QuotesApi
+            The api used to upsert the quotes
+        database_path : str
+            Path of the SQLite database of the last published quotes, created if it does not exist
+        tolerance : float, optional
+            The largest change in value which is not republished
+        uploader_options
+            The chunk_size, max_request_bytes, max_workers and retry_policy of the QuoteUploader which sends the
+            quotes
+        """
+        self.uploader = QuoteUploader(quotes_api, **uploader_options)
+        self.tolerance = tolerance
+
+        self._lock = threading.Lock()
+        self._published = {}
+        self.connection = sqlite3.connect(database_path, check_same_thread=False)
+        with self._lock, self.connection:
+            self.connection.executescript(self.schema)
+
+    def close(self):
+        """
+        Closes the database
+
+        :return: None
+        """
+        self.connection.close()
+
+    def published(self, scope):
+        """
+        The last published quotes of a scope, loaded from the database on first use
+
+        :param str scope: The scope of the quotes
+
+        :return: pyarrow.Table: The series key, effective at, value and unit of each published quote
+        """
+        with self._lock:
+            published = self._published.get(scope)
+            if published is None:
+                rows = self.connection.execute(
+                    "SELECT series, effective_at, value, unit FROM published_quotes WHERE scope = ?",
+                    (scope,)).fetchall()
+                published = pa.Table.from_arrays(
+                    [pa.array(values, type=field.type)
+                     for values, field in zip(zip(*rows) if rows else [[]] * 4, self.published_schema)],
+                    schema=self.published_schema)
+                self._published[scope] = published
+            return published
+
+    def keyed(self, table):
+        """
+        Keys each quote of a table by its quote series and effective at
+
+        :param pyarrow.Table table: The quotes, one per row, with the columns accepted by ``QuoteUploader``
+
+        :return: pyarrow.Table: The row number, series key, effective at, value and unit of each quote
+        """
+        missing = [name for name in QuoteUploader.required_columns if name not in table.column_names]
+        if missing:
+            raise ValueError(f"The quote table is missing the columns {missing}")
+
+        def column(name):
+            if name in table.column_names:
+                return table.column(name).cast(pa.string())
+            return pa.scalar(QuoteUploader.default_columns[name], type=pa.string())
+
+        # A control character separates the parts of the key as it cannot appear in any of them
+        series = pc.binary_join_element_wise(*[column(name) for name in self.series_columns], "\x1f",
+                                             null_handling="replace", null_replacement="")
+
+        return pa.table({
+            "row": np.arange(table.num_rows, dtype=np.int64),
+            "series": series,
+            "effective_at": pa.array(QuoteUploader.effective_dates(table.column("effective_at")), type=pa.string()),
+            "value": table.column("value").cast(pa.float64()),
+            "unit": column("unit") if "unit" in table.column_names else pa.nulls(table.num_rows, pa.string()),
+        })
+
+    @staticmethod
+    def latest(keyed):
+        """
+        Drops all but the last of the quotes of a batch with the same quote series and effective at, as only the
+        last is kept when they are saved
+
+        :param pyarrow.Table keyed: The quotes as returned by ``keyed``
+
+        :return: pyarrow.Table: The last quote of each series and effective at, in the order of the batch
+        """
+        last = keyed.group_by(["series", "effective_at"]).aggregate([("row", "max")]).column("row_max")
+        if len(last) == keyed.num_rows:
+            return keyed
+        return keyed.take(np.sort(last.to_numpy()))
+
+    def changes(self, scope, keyed):
+        """
+        Selects the quotes which have not been published with the same value and unit
+
+        :param str scope: The scope of the quotes
+        :param pyarrow.Table keyed: The quotes as returned by ``keyed``
+
+        :return: numpy.ndarray: The row numbers of the new and changed quotes in ascending order
+        """
+        joined = keyed.join(self.published(scope), keys=["series", "effective_at"], join_type="left outer",
+                            right_suffix="_published")
+
+        published_value = joined.column("value_published")
+        changed = pc.or_kleene(
+            pc.is_null(published_value),
+            pc.or_kleene(
+                pc.greater(pc.abs(pc.subtract(joined.column("value"), published_value)), self.tolerance),
+                pc.not_equal(pc.fill_null(joined.column("unit"), ""),
+                             pc.fill_null(joined.column("unit_published"), ""))))
+
+        return np.sort(joined.column("row").filter(changed).to_numpy())
+
+    def _record(self, scope, saved):
+        rows = zip(*[saved.column(name).to_pylist() for name in ("series", "effective_at", "value", "unit")])
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO published_quotes VALUES (?, ?, ?, ?, ?)",
+                ((scope, *row) for row in rows))
+
+            # Replace the saved quotes in the copy held in memory
+            published = self._published.get(scope)
+            if published is not None:
+                kept = published.join(saved.select(["series", "effective_at"]), keys=["series", "effective_at"],
+                                      join_type="left anti")
+                self._published[scope] = pa.concat_tables(
+                    [kept.select(self.published_schema.names),
+                     saved.select(self.published_schema.names).cast(self.published_schema)])
+
+    def publish(self, scope, quotes):
+        """
+        Publishes the new and changed quotes of a batch into a scope
+
+        :param str scope: The scope of the quotes
+        :param quotes: The quotes, either a pyarrow.Table with one quote per row or the path of a file accepted by
+        ``QuoteUploader.read``
+
+        :return: QuotePublish: The outcome, the rejected quotes and failed chunks of its result refer to the rows of
+        the batch so that ``QuoteUploader.failures`` can be used with the batch. Only the last of the quotes of the
+        batch with the same quote series and effective at is sent, the others are counted as unchanged.
+        """
+        table = QuoteUploader.read(quotes) if isinstance(quotes, str) else quotes
+        keyed = self.keyed(table)
+        rows = self.changes(scope, self.latest(keyed))
+
+        result = self.uploader.upload(scope, table.take(rows))
+
+        # Map the rows of the quotes sent back to the rows of the batch
+        result.rejected = [(int(rows[row]), reason) for row, reason in result.rejected]
+        result.failed_chunks = [(rows[chunk.start:chunk.stop].tolist(), ex) for chunk, ex in result.failed_chunks]
+
+        # Only the quotes which were saved are recorded as published, the others are sent again next time
+        unsaved = [row for row, _ in result.rejected] + [row for chunk, _ in result.failed_chunks for row in chunk]
+        saved = np.setdiff1d(rows, np.array(unsaved, dtype=np.int64), assume_unique=True)
+        if len(saved):
+            self._record(scope, keyed.take(saved))
+
+        return QuotePublish(result, table.num_rows, len(rows))
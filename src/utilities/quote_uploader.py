@@ -0,0 +1,262 @@
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as csv
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+import lusid
+from lusid import ApiException
+from utilities.batch_runner import BatchRunner
+from utilities.request_body_encoder import RequestBodyEncoder
+from utilities.retry_policy import RetryPolicy
+
+
+class QuoteUploader:
+    """
+    This class is used for uploading a large file of end of day quotes to LUSID in concurrent ``upsert_quotes``
+    requests.
+
+    The quotes are read as a columnar table with one quote per row. The request bodies are built a chunk at a time
+    straight from the columns, without an ``UpsertQuoteRequest`` per quote, and each quote is keyed in its request
+    by its row number so that every failure reported by LUSID maps back to the row of the file it came from.
+    """
+
+    # The columns a quote table must have
+    required_columns = ("instrument_id", "effective_at", "value")
+
+    # The columns a quote table may have, with the value used for every row when the column is missing
+    default_columns = {
+        "instrument_id_type": "Figi",
+        "provider": "Lusid",
+        "price_source": None,
+        "quote_type": "Price",
+        "field": "mid",
+        "unit": None,
+    }
+
+    # The most quotes LUSID accepts in one request
+    max_chunk_size = 2000
+
+    # Approximate number of bytes a quote takes in a request body on top of its string values
+    _quote_overhead = 200
+
+    def __init__(self, quotes_api: lusid.QuotesApi, chunk_size=2000, max_request_bytes=1_000_000, max_workers=8,
+                 retry_policy=None):
+        """
+
+        Parameters
+        ----------
+        quotes_api : lusid.QuotesApi
+            The api used to upsert the quotes
+        chunk_size : int, optional
+            The maximum number of quotes sent in each request, at most 2000
+        max_request_bytes : int, optional
+            The approximate maximum size of the body of each request, chunks are cut short to stay under it
+        max_workers : int, optional
+            The number of requests to send concurrently
+        retry_policy : RetryPolicy, optional
+            The policy a request which fails with a transient error is retried under, quotes are upserted by their
+            quote id so sending a request again is safe. When a RequestBodyEncoder is installed on the api client
+            the body of each request is serialised once and the same bytes are sent on every attempt.
+        """
+        if not 1 <= chunk_size <= self.max_chunk_size:
+            raise ValueError(f"chunk_size must be between 1 and {self.max_chunk_size}, got {chunk_size}")
+
+        self.quotes_api = quotes_api
+        self.chunk_size = chunk_size
+        self.max_request_bytes = max_request_bytes
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=1)
+        self.encoder = RequestBodyEncoder.of(quotes_api.api_client)
+        self.runner = BatchRunner(max_workers=max_workers)
+
+    @staticmethod
+    def read(path):
+        """
+        Reads a quote file, the format is taken from the extension: '.parquet', '.arrow' or '.feather' for the
+        Arrow IPC format, or '.csv'
+
+        :param str path: The path of the file
+
+        :return: pyarrow.Table: The quotes, one per row
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".parquet":
+            return pq.read_table(path)
+        if extension in (".arrow", ".feather"):
+            with pa.memory_map(path) as source:
+                return ipc.open_file(source).read_all()
+        if extension == ".csv":
+            return csv.read_csv(path, convert_options=csv.ConvertOptions(
+                column_types={"instrument_id": pa.string(), "effective_at": pa.string(), "value": pa.float64()}))
+        raise ValueError(f"Unsupported quote file format '{extension}'")
+
+    def columns(self, table):
+        """
+        Converts the columns of a quote table into the arrays the request bodies are built from. Repeated strings
+        such as the provider and currency are dictionary encoded so that each distinct value is held once.
+
+        :param pyarrow.Table table: The quotes, one per row
+
+        :return: dict[str, numpy.ndarray]: The values of each column, with the effective dates as ISO 8601 strings
+        """
+        missing = [name for name in self.required_columns if name not in table.column_names]
+        if missing:
+            raise ValueError(f"The quote table is missing the columns {missing}")
+
+        columns = {}
+        for name in self.required_columns + tuple(self.default_columns):
+            if name not in table.column_names:
+                columns[name] = np.full(table.num_rows, self.default_columns[name], dtype=object)
+                continue
+
+            column = table.column(name)
+            if name == "effective_at":
+                columns[name] = self.effective_dates(column)
+            elif name == "value":
+                columns[name] = column.cast(pa.float64()).to_numpy()
+            elif name == "instrument_id":
+                columns[name] = column.cast(pa.string()).to_numpy(zero_copy_only=False)
+            else:
+                encoded = pc.dictionary_encode(column.cast(pa.string())).combine_chunks()
+                dictionary = np.array(encoded.dictionary.to_pylist() + [None], dtype=object)
+                # Null indices select the None appended to the dictionary
+                indices = encoded.indices.fill_null(len(dictionary) - 1).to_numpy()
+                columns[name] = dictionary[indices]
+
+        return columns
+
+    @staticmethod
+    def effective_dates(column):
+        """
+        Formats the effective dates of quotes as ISO 8601 strings
+
+        :param pyarrow.ChunkedArray column: The dates as timestamps, naive timestamps are taken to be UTC, as dates
+        or as strings which are left as they are
+
+        :return: numpy.ndarray: The dates as strings
+        """
+        if pa.types.is_timestamp(column.type):
+            instants = column.cast(pa.timestamp("s", column.type.tz)).to_numpy().astype("datetime64[s]")
+            return np.datetime_as_string(instants, timezone="UTC").astype(object)
+        if pa.types.is_date(column.type):
+            return np.datetime_as_string(column.to_numpy().astype("datetime64[D]")).astype(object)
+        return column.cast(pa.string()).to_numpy(zero_copy_only=False)
+
+    def request_sizes(self, columns):
+        """
+        Estimates the number of bytes each quote takes in a request body
+
+        :param dict[str, numpy.ndarray] columns: The columns returned by ``columns``
+
+        :return: numpy.ndarray: The estimated size of each quote in bytes
+        """
+        sizes = np.full(len(columns["value"]), self._quote_overhead, dtype=np.int64)
+        for name, values in columns.items():
+            if values.dtype == object:
+                sizes += pc.utf8_length(pa.array(values, type=pa.string())).fill_null(0).to_numpy()
+        return sizes
+
+    def chunk_rows(self, sizes):
+        """
+        Generator splitting the rows into chunks of at most ``chunk_size`` rows and ``max_request_bytes`` bytes
+
+        :param numpy.ndarray sizes: The estimated size of each quote in bytes
+
+        :return: Iterator[range]: The rows of each chunk
+        """
+        ends = np.cumsum(sizes)
+        start = 0
+        while start < len(sizes):
+            # The first row whose request would go over the limit, always taking at least one row
+            consumed = ends[start - 1] if start > 0 else 0
+            stop = int(np.searchsorted(ends, consumed + self.max_request_bytes, side="right"))
+            stop = min(max(stop, start + 1), start + self.chunk_size, len(sizes))
+            yield range(start, stop)
+            start = stop
+
+    @staticmethod
+    def request_body(columns, rows):
+        """
+        Builds the body of an ``upsert_quotes`` request, with each quote keyed by its row number
+
+        :param dict[str, numpy.ndarray] columns: The columns returned by ``columns``
+        :param range rows: The rows of the quotes in the request
+
+        :return: dict[str, dict]: The quotes in the request, in the JSON form of UpsertQuoteRequest
+        """
+        chunk = slice(rows.start, rows.stop)
+        return {
+            str(row): {
+                "quoteId": {
+                    "quoteSeriesId": {
+                        "provider": provider,
+                        "priceSource": price_source,
+                        "instrumentId": instrument_id,
+                        "instrumentIdType": instrument_id_type,
+                        "quoteType": quote_type,
+                        "field": field,
+                    },
+                    "effectiveAt": effective_at,
+                },
+                "metricValue": {"value": value, "unit": unit},
+            }
+            for row, provider, price_source, instrument_id, instrument_id_type, quote_type, field, effective_at, value,
+            unit in zip(rows, columns["provider"][chunk].tolist(), columns["price_source"][chunk].tolist(),
+                        columns["instrument_id"][chunk].tolist(), columns["instrument_id_type"][chunk].tolist(),
+                        columns["quote_type"][chunk].tolist(), columns["field"][chunk].tolist(),
+                        columns["effective_at"][chunk].tolist(), columns["value"][chunk].tolist(),
+                        columns["unit"][chunk].tolist())
+        }
+
+    def _upsert_chunk(self, scope, columns, rows):
+        body = self.request_body(columns, rows)
+        if self.encoder is not None:
+            body = self.encoder.prepare(body)
+        try:
+            response = self.retry_policy.call(self.quotes_api.upsert_quotes, scope=scope, request_body=body)
+        except ApiException as ex:
+            # A validation failure of the whole request is reported against each of its rows
+            if ex.status != 400:
+                raise
+            return [(row, ex.body) for row in rows]
+
+        return [(int(key), error.detail or error.type) for key, error in (response.failed or {}).items()]
+
+    def upload(self, scope, quotes):
+        """
+        Uploads quotes into a scope
+
+        :param str scope: The scope of the quotes
+        :param quotes: The quotes, either a pyarrow.Table with one quote per row or the path of a file accepted
+        by ``read``
+
+        :return: BatchResult: The result, with the rate in quotes per second and the rejected quotes as
+        (row, reason) tuples
+        """
+        table = self.read(quotes) if isinstance(quotes, str) else quotes
+        columns = self.columns(table)
+
+        return self.runner.run(lambda rows: self._upsert_chunk(scope, columns, rows),
+                               self.chunk_rows(self.request_sizes(columns)))
+
+    @staticmethod
+    def failures(table, result):
+        """
+        Selects the rows of the quote table which were not saved, from both rejected quotes and failed chunks
+
+        :param pyarrow.Table table: The uploaded quotes
+        :param BatchResult result: The result of the upload
+
+        :return: pyarrow.Table: The rows which were not saved in file order, with their row number and the reason
+        """
+        failed = dict(result.rejected)
+        for rows, ex in result.failed_chunks:
+            failed.update((row, str(ex)) for row in rows)
+
+        rows = np.array(sorted(failed), dtype=np.int64)
+        return table.take(rows) \
+            .append_column("row", pa.array(rows)) \
+            .append_column("reason", pa.array([failed[row] for row in rows.tolist()], type=pa.string()))
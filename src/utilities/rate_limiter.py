@@ -0,0 +1,45 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    This class is used for limiting the rate of calls made to LUSID from any number of threads
+    """
+
+    def __init__(self, rate, burst=1):
+        """
+
+        Parameters
+        ----------
+        rate : float
+            The sustained number of calls allowed per second
+        burst : int, optional
+            The number of calls which may be made back to back before the rate applies
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a call is allowed under the rate budget
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import threading
+
+import lusid
+import lusid.models as models
+from lusid import ApiException
+
+
+class RecipeManager:
+    """
+    This class is used for upserting configuration recipes only when they have changed
+    """
+
+    def __init__(self, recipes_api: lusid.ConfigurationRecipeApi, record_path=None, check_lusid=True):
+        """
+
+        Parameters
+        ----------
+        recipes_api : lusid.ConfigurationRecipeApi
+            The api used to read and upsert recipes
+        record_path : str, optional
+            Path of a JSON file recording the fingerprint of each upserted recipe, so that the record outlives
+            the process. When not supplied the record is only held in memory.
+        check_lusid : bool, optional
+            Whether to compare a recipe not yet in the record against the copy already in LUSID before upserting.
+            Only the fields set in the recipe are compared, as LUSID fills in defaults for the others.
+        """
+        self.recipes_api = recipes_api
+        self.record_path = record_path
+        self.check_lusid = check_lusid
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._record = {}
+
+        if record_path is not None and os.path.isfile(record_path):
+            with open(record_path) as record_file:
+                self._record = json.load(record_file)
+
+    def fingerprint(self, recipe):
+        """
+        Fingerprints the canonical JSON of a recipe, which is independent of the order the recipe was built in
+
+        :param ConfigurationRecipe recipe: The recipe
+
+        :return: str: The SHA-256 of the canonical JSON
+        """
+        serialized = self.recipes_api.api_client.sanitize_for_serialization(recipe)
+        canonical = json.dumps(serialized, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def _contains(cls, stored, value):
+        """
+        Whether a value read back from LUSID holds everything set in a value, ignoring anything only LUSID set
+        """
+        if isinstance(value, dict):
+            return isinstance(stored, dict) and all(
+                key in stored and cls._contains(stored[key], item) for key, item in value.items())
+        if isinstance(value, list):
+            return isinstance(stored, list) and len(stored) == len(value) and all(
+                cls._contains(stored_item, item) for stored_item, item in zip(stored, value))
+        return stored == value
+
+    def _in_lusid(self, recipe):
+        try:
+            response = self.recipes_api.get_configuration_recipe(recipe.scope, recipe.code)
+        except ApiException as ex:
+            if ex.status == 404:
+                return False
+            raise
+
+        sanitize = self.recipes_api.api_client.sanitize_for_serialization
+        return self._contains(sanitize(response.value), sanitize(recipe))
+
+    def _save_record(self):
+        if self.record_path is None:
+            return
+
+        temp_path = f"{self.record_path}.tmp"
+        with open(temp_path, "w") as record_file:
+            json.dump(self._record, record_file, sort_keys=True)
+        os.replace(temp_path, self.record_path)
+
+    def upsert(self, recipe):
+        """
+        Upserts a recipe into LUSID unless the same recipe has already been upserted
+
+        :param ConfigurationRecipe recipe: The recipe
+
+        :return: bool: True if the recipe was written to LUSID, False if the call was skipped
+        """
+        key = f"{recipe.scope}/{recipe.code}"
+        fingerprint = self.fingerprint(recipe)
+
+        with self._lock:
+            if self._record.get(key) == fingerprint:
+                return False
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Only upserts of the same recipe wait on each other, the calls to LUSID are made without the shared lock
+        with key_lock:
+            with self._lock:
+                if self._record.get(key) == fingerprint:
+                    return False
+
+            written = False
+            if not self.check_lusid or not self._in_lusid(recipe):
+                self.recipes_api.upsert_configuration_recipe(models.UpsertRecipeRequest(recipe))
+                written = True
+
+            with self._lock:
+                self._record[key] = fingerprint
+                self._save_record()
+            return written
+
+    def recipe_id(self, recipe):
+        """
+        Ensures a recipe is in LUSID and returns its id for use in a ValuationRequest
+
+        :param ConfigurationRecipe recipe: The recipe
+
+        :return: ResourceId: The id of the recipe
+        """
+        self.upsert(recipe)
+        return models.ResourceId(scope=recipe.scope, code=recipe.code)
+
+    def forget(self, scope, code):
+        """
+        Removes a recipe from the record, for example after it has been deleted from LUSID
+
+        :param str scope: The scope of the recipe
+        :param str code: The code of the recipe
+
+        :return: None
+        """
+        with self._lock:
+            if self._record.pop(f"{scope}/{code}", None) is not None:
+                self._save_record()
@@ -0,0 +1,182 @@
+import threading
+
+import numpy as np
+
+import lusid
+import lusid.models as models
+from lusid import ApiException
+from utilities.batch_runner import BatchRunner
+
+
+class ConstituentDiff:
+    """
+    This class holds the differences between the current and the target constituents of a reference portfolio
+    """
+
+    def __init__(self, added, removed, changed, uploaded=False):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.uploaded = uploaded
+
+    def __bool__(self):
+        return bool(len(self.added) or len(self.removed) or len(self.changed))
+
+    def __repr__(self):
+        return f"ConstituentDiff(added={len(self.added)}, removed={len(self.removed)}, " \
+               f"changed={len(self.changed)}, uploaded={self.uploaded})"
+
+
+class ReferencePortfolioSync:
+    """
+    This class is used for bringing the constituents of reference portfolios in line with target weights, such as
+    those of a benchmark index after its daily rebalance.
+
+    The current constituents of each portfolio are fetched once and compared with the target weights in a single
+    vectorised step. The constituents are only upserted when they differ, in which case the whole target set is
+    sent as LUSID replaces the constituents effective from a date as a whole.
+    """
+
+    identifier_key = "Instrument/default/LusidInstrumentId"
+
+    def __init__(self, reference_portfolio_api: lusid.ReferencePortfolioApi, tolerance=1e-9, normalise=True,
+                 max_workers=8):
+        """
+
+        Parameters
+        ----------
+        reference_portfolio_api : lusid.ReferencePortfolioApi
+            The api used to get and upsert the constituents
+        tolerance : float, optional
+            The largest difference in weight which is not treated as a change
+        normalise : bool, optional
+            Whether the weights are compared as proportions of their total, so that weights in percent and in
+            fractions of one compare equal
+        max_workers : int, optional
+            The number of reference portfolios to sync concurrently
+        """
+        self.reference_portfolio_api = reference_portfolio_api
+        self.tolerance = tolerance
+        self.normalise = normalise
+        self.runner = BatchRunner(max_workers=max_workers)
+
+    def current(self, scope, code, effective_at=None):
+        """
+        Fetches the constituents of a reference portfolio
+
+        :param str scope: The scope of the reference portfolio
+        :param str code: The code of the reference portfolio
+        :param str effective_at: The effective date of the constituents, defaults to now
+
+        :return: (numpy.ndarray, numpy.ndarray): The LUSID instrument id and the weight of each constituent
+        """
+        kwargs = {} if effective_at is None else {"effective_at": effective_at}
+        try:
+            constituents = self.reference_portfolio_api.get_reference_portfolio_constituents(
+                scope=scope, code=code, **kwargs).constituents or []
+        except ApiException as ex:
+            # A reference portfolio with no constituents yet
+            if ex.status != 404:
+                raise
+            constituents = []
+
+        instrument_ids = np.empty(len(constituents), dtype=object)
+        instrument_ids[:] = [constituent.instrument_uid for constituent in constituents]
+        weights = np.array([constituent.weight for constituent in constituents], dtype=np.float64)
+        return instrument_ids, weights
+
+    def diff(self, current, target):
+        """
+        Compares the current and the target constituents of a reference portfolio
+
+        :param (numpy.ndarray, numpy.ndarray) current: The instrument id and weight of each current constituent
+        :param (numpy.ndarray, numpy.ndarray) target: The instrument id and weight of each target constituent
+
+        :return: ConstituentDiff: The instruments added, removed and whose weight changed
+        """
+        current_ids, current_weights = (np.asarray(values) for values in current)
+        target_ids, target_weights = (np.asarray(values) for values in target)
+
+        # Align both sets on the union of their instruments, summing any repeated instrument
+        instruments, inverse = np.unique(np.concatenate([current_ids, target_ids]).astype(str), return_inverse=True)
+        inverse = inverse.reshape(-1)
+        current_index, target_index = inverse[:len(current_ids)], inverse[len(current_ids):]
+
+        weights = np.zeros((2, len(instruments)))
+        weights[0] = np.bincount(current_index, weights=current_weights.astype(np.float64), minlength=len(instruments))
+        weights[1] = np.bincount(target_index, weights=target_weights.astype(np.float64), minlength=len(instruments))
+
+        if self.normalise:
+            totals = weights.sum(axis=1, keepdims=True)
+            np.divide(weights, totals, out=weights, where=totals != 0)
+
+        in_current = np.zeros(len(instruments), dtype=bool)
+        in_current[current_index] = True
+        in_target = np.zeros(len(instruments), dtype=bool)
+        in_target[target_index] = True
+
+        changed = in_current & in_target & (np.abs(weights[0] - weights[1]) > self.tolerance)
+        return ConstituentDiff(instruments[in_target & ~in_current], instruments[in_current & ~in_target],
+                               instruments[changed])
+
+    def sync_portfolio(self, scope, code, target, effective_from, weight_type="Static", currency="GBP"):
+        """
+        Brings the constituents of a reference portfolio in line with the target, upserting them only if they differ
+
+        :param str scope: The scope of the reference portfolio
+        :param str code: The code of the reference portfolio
+        :param target: The target weights, a dict of LUSID instrument id to weight or a tuple of the arrays of
+        instrument ids and weights
+        :param str effective_from: The date the target constituents are effective from
+        :param str weight_type: The weight type of the constituents, 'Static', 'Floating' or 'Periodical'
+        :param str currency: The currency of the constituents
+
+        :return: ConstituentDiff: The differences, with whether the constituents were uploaded
+        """
+        if isinstance(target, dict):
+            target = (list(target), list(target.values()))
+
+        diff = self.diff(self.current(scope, code, effective_from), target)
+        if not diff:
+            return diff
+
+        self.reference_portfolio_api.upsert_reference_portfolio_constituents(
+            scope=scope,
+            code=code,
+            upsert_reference_portfolio_constituents_request=models.UpsertReferencePortfolioConstituentsRequest(
+                effective_from=effective_from,
+                weight_type=weight_type,
+                constituents=[
+                    models.ReferencePortfolioConstituentRequest(
+                        instrument_identifiers={self.identifier_key: instrument_id},
+                        weight=weight,
+                        currency=currency)
+                    for instrument_id, weight in zip(*(np.asarray(values).tolist() for values in target))
+                ]))
+        diff.uploaded = True
+        return diff
+
+    def sync(self, targets, effective_from, weight_type="Static", currency="GBP"):
+        """
+        Brings the constituents of many reference portfolios in line with their targets concurrently
+
+        :param dict targets: The target weights accepted by ``sync_portfolio`` of each (scope, code)
+        :param str effective_from: The date the target constituents are effective from
+        :param str weight_type: The weight type of the constituents
+        :param str currency: The currency of the constituents
+
+        :return: (BatchResult, dict[(str, str), ConstituentDiff]): The result, with any reference portfolios which
+        failed, and the differences found in each reference portfolio which was synced
+        """
+        diffs = {}
+        lock = threading.Lock()
+
+        def sync_chunk(chunk):
+            for scope, code in chunk:
+                diff = self.sync_portfolio(scope, code, targets[(scope, code)], effective_from, weight_type, currency)
+                with lock:
+                    diffs[(scope, code)] = diff
+            return []
+
+        result = self.runner.run(sync_chunk, BatchRunner.chunk(targets, 1))
+        return result, diffs
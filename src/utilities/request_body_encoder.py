@@ -0,0 +1,175 @@
+import gzip
+import json
+import threading
+import time
+from urllib.parse import urlencode
+
+import urllib3
+
+from lusid.exceptions import ApiException
+from lusid.rest import RESTResponse
+
+
+class PreparedBody(bytes):
+    """
+    A request body serialised to JSON once, and gzipped when ``encoding`` is 'gzip'. It is sent as it is by an api
+    client the RequestBodyEncoder is installed on, however many times the request is retried.
+    """
+
+    def __new__(cls, data, encoding=None, size=None):
+        body = super().__new__(cls, data)
+        body.encoding = encoding
+        body.size = len(data) if size is None else size
+        return body
+
+
+class RequestBodyEncoder:
+    """
+    This class is used for serialising the bodies of large requests once into bytes, optionally gzipped, so that a
+    request which is retried or recorded reuses the same buffer rather than serialising its models again.
+
+    Once installed on an api client, any api method given a PreparedBody as its body sends the bytes as they are,
+    with a 'Content-Encoding: gzip' header when compressed. Other requests are sent as before.
+    """
+
+    def __init__(self, api_client, compress=False, level=6, min_size=1024, recorder=None):
+        """
+
+        Parameters
+        ----------
+        api_client : lusid.ApiClient
+            The api client the bodies are serialised with
+        compress : bool, optional
+            Whether bodies are gzipped, which the server must accept
+        level : int, optional
+            The gzip compression level
+        min_size : int, optional
+            The size in bytes under which a body is not worth compressing
+        recorder : typing.Callable[[str, str, PreparedBody], None], optional
+            Called with the method, url and body of each request sent with a PreparedBody
+        """
+        self.api_client = api_client
+        self.compress = compress
+        self.level = level
+        self.min_size = min_size
+        self.recorder = recorder
+
+        self._lock = threading.Lock()
+        self.bodies = 0
+        self.raw_bytes = 0
+        self.encoded_bytes = 0
+        self.encode_seconds = 0.0
+
+    @classmethod
+    def install(cls, api_client, **kwargs):
+        """
+        Creates an encoder and installs it on an api client
+
+        :param lusid.ApiClient api_client: The api client
+        :param kwargs: The options of the encoder
+
+        :return: RequestBodyEncoder: The encoder
+        """
+        encoder = cls(api_client, **kwargs)
+        rest_client = api_client.rest_client
+        send = rest_client.request
+
+        def request(method, url, query_params=None, headers=None, body=None, post_params=None,
+                    _preload_content=True, _request_timeout=None):
+            if not isinstance(body, PreparedBody):
+                return send(method, url, query_params=query_params, headers=headers, body=body,
+                            post_params=post_params, _preload_content=_preload_content,
+                            _request_timeout=_request_timeout)
+            return encoder._send(rest_client, method, url, query_params, headers, body, _preload_content,
+                                 _request_timeout)
+
+        rest_client.request = request
+        api_client.request_body_encoder = encoder
+        return encoder
+
+    @staticmethod
+    def of(api_client):
+        """
+        The encoder installed on an api client
+
+        :param lusid.ApiClient api_client: The api client
+
+        :return: RequestBodyEncoder: The encoder, or None when none is installed
+        """
+        return getattr(api_client, "request_body_encoder", None)
+
+    @classmethod
+    def prepared(cls, api, body):
+        """
+        Prepares a request body with the encoder installed on the api client of an api
+
+        :param api: The api the body is sent with, e.g. a lusid.TransactionPortfoliosApi
+        :param body: The body
+
+        :return: The PreparedBody, or the body as it is when no encoder is installed
+        """
+        encoder = cls.of(api.api_client)
+        return body if encoder is None else encoder.prepare(body)
+
+    def prepare(self, body):
+        """
+        Serialises a request body, which may hold models, to bytes exactly as the api client would, and gzips it
+        when compression is enabled
+
+        :param body: The body
+
+        :return: PreparedBody: The serialised body
+        """
+        start = time.perf_counter()
+        data = json.dumps(self.api_client.sanitize_for_serialization(body)).encode("utf-8")
+        size = len(data)
+        encoding = None
+        if self.compress and size >= self.min_size:
+            data = gzip.compress(data, compresslevel=self.level)
+            encoding = "gzip"
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.bodies += 1
+            self.raw_bytes += size
+            self.encoded_bytes += len(data)
+            self.encode_seconds += elapsed
+
+        return PreparedBody(data, encoding, size)
+
+    def _send(self, rest_client, method, url, query_params, headers, body, preload_content, request_timeout):
+        """
+        Sends a prepared body, following ``lusid.rest.RESTClientObject.request`` for JSON bodies
+        """
+        headers = dict(headers or {})
+        headers.setdefault("Content-Type", "application/json")
+        if body.encoding is not None:
+            headers["Content-Encoding"] = body.encoding
+        if query_params:
+            url += "?" + urlencode(query_params)
+
+        timeout = None
+        if isinstance(request_timeout, int):
+            timeout = urllib3.Timeout(total=request_timeout)
+        elif isinstance(request_timeout, tuple) and len(request_timeout) == 2:
+            timeout = urllib3.Timeout(connect=request_timeout[0], read=request_timeout[1])
+
+        if self.recorder is not None:
+            self.recorder(method, url, body)
+
+        try:
+            response = rest_client.pool_manager.request(method, url, body=bytes(body), preload_content=preload_content,
+                                                        timeout=timeout, headers=headers)
+        except urllib3.exceptions.SSLError as ex:
+            raise ApiException(status=0, reason=f"{type(ex).__name__}\n{ex}")
+
+        if preload_content:
+            response = RESTResponse(response)
+        if not 200 <= response.status <= 299:
+            raise ApiException(http_resp=response)
+        return response
+
+    def __repr__(self):
+        saved = 1 - self.encoded_bytes / self.raw_bytes if self.raw_bytes else 0.0
+        return f"RequestBodyEncoder(bodies={self.bodies}, raw_bytes={self.raw_bytes}, " \
+               f"encoded_bytes={self.encoded_bytes}, saved={saved:.0%}, encode_seconds={self.encode_seconds:.3f})"
@@ -0,0 +1,100 @@
+import logging
+import random
+import time
+
+import urllib3
+
+from lusid import ApiException
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """
+    This class is used for retrying calls to LUSID which fail with a transient error, waiting an exponentially
+    growing and randomly jittered time between attempts so that many clients retrying at once spread out.
+
+    Only idempotent calls should be retried. An upsert is idempotent when its entities have deterministic ids, see
+    ``TestDataUtilities.transaction_id``, as a request which timed out may still have been applied.
+    """
+
+    # The statuses of responses which are worth retrying
+    retry_statuses = frozenset({408, 429, 500, 502, 503, 504})
+
+    def __init__(self, max_attempts=5, base_delay=0.5, max_delay=30.0, sleep=time.sleep):
+        """
+
+        Parameters
+        ----------
+        max_attempts : int, optional
+            The number of attempts made before the error is raised
+        base_delay : float, optional
+            The upper bound in seconds of the wait before the first retry, doubled for each later retry
+        max_delay : float, optional
+            The largest upper bound in seconds of any wait
+        sleep : typing.Callable[[float], None], optional
+            The function used to wait
+        """
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts must be at least 1, got {max_attempts}")
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+
+    def retryable(self, ex):
+        """
+        Whether an error is transient
+
+        :param Exception ex: The error
+
+        :return: bool: True for a response with a retryable status, a timeout or a dropped connection
+        """
+        if isinstance(ex, ApiException):
+            return ex.status in self.retry_statuses
+        return isinstance(ex, (urllib3.exceptions.HTTPError, ConnectionError, TimeoutError))
+
+    def delay(self, attempt, ex=None):
+        """
+        The time to wait before retrying, drawn uniformly up to the exponential bound of the attempt. A wait the
+        server asked for with a Retry-After header is used when it is longer.
+
+        :param int attempt: The number of attempts made so far
+        :param Exception ex: The error of the last attempt
+
+        :return: float: The wait in seconds
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+        headers = getattr(ex, "headers", None) or {}
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    def call(self, function, *args, **kwargs):
+        """
+        Calls a function, retrying it while it fails with a transient error
+
+        :param callable function: The function
+        :param args: The positional arguments of the function
+        :param kwargs: The keyword arguments of the function
+
+        :return: The value returned by the function
+        """
+        attempt = 1
+        while True:
+            try:
+                return function(*args, **kwargs)
+            except Exception as ex:
+                if attempt >= self.max_attempts or not self.retryable(ex):
+                    raise
+                delay = self.delay(attempt, ex)
+                logger.warning(f"attempt {attempt} of {getattr(function, '__name__', function)} failed with "
+                               f"{type(ex).__name__}: {getattr(ex, 'status', ex)}, retrying in {delay:.2f}s")
+                self.sleep(delay)
+                attempt += 1
@@ -0,0 +1,154 @@
+import copy
+import json
+import threading
+from urllib.parse import urlsplit
+
+from lusid.rest import RESTResponse
+
+
+class _Call:
+    """
+    A request in flight, which the requests identical to it wait on
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    This class is used for merging identical read requests made concurrently through a shared api client, such as
+    many workers asking for the same instruments or quotes as a job starts.
+
+    Once installed on an api client, a read request which is identical to one already in flight is not sent. It
+    waits for the request in flight and is given the same response, which each caller deserialises into its own
+    models, or raises a copy of the same error. Reads are GET requests and POST requests to the query endpoints whose path
+    ends in one of the ``read_actions``. Requests are identical when their method, url, query parameters, headers
+    and body are, so requests made with different credentials are never merged.
+    """
+
+    # The actions of the POST endpoints which only read, e.g. '/api/instruments/$get'
+    read_actions = ("$get", "$query", "$list")
+
+    def __init__(self, read_actions=None):
+        """
+
+        Parameters
+        ----------
+        read_actions : tuple[str], optional
+            The prefixes of the last segment of the path of the POST endpoints which only read, defaults to the
+            ``read_actions`` of the class
+        """
+        if read_actions is not None:
+            self.read_actions = tuple(read_actions)
+
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.calls = 0
+        self.merged = 0
+
+    @classmethod
+    def install(cls, api_client, **kwargs):
+        """
+        Creates a single flight layer and installs it on an api client
+
+        :param lusid.ApiClient api_client: The api client
+        :param kwargs: The options of the layer
+
+        :return: SingleFlight: The layer
+        """
+        single_flight = cls(**kwargs)
+        rest_client = api_client.rest_client
+        send = rest_client.request
+
+        def request(method, url, query_params=None, headers=None, body=None, post_params=None,
+                    _preload_content=True, _request_timeout=None):
+            return single_flight.call(lambda: send(method, url, query_params=query_params, headers=headers,
+                                                   body=body, post_params=post_params,
+                                                   _preload_content=_preload_content,
+                                                   _request_timeout=_request_timeout),
+                                      single_flight.key(method, url, query_params, headers, body, post_params,
+                                                        _preload_content))
+
+        rest_client.request = request
+        api_client.single_flight = single_flight
+        return single_flight
+
+    @staticmethod
+    def of(api_client):
+        """
+        The single flight layer installed on an api client
+
+        :param lusid.ApiClient api_client: The api client
+
+        :return: SingleFlight: The layer, or None when none is installed
+        """
+        return getattr(api_client, "single_flight", None)
+
+    def key(self, method, url, query_params=None, headers=None, body=None, post_params=None, preload_content=True):
+        """
+        The key identifying a read request
+
+        :return: tuple: The key, or None when the request is not a read which can be merged
+        """
+        # A response which is streamed rather than loaded can only be read by one caller, and forms are not reads
+        if not preload_content or post_params:
+            return None
+        if method != "GET":
+            action = urlsplit(url).path.rsplit("/", 1)[-1]
+            if method != "POST" or not action.startswith(self.read_actions):
+                return None
+
+        if body is not None and not isinstance(body, (bytes, str)):
+            body = json.dumps(body)
+        query = tuple((name, str(value)) for name, value in query_params or ())
+        return method, url, query, tuple(sorted((headers or {}).items())), body
+
+    def call(self, send, key):
+        """
+        Sends a request, unless an identical request is in flight in which case its response is shared
+
+        :param callable send: The function sending the request
+        :param tuple key: The key of the request returned by ``key``, None to always send it
+
+        :return: The response
+        """
+        if key is None:
+            return send()
+
+        with self._lock:
+            self.calls += 1
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+            else:
+                self.merged += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                # Each caller raises an error of its own, as the api client decodes the body of the error it is
+                # given in place and raising one error in many threads would have them all add to its traceback
+                raise copy.copy(call.error)
+            # The api client decodes the data of the response it is given in place, so each caller is given a
+            # response of its own over the loaded body
+            return RESTResponse(call.response.urllib3_response)
+
+        try:
+            call.response = send()
+            return call.response
+        except Exception as ex:
+            # Kept as it was raised, before the leader's api client decodes its body
+            call.error = copy.copy(ex)
+            raise
+        finally:
+            # Requests made from now on are sent again, as the data may have changed since this one was answered
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    def __repr__(self):
+        return f"SingleFlight(calls={self.calls}, merged={self.merged}, sent={self.calls - self.merged})"
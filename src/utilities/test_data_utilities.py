@@ -1,3 +1,4 @@
+import os
 import threading
 import unittest
 import uuid
@@ -9,20 +10,49 @@ import lusid
 import lusid.models as models
 from lusid.utilities import ApiClientBuilder
 from utilities import CredentialsSource
+from utilities.id_generator import IdGenerator
+from utilities.model_serializer import ModelSerializer
+from utilities.request_body_encoder import RequestBodyEncoder
+from utilities.single_flight import SingleFlight
+from utilities.token_cache import TokenCache
 
 
 class TestDataUtilities:
-    tutorials_scope = f"Testdemo"
-    market_data_scope = "FinbourneMarketData"
+    tutorials_scope = IdGenerator.namespaced("Testdemo")
+    market_data_scope = IdGenerator.namespaced("FinbourneMarketData")
 
     lusid_cash_identifier = "Instrument/default/Currency"
     lusid_luid_identifier = "Instrument/default/LusidInstrumentId"
     lusid_figi_identifier = "Instrument/default/Figi"
 
-    def __init__(self, transaction_portfolio_api: lusid.TransactionPortfoliosApi):
+    # Namespace of the deterministic transaction ids, so that they do not collide with ids derived for other uses
+    transaction_id_namespace = uuid.UUID("6f1d3c0e-8a4b-5d2f-9e7a-2c5b8d4f1a03")
+
+    def __init__(self, transaction_portfolio_api: lusid.TransactionPortfoliosApi, deterministic_ids=False):
         self.transaction_portfolio_api = transaction_portfolio_api
+        # When set every transaction is given the id derived from its business key rather than a random id, so that
+        # sending the same trade again, even with corrected units or price, updates it instead of duplicating it
+        self.deterministic_ids = deterministic_ids
         self.test = self.TestDataUtilitiesTests()
 
+    @classmethod
+    def transaction_id(cls, business_key):
+        """
+        Derives a transaction id from the business key of a trade, the same key always gives the same id
+
+        :param str business_key: The reference identifying the trade in the source system
+
+        :return: str: The transaction id, a name based UUID
+        """
+        return str(uuid.uuid5(cls.transaction_id_namespace, str(business_key)))
+
+    def _transaction_id(self, business_key):
+        if business_key is not None:
+            return self.transaction_id(business_key)
+        if self.deterministic_ids:
+            raise ValueError("A business_key is required for a transaction when the ids are deterministic")
+        return str(uuid.uuid4())
+
     _api_client = None
     _lock = threading.Lock()
 
@@ -31,7 +61,33 @@ class TestDataUtilities:
         if not cls._api_client:
             with cls._lock:
                 if not cls._api_client:
-                    cls._api_client = ApiClientBuilder().build(CredentialsSource.secrets_path())
+                    # Share the tokens with other processes when a token cache file is configured
+                    token_cache_path = os.getenv("FBN_TOKEN_CACHE", None)
+
+                    # The client is built from the cached credentials rather than parsing the secrets file again
+                    api_configuration = CredentialsSource.api_configuration()
+                    if token_cache_path is not None:
+                        api_client = TokenCache(token_cache_path).api_client(api_configuration=api_configuration)
+                    else:
+                        api_client = ApiClientBuilder().build(api_configuration=api_configuration)
+
+                    # The models of every request are serialised with plans compiled once per model class, only
+                    # when enabled as the plans read the values of the models directly rather than their getters
+                    if os.getenv("FBN_FAST_SERIALIZER", "").lower() in ("1", "true"):
+                        ModelSerializer.install(api_client)
+
+                    # Bodies prepared by the loaders are serialised once and reused on retries, they are only
+                    # gzipped when enabled as not every deployment accepts compressed requests
+                    RequestBodyEncoder.install(api_client,
+                                               compress=os.getenv("FBN_GZIP_REQUESTS", "").lower() in ("1", "true"))
+
+                    # Identical reads made at the same time by many workers are sent once and share the response,
+                    # only when enabled as the tutorials which read and write the same data expect fresh reads
+                    if os.getenv("FBN_SINGLE_FLIGHT", "").lower() in ("1", "true"):
+                        SingleFlight.install(api_client)
+
+                    # Only shared once set up, as other threads read it without taking the lock
+                    cls._api_client = api_client
         return cls._api_client
 
     def create_transaction_portfolio(self, scope):
@@ -54,8 +110,17 @@ class TestDataUtilities:
 
         return portfolio.id.code
 
-    def build_transaction_request(self, instrument_id, units, price, currency, trade_date, transaction_type):
-        return models.TransactionRequest(transaction_id=str(uuid.uuid4()),
+    def build_transaction_request(self, instrument_id, units, price, currency, trade_date, transaction_type,
+                                  business_key=None):
+        """
+        Builds a transaction request, with a random transaction id unless a business key is supplied
+
+        :param str business_key: The reference identifying the trade in the source system, the transaction id is
+        derived from it alone so that re-sending the trade with corrected values updates it. Required when the
+        utilities use deterministic ids.
+        """
+        transaction_id = self._transaction_id(business_key)
+        return models.TransactionRequest(transaction_id=transaction_id,
                                          type=transaction_type,
                                          instrument_identifiers={self.lusid_luid_identifier: instrument_id},
                                          transaction_date=trade_date,
@@ -66,8 +131,9 @@ class TestDataUtilities:
                                                                                       currency=currency),
                                          source="Broker")
 
-    def build_cash_fundsin_transaction_request(self, units, currency, trade_date):
-        return models.TransactionRequest(transaction_id=str(uuid.uuid4()),
+    def build_cash_fundsin_transaction_request(self, units, currency, trade_date, business_key=None):
+        transaction_id = self._transaction_id(business_key)
+        return models.TransactionRequest(transaction_id=transaction_id,
                                          type="FundsIn",
                                          instrument_identifiers={self.lusid_cash_identifier: currency},
                                          transaction_date=trade_date,
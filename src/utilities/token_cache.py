@@ -0,0 +1,247 @@
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from lusid.utilities import ApiClientBuilder, ApiConfigurationLoader
+from lusid.utilities.refreshing_token import RefreshingToken
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class SharedRefreshingToken(RefreshingToken):
+    """
+    A RefreshingToken which shares its tokens with other processes through a TokenCache.
+
+    The token is refreshed ahead of its expiry by whichever process first takes the lock of the cache, the other
+    processes carry on with the current token and pick up the refreshed one from the cache file.
+    """
+
+    def __init__(self, cache, key, api_configuration, expiry_offset=60, id_provider_response_handler=None):
+        super().__init__(api_configuration, expiry_offset, id_provider_response_handler)
+        self.cache = cache
+        self.key = key
+        self.token_data["expires_at"] = 0.0
+        self.token_data["refresh_at"] = 0.0
+        self.refresh_func = self.get_shared_token
+
+    def update_token_data(self, id_provider_json):
+        super().update_token_data(id_provider_json)
+        expires_in = id_provider_json.get("expires_in", 3600)
+
+        # Short lived tokens would otherwise be treated as expired, or due a refresh, as soon as they are issued
+        expiry_offset = min(self.expiry_offset, expires_in * self.cache.refresh_fraction)
+        lifetime = expires_in - expiry_offset
+        refresh_ahead = min(self.cache.refresh_ahead, lifetime * self.cache.refresh_fraction)
+
+        now = time.time()
+        self.token_data["expires"] = datetime.utcnow() + timedelta(seconds=lifetime)
+        self.token_data["expires_at"] = now + lifetime
+        self.token_data["refresh_at"] = now + lifetime - refresh_ahead
+
+    def _adopt(self, entry):
+        """
+        Takes the tokens from an entry of the cache if they last longer than the tokens held
+        """
+        if entry is not None and entry["expires_at"] > self.token_data["expires_at"]:
+            self.token_data.update(
+                access_token=entry["access_token"],
+                refresh_token=entry["refresh_token"],
+                expires_at=entry["expires_at"],
+                refresh_at=entry.get("refresh_at", entry["expires_at"] - self.cache.refresh_ahead),
+                expires=datetime.utcnow() + timedelta(seconds=entry["expires_at"] - time.time()))
+
+    def _fresh(self):
+        return self.token_data["access_token"] is not None and \
+            time.time() < self.token_data["refresh_at"]
+
+    def get_shared_token(self):
+        """
+        Returns an access token, refreshing it when it is close to expiry
+
+        :return: str: The access token
+        """
+        if self._fresh():
+            return self.token_data["access_token"]
+
+        self._adopt(self.cache.read(self.key))
+        if self._fresh():
+            return self.token_data["access_token"]
+
+        # Wait for the lock only when there is no valid token to carry on with
+        valid = self.token_data["access_token"] is not None and time.time() < self.token_data["expires_at"]
+
+        with self.cache.lock(blocking=not valid) as elected:
+            if not elected:
+                return self.token_data["access_token"]
+
+            # Another process may have refreshed the token while the lock was being taken
+            self._adopt(self.cache.read(self.key))
+            if self._fresh():
+                return self.token_data["access_token"]
+
+            # Force the refresh, falling back to the credentials when there is no refresh token
+            self.token_data["expires"] = datetime.utcnow()
+            access_token = self.get_refresh_token()
+
+            self.cache.write(self.key, {
+                "access_token": self.token_data["access_token"],
+                "refresh_token": self.token_data["refresh_token"],
+                "expires_at": self.token_data["expires_at"],
+                "refresh_at": self.token_data["refresh_at"],
+            })
+            return access_token
+
+
+class TokenCache:
+    """
+    This class is used for sharing OAuth tokens between processes through a file, so that many processes building
+    api clients with the same credentials only request tokens from the identity provider once.
+    """
+
+    def __init__(self, path, refresh_ahead=300, refresh_fraction=0.5):
+        """
+
+        Parameters
+        ----------
+        path : str
+            Path of the cache file, which is created readable by its owner only. A lock file is created alongside.
+        refresh_ahead : int, optional
+            The number of seconds before expiry at which a token is refreshed
+        refresh_fraction : float, optional
+            The largest fraction of a token's lifetime given over to refreshing it ahead of expiry, so that tokens
+            which last less than the refresh window are still used for a while before being refreshed
+        """
+        self.path = str(path)
+        self.lock_path = f"{self.path}.lock"
+        self.refresh_ahead = refresh_ahead
+        self.refresh_fraction = refresh_fraction
+
+    @staticmethod
+    def key(api_configuration):
+        """
+        The key of the tokens of a configuration in the cache, the credentials themselves are not stored
+
+        :param ApiConfiguration api_configuration: The configuration
+
+        :return: str: The key
+        """
+        identity = f"{api_configuration.token_url}|{api_configuration.username}|{api_configuration.client_id}"
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def read(self, key):
+        """
+        Reads the tokens of a key from the cache file
+
+        :param str key: The key
+
+        :return: dict: The access token, refresh token and expiry as epoch seconds, or None if not cached
+        """
+        try:
+            with open(self.path) as cache_file:
+                return json.load(cache_file).get(key)
+        except (OSError, ValueError):
+            return None
+
+    def write(self, key, entry):
+        """
+        Writes the tokens of a key to the cache file, which should only be done whilst holding the lock
+
+        :param str key: The key
+        :param dict entry: The access token, refresh token, expiry and refresh time as epoch seconds
+
+        :return: None
+        """
+        try:
+            with open(self.path) as cache_file:
+                entries = json.load(cache_file)
+        except (OSError, ValueError):
+            entries = {}
+
+        # Drop any expired entries of other keys
+        now = time.time()
+        entries = {other: value for other, value in entries.items() if value.get("expires_at", 0) > now}
+        entries[key] = entry
+
+        # Replaced in one step so that readers without the lock never see a partial file
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with os.fdopen(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as cache_file:
+            json.dump(entries, cache_file)
+        os.replace(temp_path, self.path)
+
+    @contextmanager
+    def lock(self, blocking=True):
+        """
+        Takes the lock of the cache file, electing the holder to refresh the tokens
+
+        :param bool blocking: Whether to wait for the lock when another process holds it
+
+        :return: bool: Whether the lock was taken
+        """
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield False
+                    return
+            else:
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            yield False
+                            return
+                        time.sleep(0.05)
+
+            try:
+                yield True
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def token(self, api_configuration, id_provider_response_handler=None):
+        """
+        Creates a token for a configuration which is shared through the cache
+
+        :param ApiConfiguration api_configuration: The configuration, holding the credentials
+        :param callable id_provider_response_handler: A handler of the responses from the identity provider
+
+        :return: SharedRefreshingToken: The token
+        """
+        return SharedRefreshingToken(self, self.key(api_configuration), api_configuration,
+                                     id_provider_response_handler=id_provider_response_handler)
+
+    def api_client(self, api_secrets_filename=None, api_configuration=None):
+        """
+        Builds an api client whose token is shared through the cache
+
+        :param str api_secrets_filename: Path of the secrets file, the environment variables are used if not supplied
+        :param ApiConfiguration api_configuration: A configuration overriding the secrets file
+
+        :return: lusid.ApiClient: The api client
+        """
+        configuration = ApiConfigurationLoader.load(api_secrets_filename)
+        if api_configuration is not None:
+            for key, value in vars(api_configuration).items():
+                if value is not None:
+                    setattr(configuration, key, value)
+
+        # A personal access token needs no refreshing
+        token = configuration.access_token if configuration.access_token is not None else self.token(configuration)
+
+        return ApiClientBuilder().build(api_secrets_filename, api_configuration=api_configuration, token=token)
@@ -0,0 +1,175 @@
+import threading
+
+import numpy as np
+
+import lusid
+from utilities.aggregation_frame import AggregationFrame
+from utilities.batch_runner import BatchRunner
+
+
+class TrackingAnalytics:
+    """
+    This class is used for comparing transaction portfolios with the reference portfolios they track.
+
+    The constituent weights of each reference portfolio and the holdings of the portfolio tracking it are loaded
+    into a single AggregationFrame keyed by 'pair' and 'instrument', with the metrics 'benchmark' and 'portfolio'.
+    Every instrument held by either side of a pair has one row, so the weights of all pairs are aligned and the
+    analytics of thousands of pairs are computed in one vectorised pass.
+    """
+
+    def __init__(self, reference_portfolio_api: lusid.ReferencePortfolioApi,
+                 transaction_portfolios_api: lusid.TransactionPortfoliosApi, max_workers=8):
+        """
+
+        Parameters
+        ----------
+        reference_portfolio_api : lusid.ReferencePortfolioApi
+            The api used to get the constituents of the reference portfolios
+        transaction_portfolios_api : lusid.TransactionPortfoliosApi
+            The api used to get the holdings of the tracking portfolios
+        max_workers : int, optional
+            The number of pairs to load concurrently
+        """
+        self.reference_portfolio_api = reference_portfolio_api
+        self.transaction_portfolios_api = transaction_portfolios_api
+        self.runner = BatchRunner(max_workers=max_workers)
+
+    @staticmethod
+    def frame(benchmarks, portfolios):
+        """
+        Builds the aligned frame of the weights of pairs
+
+        :param dict[str, (list[str], list[float])] benchmarks: The instrument ids and weights of the benchmark of
+        each pair, keyed by the name of the pair
+        :param dict[str, (list[str], list[float])] portfolios: The instrument ids and values of the portfolio of each
+        pair, keyed by the name of the pair
+
+        :return: AggregationFrame: The weights keyed by 'pair' and 'instrument', with the metrics 'benchmark' and
+        'portfolio' which are zero where a side does not hold the instrument
+        """
+        pairs, instruments, benchmark, portfolio = [], [], [], []
+        for side, sides in ((benchmark, benchmarks), (portfolio, portfolios)):
+            other = portfolio if side is benchmark else benchmark
+            for name, (side_instruments, values) in sides.items():
+                pairs.extend([name] * len(side_instruments))
+                instruments.extend(side_instruments)
+                side.extend(values)
+                other.extend([0.0] * len(side_instruments))
+
+        return AggregationFrame(
+            {"pair": AggregationFrame.encode(pairs), "instrument": AggregationFrame.encode(instruments)},
+            {"benchmark": np.array(benchmark, dtype=np.float64), "portfolio": np.array(portfolio, dtype=np.float64)}
+        ).regroup(["pair", "instrument"])
+
+    def load(self, pairs, effective_at=None, prices=None):
+        """
+        Loads the constituents of the reference portfolios and the holdings of the portfolios tracking them
+
+        :param dict[str, ((str, str), (str, str))] pairs: The (scope, code) of the reference portfolio and of the
+        tracking portfolio, keyed by the name of the pair
+        :param str effective_at: The effective date of the constituents and holdings, defaults to now
+        :param dict[str, float] prices: The price of each instrument by LUSID instrument id. The holdings are
+        weighted by their units times their price when given, otherwise by their cost in the portfolio currency.
+
+        :return: (BatchResult, AggregationFrame): The result, with any pairs which failed to load, and the frame
+        of the pairs which loaded as built by ``frame``
+        """
+        kwargs = {} if effective_at is None else {"effective_at": effective_at}
+        benchmarks, portfolios = {}, {}
+        lock = threading.Lock()
+
+        def load_chunk(chunk):
+            for name in chunk:
+                (reference_scope, reference_code), (portfolio_scope, portfolio_code) = pairs[name]
+                constituents = self.reference_portfolio_api.get_reference_portfolio_constituents(
+                    scope=reference_scope, code=reference_code, **kwargs).constituents or []
+                holdings = self.transaction_portfolios_api.get_holdings(
+                    scope=portfolio_scope, code=portfolio_code, **kwargs).values
+
+                positions = [holding for holding in holdings if holding.holding_type == "P"]
+                if prices is None:
+                    values = [holding.cost_portfolio_ccy.amount for holding in positions]
+                else:
+                    values = [holding.units * prices[holding.instrument_uid] for holding in positions]
+
+                with lock:
+                    benchmarks[name] = ([constituent.instrument_uid for constituent in constituents],
+                                        [constituent.weight for constituent in constituents])
+                    portfolios[name] = ([holding.instrument_uid for holding in positions], values)
+            return []
+
+        result = self.runner.run(load_chunk, BatchRunner.chunk(pairs, 1))
+        return result, self.frame(benchmarks, portfolios)
+
+    @staticmethod
+    def normalised(frame, metric):
+        """
+        Normalises the weights of one side of each pair to sum to one
+
+        :param AggregationFrame frame: The frame built by ``frame``
+        :param str metric: The side, 'benchmark' or 'portfolio'
+
+        :return: numpy.ndarray: The normalised weight of each row, zero where the side has no weights at all
+        """
+        return np.nan_to_num(frame.proportion(metric, by=["pair"]))
+
+    @classmethod
+    def active_weights(cls, frame):
+        """
+        The normalised weight of the portfolio less that of the benchmark for each instrument of each pair
+
+        :param AggregationFrame frame: The frame built by ``frame``
+
+        :return: numpy.ndarray: The active weight of each row
+        """
+        return cls.normalised(frame, "portfolio") - cls.normalised(frame, "benchmark")
+
+    @classmethod
+    def drift(cls, frame):
+        """
+        Measures how far the portfolio of each pair has drifted from its benchmark
+
+        :param AggregationFrame frame: The frame built by ``frame``
+
+        :return: AggregationFrame: One row per pair, with the 'active_share', half the sum of the absolute active
+        weights which is also the one way turnover that would bring the portfolio back to its benchmark, and the
+        'max_active_weight', the largest absolute active weight of any instrument
+        """
+        absolute = np.abs(cls.active_weights(frame))
+        pairs, categories = frame.keys["pair"]
+
+        active_share = np.bincount(pairs, weights=absolute, minlength=len(categories)) / 2
+        max_active_weight = np.zeros(len(categories))
+        np.maximum.at(max_active_weight, pairs, absolute)
+
+        return AggregationFrame(
+            {"pair": (np.arange(len(categories), dtype=np.int32), categories)},
+            {"active_share": active_share, "max_active_weight": max_active_weight})
+
+    @classmethod
+    def turnover(cls, before, after, metric="benchmark"):
+        """
+        The one way turnover of one side of each pair between two frames, such as the constituents of the reference
+        portfolios before and after a rebalance
+
+        :param AggregationFrame before: The earlier frame
+        :param AggregationFrame after: The later frame
+        :param str metric: The side, 'benchmark' or 'portfolio'
+
+        :return: AggregationFrame: One row per pair with its 'turnover', half the sum of the absolute changes in
+        normalised weight
+        """
+        # Encode the keys of both frames together and align their normalised weights on the pair and instrument
+        pairs = AggregationFrame.encode(np.concatenate([before.key("pair"), after.key("pair")]).tolist())
+        instruments = AggregationFrame.encode(
+            np.concatenate([before.key("instrument"), after.key("instrument")]).tolist())
+        changes = AggregationFrame(
+            {"pair": pairs, "instrument": instruments},
+            {"change": np.concatenate([-cls.normalised(before, metric), cls.normalised(after, metric)])}
+        ).regroup(["pair", "instrument"])
+
+        codes, categories = changes.keys["pair"]
+        return AggregationFrame(
+            {"pair": (np.arange(len(categories), dtype=np.int32), categories)},
+            {"turnover": np.bincount(codes, weights=np.abs(changes.metrics["change"]),
+                                     minlength=len(categories)) / 2})
@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+
+import lusid
+from utilities.batch_runner import BatchRunner
+
+
+class TransactionCanceller:
+    """
+    This class is used for cancelling large numbers of transactions from a portfolio in concurrent chunks
+    """
+
+    def __init__(self, transaction_portfolios_api: lusid.TransactionPortfoliosApi, chunk_size=100, max_workers=4,
+                 page_size=5000):
+        """
+
+        Parameters
+        ----------
+        transaction_portfolios_api : lusid.TransactionPortfoliosApi
+            The api used to list and cancel the transactions
+        chunk_size : int, optional
+            The number of transaction ids sent in each call to ``cancel_transactions``, the ids are sent in the
+            query string so this is kept small
+        max_workers : int, optional
+            The number of chunks to cancel concurrently
+        page_size : int, optional
+            The number of transactions fetched in each page of ``get_transactions``
+        """
+        self.transaction_portfolios_api = transaction_portfolios_api
+        self.chunk_size = chunk_size
+        self.runner = BatchRunner(max_workers=max_workers)
+        self.page_size = page_size
+
+    def stream_transaction_ids(self, scope, code, as_at, filter=None, from_transaction_date=None,
+                               to_transaction_date=None):
+        """
+        Generator paging through the ids of the transactions in a portfolio
+
+        :param str scope: The scope of the portfolio
+        :param str code: The code of the portfolio
+        :param as_at: The as at to list the transactions at, pinned so that pages are consistent
+        :param str filter: Expression to filter the transactions with e.g. "type eq 'Buy'"
+        :param from_transaction_date: The lower bound effective date of the transactions
+        :param to_transaction_date: The upper bound effective date of the transactions
+
+        :return: Iterator[str]: The transaction ids
+        """
+        page = None
+        while True:
+            kwargs = {"page": page} if page is not None else {
+                "as_at": as_at,
+                "filter": filter,
+                "from_transaction_date": from_transaction_date,
+                "to_transaction_date": to_transaction_date,
+            }
+            response = self.transaction_portfolios_api.get_transactions(
+                scope=scope, code=code, limit=self.page_size,
+                **{key: value for key, value in kwargs.items() if value is not None})
+
+            for transaction in response.values:
+                yield transaction.transaction_id
+
+            page = response.next_page
+            if page is None:
+                return
+
+    @staticmethod
+    def _read_checkpoint(checkpoint_path, scope, code):
+        if checkpoint_path is None or not os.path.isfile(checkpoint_path):
+            return None, set()
+
+        with open(checkpoint_path) as checkpoint_file:
+            header = json.loads(checkpoint_file.readline())
+            if header["scope"] != scope or header["code"] != code:
+                raise ValueError(f"Checkpoint {checkpoint_path} is for portfolio {header['scope']}/{header['code']}")
+            cancelled = {line.rstrip("\n") for line in checkpoint_file if line.strip()}
+
+        return header["as_at"], cancelled
+
+    def cancel(self, scope, code, filter=None, from_transaction_date=None, to_transaction_date=None,
+               checkpoint_path=None):
+        """
+        Cancels the transactions in a portfolio matching a filter
+
+        The transactions are listed at a pinned as at, taken from LUSID on the first run. When a checkpoint path
+        is given, each cancelled chunk is appended to the file along with the pinned as at, so that a run which
+        is interrupted can be resumed by calling ``cancel`` again with the same path. The file is removed once
+        every transaction has been cancelled.
+
+        :param str scope: The scope of the portfolio
+        :param str code: The code of the portfolio
+        :param str filter: Expression to filter the transactions with e.g. "type eq 'Buy'"
+        :param from_transaction_date: The lower bound effective date of the transactions
+        :param to_transaction_date: The upper bound effective date of the transactions
+        :param str checkpoint_path: Path of the file recording progress
+
+        :return: BatchResult: The result, with the rate in transactions cancelled per second
+        """
+        as_at, cancelled = self._read_checkpoint(checkpoint_path, scope, code)
+
+        if as_at is None:
+            # Pin the as at so that transactions upserted while cancelling are not picked up part way through
+            as_at = self.transaction_portfolios_api.get_transactions(
+                scope=scope, code=code, limit=1).version.as_at_date.isoformat()
+
+            if checkpoint_path is not None:
+                with open(checkpoint_path, "w") as checkpoint_file:
+                    checkpoint_file.write(json.dumps({"scope": scope, "code": code, "as_at": as_at}) + "\n")
+
+        lock = threading.Lock()
+
+        def cancel_chunk(transaction_ids):
+            self.transaction_portfolios_api.cancel_transactions(scope=scope, code=code,
+                                                                transaction_ids=transaction_ids)
+            if checkpoint_path is not None:
+                with lock, open(checkpoint_path, "a") as checkpoint_file:
+                    checkpoint_file.writelines(f"{transaction_id}\n" for transaction_id in transaction_ids)
+            return []
+
+        transaction_ids = (
+            transaction_id
+            for transaction_id in self.stream_transaction_ids(scope, code, as_at, filter, from_transaction_date,
+                                                              to_transaction_date)
+            if transaction_id not in cancelled
+        )
+
+        result = self.runner.run(cancel_chunk, BatchRunner.chunk(transaction_ids, self.chunk_size))
+
+        if checkpoint_path is not None and not result.failed_chunks:
+            os.remove(checkpoint_path)
+
+        return result
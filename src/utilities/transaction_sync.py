@@ -0,0 +1,214 @@
+import json
+import sqlite3
+import threading
+
+import lusid
+from utilities.batch_runner import BatchRunner
+
+
+class TransactionSync:
+    """
+    This class is used for keeping a local SQLite replica of the transactions of portfolios up to date.
+
+    The as at of the last sync of each portfolio is stored as its watermark. After the first load only the
+    transactions entered or cancelled since the watermark are fetched and applied.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS watermarks (
+            scope TEXT NOT NULL,
+            code TEXT NOT NULL,
+            as_at TEXT NOT NULL,
+            PRIMARY KEY (scope, code)
+        );
+        CREATE TABLE IF NOT EXISTS transactions (
+            scope TEXT NOT NULL,
+            code TEXT NOT NULL,
+            transaction_id TEXT NOT NULL,
+            type TEXT,
+            instrument_uid TEXT,
+            transaction_date TEXT,
+            settlement_date TEXT,
+            units REAL,
+            price REAL,
+            total_consideration REAL,
+            currency TEXT,
+            entry_date_time TEXT,
+            body TEXT NOT NULL,
+            PRIMARY KEY (scope, code, transaction_id)
+        );
+    """
+
+    def __init__(self, transaction_portfolios_api: lusid.TransactionPortfoliosApi, database_path, max_workers=4,
+                 page_size=5000):
+        """
+
+        Parameters
+        ----------
+        transaction_portfolios_api : lusid.TransactionPortfoliosApi
+            The api used to get the transactions
+        database_path : str
+            Path of the SQLite database holding the replica, created if it does not exist
+        max_workers : int, optional
+            The number of portfolios to sync concurrently
+        page_size : int, optional
+            The number of transactions fetched in each page of ``get_transactions``
+        """
+        self.transaction_portfolios_api = transaction_portfolios_api
+        self.runner = BatchRunner(max_workers=max_workers)
+        self.page_size = page_size
+
+        # Fetching runs concurrently, writes to the database are serialised by the lock
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(database_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self._lock, self.connection:
+            self.connection.executescript(self.schema)
+
+    def close(self):
+        """
+        Closes the database
+
+        :return: None
+        """
+        self.connection.close()
+
+    def watermark(self, scope, code):
+        """
+        The as at the portfolio was last synced at
+
+        :param str scope: The scope of the portfolio
+        :param str code: The code of the portfolio
+
+        :return: str: The as at, or None if the portfolio has not been synced
+        """
+        with self._lock:
+            row = self.connection.execute("SELECT as_at FROM watermarks WHERE scope = ? AND code = ?",
+                                          (scope, code)).fetchone()
+        return None if row is None else row["as_at"]
+
+    @staticmethod
+    def delta_filter(watermark):
+        """
+        Builds the filter selecting the transactions entered or cancelled after the watermark
+
+        :param str watermark: The as at of the last sync
+
+        :return: str: The filter expression
+        """
+        return f"entryDateTime gt {watermark} or cancelDateTime gt {watermark}"
+
+    def fetch(self, scope, code, watermark=None):
+        """
+        Fetches the transactions of a portfolio, or only those changed since the watermark
+
+        :param str scope: The scope of the portfolio
+        :param str code: The code of the portfolio
+        :param str watermark: The as at of the last sync, when not supplied every transaction is fetched
+
+        :return: (str, list[Transaction]): The as at the transactions were fetched at and the transactions,
+        including any cancelled since the watermark
+        """
+        kwargs = {"limit": self.page_size}
+        if watermark is not None:
+            kwargs.update(filter=self.delta_filter(watermark), show_cancelled_transactions=True)
+
+        response = self.transaction_portfolios_api.get_transactions(scope=scope, code=code, **kwargs)
+        # Later pages are read at the as at of the first
+        as_at = response.version.as_at_date
+        transactions = list(response.values)
+
+        while response.next_page is not None:
+            response = self.transaction_portfolios_api.get_transactions(
+                scope=scope, code=code, limit=self.page_size, page=response.next_page)
+            transactions.extend(response.values)
+
+        return as_at if isinstance(as_at, str) else as_at.isoformat(), transactions
+
+    def _row(self, scope, code, transaction):
+        body = self.transaction_portfolios_api.api_client.sanitize_for_serialization(transaction)
+        price = transaction.transaction_price
+        consideration = transaction.total_consideration
+        return (
+            scope,
+            code,
+            transaction.transaction_id,
+            transaction.type,
+            transaction.instrument_uid,
+            body.get("transactionDate"),
+            body.get("settlementDate"),
+            transaction.units,
+            None if price is None else price.price,
+            None if consideration is None else consideration.amount,
+            None if consideration is None else consideration.currency,
+            body.get("entryDateTime"),
+            json.dumps(body),
+        )
+
+    def _apply(self, scope, code, as_at, transactions, full_load):
+        def is_cancelled(transaction):
+            return transaction.cancel_date_time is not None or transaction.transaction_status == "Cancelled"
+
+        rows = [self._row(scope, code, transaction) for transaction in transactions if not is_cancelled(transaction)]
+
+        # An amended transaction may also be returned as its cancelled previous version, which is not removed
+        active_ids = {row[2] for row in rows}
+        cancelled = [
+            (scope, code, transaction.transaction_id) for transaction in transactions
+            if is_cancelled(transaction) and transaction.transaction_id not in active_ids
+        ]
+
+        # The changes and the new watermark are committed together, so a failed sync is simply retried
+        with self._lock, self.connection:
+            if full_load:
+                self.connection.execute("DELETE FROM transactions WHERE scope = ? AND code = ?", (scope, code))
+            self.connection.executemany(
+                "DELETE FROM transactions WHERE scope = ? AND code = ? AND transaction_id = ?", cancelled)
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO watermarks (scope, code, as_at) VALUES (?, ?, ?)", (scope, code, as_at))
+
+        return len(rows) + len(cancelled)
+
+    def sync_portfolio(self, scope, code):
+        """
+        Brings the replica of a portfolio up to date
+
+        :param str scope: The scope of the portfolio
+        :param str code: The code of the portfolio
+
+        :return: int: The number of transactions added, amended or removed
+        """
+        watermark = self.watermark(scope, code)
+        as_at, transactions = self.fetch(scope, code, watermark)
+        return self._apply(scope, code, as_at, transactions, full_load=watermark is None)
+
+    def sync(self, portfolios):
+        """
+        Brings the replicas of portfolios up to date concurrently
+
+        :param list[(str, str)] portfolios: The (scope, code) of each portfolio
+
+        :return: BatchResult: The result, with the number of portfolios synced and any that failed
+        """
+        def sync_chunk(chunk):
+            for scope, code in chunk:
+                self.sync_portfolio(scope, code)
+            return []
+
+        return self.runner.run(sync_chunk, BatchRunner.chunk(portfolios, 1))
+
+    def transactions(self, scope, code):
+        """
+        Reads the replicated transactions of a portfolio
+
+        :param str scope: The scope of the portfolio
+        :param str code: The code of the portfolio
+
+        :return: list[sqlite3.Row]: The transactions ordered by transaction date
+        """
+        with self._lock:
+            return self.connection.execute(
+                "SELECT * FROM transactions WHERE scope = ? AND code = ? ORDER BY transaction_date, transaction_id",
+                (scope, code)).fetchall()
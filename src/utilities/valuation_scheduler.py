@@ -0,0 +1,220 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import groupby
+
+import numpy as np
+from dateutil.parser import isoparse
+
+import lusid
+import lusid.models as models
+from utilities.aggregation_frame import AggregationFrame
+from utilities.batch_runner import BatchRunner
+from utilities.rate_limiter import RateLimiter
+
+
+def to_datetime64(date):
+    """
+    Converts a timezone aware datetime, or an ISO 8601 string, to a UTC datetime64 in seconds
+    """
+    if isinstance(date, str):
+        date = isoparse(date)
+    if isinstance(date, datetime) and date.tzinfo is not None:
+        return np.datetime64(int(date.timestamp()), "s")
+    return np.datetime64(date, "s")
+
+
+class ValuationCube(AggregationFrame):
+    """
+    This class holds the rows of many valuations in columns, one entry per (date, portfolio, group key)
+    """
+
+    date_key = "EffectiveAt"
+    portfolio_key = "Portfolio"
+
+    def __init__(self, keys, metrics, group_by):
+        """
+
+        Parameters
+        ----------
+        keys : dict[str, (numpy.ndarray, numpy.ndarray)]
+            The (codes, categories) of the date, the portfolio and each group by key
+        metrics : dict[str, numpy.ndarray]
+            The values of each metric, float64 for numeric metrics and object otherwise
+        group_by : list[str]
+            The keys the valuations were grouped by
+        """
+        super().__init__(keys, metrics)
+        self.group_by = group_by
+
+    @property
+    def dates(self):
+        """
+        The effective date of each row as datetime64
+        """
+        return self.key(self.date_key)
+
+    @property
+    def portfolios(self):
+        """
+        The portfolio of each row as 'scope/code'
+        """
+        return self.key(self.portfolio_key)
+
+    @property
+    def group_keys(self):
+        """
+        The group by values of each row, as a tuple when grouping by more than one key
+        """
+        if len(self.group_by) == 1:
+            return self.key(self.group_by[0])
+
+        group_keys = np.empty(len(self), dtype=object)
+        group_keys[:] = list(zip(*(self.key(key) for key in self.group_by)))
+        return group_keys
+
+    def select(self, date=None, portfolio=None, group_key=None):
+        """
+        Selects the rows matching all of the supplied dimensions
+
+        :param date: The effective date, a timezone aware datetime or ISO 8601 string
+        :param str portfolio: The portfolio as 'scope/code'
+        :param group_key: The group by value, as a tuple when grouping by more than one key
+
+        :return: ValuationCube: A cube holding only the selected rows
+        """
+        values = {}
+        if date is not None:
+            values[self.date_key] = to_datetime64(date)
+        if portfolio is not None:
+            values[self.portfolio_key] = portfolio
+        if group_key is not None:
+            values.update(zip(self.group_by, group_key) if len(self.group_by) > 1 else {self.group_by[0]: group_key})
+
+        return self.filter(self.mask(**values))
+
+    @classmethod
+    def from_rows(cls, rows, group_by, ignore=()):
+        """
+        Builds a cube from (date, portfolio, row) tuples, where each row is an entry in the ``data`` of a
+        ListAggregationResponse
+
+        :param list[(datetime, str, dict)] rows: The rows
+        :param list[str] group_by: The keys the valuations were grouped by
+        :param ignore: Keys in the rows which are neither group by keys nor metrics
+
+        :return: ValuationCube: The cube
+        """
+        frame = AggregationFrame.from_rows([row for _, _, row in rows], group_by, ignore)
+
+        keys = {
+            cls.date_key: cls.encode(np.array([to_datetime64(date) for date, _, _ in rows], dtype="datetime64[s]")),
+            cls.portfolio_key: cls.encode([portfolio for _, portfolio, _ in rows]),
+        }
+        keys.update(frame.keys)
+
+        return cls(keys, frame.metrics, group_by)
+
+
+class ValuationScheduler:
+    """
+    This class is used for valuing a grid of portfolios and dates with a recipe under a rate budget
+    """
+
+    def __init__(self, aggregation_api: lusid.AggregationApi, requests_per_second=10, max_workers=8,
+                 portfolios_per_request=1, portfolio_key="Portfolio/default/Code"):
+        """
+
+        Parameters
+        ----------
+        aggregation_api : lusid.AggregationApi
+            The api used to run the valuations
+        requests_per_second : float, optional
+            The rate budget for calls to ``get_valuation``
+        max_workers : int, optional
+            The number of valuations to run concurrently
+        portfolios_per_request : int, optional
+            The number of portfolios packed into the ``portfolio_entity_ids`` of one request. When more than
+            one the valuation is additionally grouped by ``portfolio_key`` to split the rows by portfolio.
+        portfolio_key : str, optional
+            The key identifying the portfolio of a row when portfolios are packed into one request
+        """
+        self.aggregation_api = aggregation_api
+        self.rate_limiter = RateLimiter(requests_per_second, burst=max_workers)
+        self.max_workers = max_workers
+        self.portfolios_per_request = portfolios_per_request
+        self.portfolio_key = portfolio_key
+
+    def build_requests(self, portfolios, dates, recipe_id, metrics, group_by):
+        """
+        Expands the grid of portfolios and dates into ValuationRequests, each valuing one date
+
+        :param list[(str, str)] portfolios: The (scope, code) of each portfolio
+        :param list[datetime] dates: The effective dates
+        :param ResourceId recipe_id: The recipe to value with
+        :param list[AggregateSpec] metrics: The metrics to return
+        :param list[str] group_by: The keys to group by
+
+        :return: list[(datetime, list[(str, str)], ValuationRequest)]: Each request with its date and portfolios
+        """
+        packed = self.portfolios_per_request > 1
+        request_group_by = group_by + [self.portfolio_key] if packed and self.portfolio_key not in group_by \
+            else group_by
+
+        # LUSID only returns the requested metrics in the rows, so the portfolio of each row of a packed request
+        # has to be requested as well as grouped by
+        request_metrics = metrics + [models.AggregateSpec(self.portfolio_key, "Value")] \
+            if packed and all(metric.key != self.portfolio_key for metric in metrics) else metrics
+
+        # Portfolios are only packed together within a scope so the rows can be matched back on code alone
+        batches = [
+            batch
+            for _, scope_portfolios in groupby(sorted(set(portfolios)), key=lambda portfolio: portfolio[0])
+            for batch in BatchRunner.chunk(scope_portfolios, self.portfolios_per_request)
+        ]
+
+        return [
+            (date, batch, models.ValuationRequest(
+                recipe_id=recipe_id,
+                metrics=request_metrics,
+                group_by=request_group_by,
+                valuation_schedule=models.ValuationSchedule(
+                    effective_at=date if isinstance(date, str) else date.isoformat()),
+                portfolio_entity_ids=[models.PortfolioEntityId(scope=scope, code=code) for scope, code in batch]))
+            for date in dates
+            for batch in batches
+        ]
+
+    def _value(self, request):
+        date, batch, valuation_request = request
+
+        self.rate_limiter.acquire()
+        response = self.aggregation_api.get_valuation(valuation_request=valuation_request)
+
+        if len(batch) == 1:
+            portfolio = "/".join(batch[0])
+            return [(date, portfolio, row) for row in response.data]
+
+        # Every portfolio of a batch is in the same scope, so the code of a row identifies its portfolio
+        scope = batch[0][0]
+        return [(date, f"{scope}/{row[self.portfolio_key]}", row) for row in response.data]
+
+    def run(self, portfolios, dates, recipe_id, metrics, group_by):
+        """
+        Values every portfolio at every date and assembles the results into one cube
+
+        :param list[(str, str)] portfolios: The (scope, code) of each portfolio
+        :param list[datetime] dates: The effective dates, timezone aware
+        :param ResourceId recipe_id: The recipe to value with
+        :param list[AggregateSpec] metrics: The metrics to return
+        :param list[str] group_by: The keys to group by
+
+        :return: ValuationCube: The valuations indexed by date, portfolio and group key
+        """
+        requests = self.build_requests(portfolios, dates, recipe_id, metrics, group_by)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            rows = [row for rows in executor.map(self._value, requests) for row in rows]
+
+        ignore = [self.portfolio_key] if self.portfolios_per_request > 1 and self.portfolio_key not in group_by \
+            and all(metric.key != self.portfolio_key for metric in metrics) else []
+        return ValuationCube.from_rows(rows, group_by, ignore)